@@ -0,0 +1,55 @@
+"""
+Benchmark of date parsing: datetime.strptime, as validate_date_format used
+before, against parse_iso_date.
+
+Per-call timings, in microseconds, for each kind of input:
+- strptime: datetime.strptime(text, "%Y-%m-%d")
+- uncached: parse_iso_date without its memo (fromisoformat fast path, or
+  the strptime fallback for non-canonical strings)
+- cached: parse_iso_date for a string seen before, as when a conversation
+  keeps asking about the same dates
+- date_calculator: a whole 'difference' call, which parses both dates
+
+Usage:
+    python -m benchmarks.bench_dates [--number N] [--repeat N]
+"""
+import argparse
+import timeit
+from datetime import datetime
+from typing import Callable
+
+from src.tools.date_calculator import clear_date_cache, date_calculator, parse_iso_date
+
+
+# (label, date string)
+INPUTS = [
+    ("canonical", "2024-01-15"),
+    ("non-canonical", "2024-1-5"),
+]
+
+
+def per_call_us(func: Callable[[], object], number: int, repeat: int) -> float:
+    """Best time of one call, in microseconds."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20_000, help="calls per timing")
+    parser.add_argument("--repeat", type=int, default=5, help="timings per case (the best is kept)")
+    args = parser.parse_args()
+
+    uncached = parse_iso_date.__wrapped__
+    print(f"{'input':<15} {'strptime':>10} {'uncached':>10} {'cached':>10} {'speedup':>8} {'date_calculator':>16}")
+    for label, text in INPUTS:
+        clear_date_cache()
+        strptime_us = per_call_us(lambda: datetime.strptime(text, "%Y-%m-%d"), args.number, args.repeat)
+        uncached_us = per_call_us(lambda: uncached(text), args.number, args.repeat)
+        cached_us = per_call_us(lambda: parse_iso_date(text), args.number, args.repeat)
+        tool_us = per_call_us(lambda: date_calculator.func("difference", text, "2024-12-31"), args.number, args.repeat)
+        print(f"{label:<15} {strptime_us:>10.3f} {uncached_us:>10.3f} {cached_us:>10.3f} "
+              f"{strptime_us / cached_us:>7.1f}x {tool_us:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
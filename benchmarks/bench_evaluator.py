@@ -0,0 +1,112 @@
+"""
+Microbenchmark of the iterative calculator evaluator against the previous
+recursive safe_eval, on shallow and very deep expressions.
+
+Three timings are reported per input:
+- recursive: the previous recursive evaluator walking the AST
+- iterative: compile_program + run_program from the same AST
+- compiled: run_program alone, as paid by repeated (cached) expressions
+
+Usage:
+    python -m benchmarks.bench_evaluator [--number N]
+"""
+import argparse
+import ast
+import math
+import operator
+import timeit
+from typing import Callable, List, Optional, Tuple
+
+from src.tools.calculator import MATH_FUNCTIONS, compile_program, parse_expression, run_program
+
+
+_LEGACY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+
+def recursive_safe_eval(node: ast.AST) -> float:
+    """The recursive isinstance-chain evaluator the calculator used before."""
+    if isinstance(node, ast.Constant):
+        return float(node.value)
+    elif isinstance(node, ast.Name):
+        if node.id in MATH_FUNCTIONS:
+            return MATH_FUNCTIONS[node.id]
+        raise ValueError(f"Unsupported constant: {node.id}")
+    elif isinstance(node, ast.BinOp):
+        left = recursive_safe_eval(node.left)
+        right = recursive_safe_eval(node.right)
+        op = _LEGACY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise ValueError(f"Unsupported operation: {type(node.op).__name__}")
+        if isinstance(node.op, ast.Div) and right == 0:
+            raise ZeroDivisionError("Division by zero is not allowed")
+        return op(left, right)
+    elif isinstance(node, ast.UnaryOp):
+        operand = recursive_safe_eval(node.operand)
+        op = _LEGACY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise ValueError(f"Unsupported unary operation: {type(node.op).__name__}")
+        return op(operand)
+    elif isinstance(node, ast.Call):
+        func_name = node.func.id if isinstance(node.func, ast.Name) else None
+        if func_name not in MATH_FUNCTIONS:
+            raise ValueError(f"Unsupported function: {func_name}")
+        args = [recursive_safe_eval(arg) for arg in node.args]
+        return float(MATH_FUNCTIONS[func_name](*args))
+    elif isinstance(node, ast.Expression):
+        return recursive_safe_eval(node.body)
+    raise ValueError(f"Unsupported expression type: {type(node).__name__}")
+
+
+CASES: List[Tuple[str, str]] = [
+    ("shallow: 2 + 2", "2 + 2"),
+    ("shallow: arithmetic", "(15 + 25) * 3 - 10 / 4"),
+    ("shallow: functions", "sqrt(25) + sin(pi / 2) * log10(1000)"),
+    ("deep: 500-term sum", " + ".join(str(i) for i in range(500))),
+    ("deep: 5,000-term sum", " + ".join(str(i) for i in range(5000))),
+    ("deep: 50,000-term sum", " + ".join(str(i) for i in range(50000))),
+]
+
+
+def _time(func: Callable[[], object], number: int) -> Optional[float]:
+    """Best per-call time in microseconds, or None if the call fails."""
+    try:
+        func()
+    except RecursionError:
+        return None
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def _format(value: Optional[float]) -> str:
+    return "RecursionError" if value is None else f"{value:.1f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000, help="evaluations per measurement for shallow inputs")
+    args = parser.parse_args()
+
+    print(f"{'input':<24} {'recursive (us)':>16} {'iterative (us)':>16} {'compiled (us)':>15}")
+    for name, expression in CASES:
+        tree = parse_expression(expression)
+        program = compile_program(tree)
+        number = max(1, args.number * 10 // max(len(expression), 10))
+
+        recursive = _time(lambda: recursive_safe_eval(tree), number)
+        iterative = _time(lambda: run_program(compile_program(tree), {}), number)
+        compiled = _time(lambda: run_program(program, {}), number)
+
+        if recursive is not None:
+            assert math.isclose(run_program(program, {}), recursive_safe_eval(tree))
+        print(f"{name:<24} {_format(recursive):>16} {_format(iterative):>16} {_format(compiled):>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark comparing the float and exact (int/Fraction) calculator paths.
+
+Measures the evaluation time of already compiled expressions, which is what
+repeated calls pay once the expression cache is warm.
+
+Usage:
+    python -m benchmarks.bench_exact_arithmetic [--number N]
+"""
+import argparse
+import timeit
+from typing import List, Tuple
+
+from src.tools.calculator import compile_expression
+
+
+# Typical inputs sent by the agent, mostly integer arithmetic
+COMMON_EXPRESSIONS: List[str] = [
+    "2 + 2",
+    "128 * 46",
+    "45 * 23 + 17",
+    "(15 + 25) * 3 - 10",
+    "1000 - 999",
+    "2 ** 10",
+    "100 / 5",
+    "abs(-10) + floor(7)",
+    "pow(2, 8) - 6",
+]
+
+
+def measure(expression: str, exact: bool, number: int) -> float:
+    """Returns the best per-call time in microseconds over a few repeats."""
+    compiled = compile_expression(expression, exact=exact)
+    best = min(timeit.repeat(compiled, number=number, repeat=5))
+    return best / number * 1e6
+
+
+def run(number: int) -> List[Tuple[str, float, float]]:
+    """Runs the benchmark and returns (expression, float_us, exact_us) rows."""
+    return [
+        (expression, measure(expression, False, number), measure(expression, True, number))
+        for expression in COMMON_EXPRESSIONS
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="evaluations per measurement")
+    args = parser.parse_args()
+
+    rows = run(args.number)
+
+    print(f"{'expression':<24} {'float (us)':>11} {'exact (us)':>11} {'ratio':>7}")
+    for expression, float_us, exact_us in rows:
+        print(f"{expression:<24} {float_us:>11.3f} {exact_us:>11.3f} {exact_us / float_us:>7.2f}")
+
+    total_float = sum(row[1] for row in rows)
+    total_exact = sum(row[2] for row in rows)
+    print(f"{'total':<24} {total_float:>11.3f} {total_exact:>11.3f} {total_exact / total_float:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark of the parallel statistics pool against the serial streaming
+summary, from 10^6 to 10^8 values.
+
+Two timings are reported per size, both producing the same approximate
+summary (running moments plus a quantile sketch):
+- serial: one StreamingStatistics fed the whole array, chunk by chunk
+- parallel: StatisticsPool.summarize_array, which copies the array into
+  shared memory once and merges the partial accumulators of the workers
+
+The pool is started (and its workers warmed up) before timing, as the
+agent keeps it running. The speedup is bounded by the number of CPU
+cores: with a single core the parallel mode only adds overhead.
+
+Usage:
+    python -m benchmarks.bench_parallel [--workers N] [--max-exponent N] [--repeat N]
+"""
+import argparse
+import os
+import time
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from src.tools.file_statistics import CHUNK_VALUES
+from src.tools.parallel import StatisticsPool
+from src.tools.streaming import StreamingStatistics
+
+
+def serial(data: np.ndarray) -> StreamingStatistics:
+    """The single-process summary that file_statistics uses for large files."""
+    accumulator = StreamingStatistics(exact_limit=0)
+    for start in range(0, len(data), CHUNK_VALUES):
+        accumulator.update(data[start:start + CHUNK_VALUES])
+    return accumulator
+
+
+def best_time(func: Callable[[np.ndarray], object], data: np.ndarray, repeat: int) -> float:
+    """Best wall-clock time in seconds over repeat calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(pool: StatisticsPool, max_exponent: int, repeat: int) -> List[Tuple[int, float, float]]:
+    """Returns (size, serial_s, parallel_s) rows."""
+    rng = np.random.default_rng(0)
+    rows = []
+    for exponent in range(6, max_exponent + 1):
+        size = 10 ** exponent
+        data = rng.normal(50, 10, size)
+        runs = repeat if size <= 10 ** 7 else 1
+        rows.append((size, best_time(serial, data, runs), best_time(pool.summarize_array, data, runs)))
+        del data
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-exponent", type=int, default=8, help="largest size as a power of ten")
+    parser.add_argument("--repeat", type=int, default=3, help="repeats per size up to 10^7 values")
+    args = parser.parse_args()
+
+    with StatisticsPool(workers=args.workers) as pool:
+        pool.summarize_array(np.zeros(pool.workers * pool.parts_per_worker))
+        print(f"{args.workers} workers, {os.cpu_count()} CPU cores")
+        print(f"{'values':>12} {'serial (s)':>11} {'parallel (s)':>13} {'speedup':>8} {'values/s':>14}")
+        for size, serial_time, parallel_time in run(pool, args.max_exponent, args.repeat):
+            print(f"{size:>12,} {serial_time:>11.4f} {parallel_time:>13.4f} "
+                  f"{serial_time / parallel_time:>8.2f} {size / parallel_time:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
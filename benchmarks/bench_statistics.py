@@ -0,0 +1,96 @@
+"""
+Benchmark of the fused statistics kernel against the previous multi-pass
+computation, from 10^3 to 10^8 values.
+
+Three timings are reported per size:
+- multi-pass: separate np.mean, np.median, np.std, np.var, np.min, np.max,
+  three np.percentile calls and statistics.mode over a Python list, as
+  statistics_analyzer did before
+- fused: summarize(), one sort plus one pass each for mean and variance
+- mean+std: compute_measures() for the mean and standard deviation
+  only, as statistics_analyzer does with measures=["media",
+  "desvio_padrao"]; no sort at all
+
+Both start from a float64 array, so parsing is not included. The
+multi-pass version keeps a Python list for statistics.mode and runs out of
+memory long before the fused one, so it is skipped above --legacy-max.
+
+Usage:
+    python -m benchmarks.bench_statistics [--max-exponent N] [--legacy-max N] [--repeat N]
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from src.tools.statistics import compute_measures, summarize
+
+
+def multi_pass(data: np.ndarray) -> Tuple[float, ...]:
+    """The separate NumPy and statistics calls statistics_analyzer used before."""
+    values = data.tolist()
+    return (
+        float(np.mean(data)),
+        float(np.median(data)),
+        float(np.std(data, ddof=1)),
+        float(np.var(data, ddof=1)),
+        float(np.min(data)),
+        float(np.max(data)),
+        statistics.mode(values),
+        float(np.percentile(data, 25)),
+        float(np.percentile(data, 50)),
+        float(np.percentile(data, 75)),
+    )
+
+
+def mean_and_std(data: np.ndarray) -> dict:
+    """Only the measures a mean/standard deviation question needs."""
+    return compute_measures(data, ["mean", "std_dev"])
+
+
+def best_time(func: Callable[[np.ndarray], object], data: np.ndarray, repeat: int) -> float:
+    """Best wall-clock time in seconds over repeat calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(max_exponent: int, legacy_max: int, repeat: int) -> List[Tuple[int, Optional[float], float, float]]:
+    """Returns (size, multi_pass_s or None, fused_s, mean_and_std_s) rows."""
+    rng = np.random.default_rng(0)
+    rows = []
+    for exponent in range(3, max_exponent + 1):
+        size = 10 ** exponent
+        # Rounded values, so the mode has real ties to find
+        data = np.round(rng.normal(50, 10, size), 2)
+        runs = repeat if size <= 10 ** 6 else 1
+        legacy = best_time(multi_pass, data, runs) if size <= legacy_max else None
+        fused = best_time(summarize, data, runs)
+        selected = best_time(mean_and_std, data, runs)
+        rows.append((size, legacy, fused, selected))
+        del data
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-exponent", type=int, default=8, help="largest size as a power of ten")
+    parser.add_argument("--legacy-max", type=int, default=10 ** 7,
+                        help="largest size measured with the multi-pass version")
+    parser.add_argument("--repeat", type=int, default=5, help="repeats per size up to 10^6 values")
+    args = parser.parse_args()
+
+    print(f"{'values':>12} {'multi-pass (s)':>15} {'fused (s)':>11} {'speedup':>8} {'values/s':>14} {'mean+std (s)':>13}")
+    for size, legacy, fused, selected in run(args.max_exponent, args.legacy_max, args.repeat):
+        legacy_text = f"{legacy:>15.4f}" if legacy is not None else f"{'-':>15}"
+        speedup = f"{legacy / fused:>8.2f}" if legacy is not None else f"{'-':>8}"
+        print(f"{size:>12,} {legacy_text} {fused:>11.4f} {speedup} {size / fused:>14,.0f} {selected:>13.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Latency and throughput benchmarks of the agent tools, with JSON baselines.
+
+Measures calculator, statistics_analyzer and date_calculator both through
+their underlying functions and through the LangChain .invoke wrapper, across
+input sizes, and the rolling and grouped statistics, bulk date and
+recurrence engines. A run can be saved as a baseline, and later runs
+compared with it: the comparison fails (exit code 1) when any case is
+slower than its baseline by more than the allowed percentage.
+
+Baselines depend on the machine, so compare only runs made on the same one.
+
+Usage:
+    python -m benchmarks.bench_tools [--filter TEXT] [--quick]
+    python -m benchmarks.bench_tools --save [--baseline PATH]
+    python -m benchmarks.bench_tools --compare [--threshold PERCENT] [--baseline PATH]
+"""
+import argparse
+import json
+import platform
+import sys
+import timeit
+from collections import namedtuple
+from datetime import date
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.tools.bulk_dates import bulk_dates
+from src.tools.calculator import calculator, compile_expression, evaluate_expression, format_result
+from src.tools.datasets import get_dataset_registry
+from src.tools.date_calculator import date_calculator, validate_date_format
+from src.tools.grouped import DEFAULT_GROUP_MEASURES, group_statistics
+from src.tools.parsing import parse_numbers
+from src.tools.recurrence import RecurrenceRule, summarize_occurrences
+from src.tools.rolling import compute_rolling
+from src.tools.statistics import statistics_analyzer
+
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "tools.json"
+
+# Allowed slowdown, in percent, before a case counts as a regression
+DEFAULT_THRESHOLD = 25.0
+
+# A benchmark case: a zero-argument callable and how many items (numbers,
+# terms) one call processes, used to report items per second
+BenchCase = namedtuple("BenchCase", ["name", "func", "items"])
+
+# A case slower than its baseline by more than the threshold
+Regression = namedtuple("Regression", ["name", "baseline_us", "current_us", "change_percent"])
+
+# (label, expression, number of terms)
+CALCULATOR_EXPRESSIONS = [
+    ("arithmetic", "(15 + 25) * 3 - 10 / 4", 1),
+    ("functions", "sqrt(25) + sin(pi / 2) * log10(1000)", 1),
+    ("100 terms", " + ".join(f"{i} * 2" for i in range(100)), 100),
+    ("1,000 terms", " + ".join(f"{i} * 2" for i in range(1000)), 1000),
+    ("sum closed form", "sum(i**2, i, 1, 10**7)", 10 ** 7),
+    ("sum 100,000 terms", "sum(sin(i), i, 1, 100000)", 100_000),
+]
+
+STATISTICS_SIZES = [10, 1_000, 100_000]
+
+# Group counts of the grouped statistics cases, over 1,000,000 values
+GROUP_COUNTS = [10, 10_000]
+
+# (window, measure) pairs of the rolling statistics cases, over 100,000 values
+ROLLING_CASES = [(50, "media"), (50, "desvio_padrao"), (50, "mediana"), (1_000, "mediana")]
+
+DATE_CALLS = [
+    ("difference", "2024-01-01", "2024-12-31"),
+    ("add_days", "2024-01-01", "30"),
+    ("day_of_week", "2024-01-01", None),
+    ("add_months", "2024-01-31", "1"),
+    ("diff_ymd", "2020-02-29", "2024-03-15"),
+]
+
+# Number of dates of the bulk date cases
+BULK_DATE_COUNT = 10_000
+
+# (label, frequency, by_weekday, number of occurrences) of the recurrence cases
+RECURRENCE_CASES = [
+    ("daily", "daily", None, 10_000),
+    ("monthly 2TU", "monthly", ["2TU"], 1_000),
+    ("weekly MO,FR", "weekly", ["MO", "FR"], 10_000),
+]
+
+
+def sample_numbers(count: int) -> str:
+    """Deterministic comma-separated sample of normally distributed numbers."""
+    values = np.random.default_rng(count).normal(50, 10, count)
+    return ", ".join(f"{value:.3f}" for value in values)
+
+
+def build_cases() -> List[BenchCase]:
+    """Lists every benchmark case, named tool.entry_point[input]."""
+    cases = []
+
+    for label, expression, terms in CALCULATOR_EXPRESSIONS:
+        cases.append(BenchCase(
+            f"calculator.evaluate[{label}]",
+            lambda e=expression: format_result(evaluate_expression(e)),
+            terms,
+        ))
+        cases.append(BenchCase(
+            f"calculator.invoke[{label}]",
+            lambda e=expression: calculator.invoke({"expression": e}),
+            terms,
+        ))
+    cases.append(BenchCase(
+        "calculator.compile[1,000 terms]",
+        lambda e=CALCULATOR_EXPRESSIONS[3][1]: compile_expression(e),
+        1000,
+    ))
+    cases.append(BenchCase(
+        "calculator.invoke[exact 2**1000]",
+        lambda: calculator.invoke({"expression": "2 ** 1000 + 1", "exact": True}),
+        1,
+    ))
+
+    for size in STATISTICS_SIZES:
+        numbers = sample_numbers(size)
+        cases.append(BenchCase(f"statistics.parse[n={size:,}]", lambda n=numbers: parse_numbers(n), size))
+        cases.append(BenchCase(
+            f"statistics.analyze[n={size:,}]",
+            lambda n=numbers: statistics_analyzer.func(n),
+            size,
+        ))
+        cases.append(BenchCase(
+            f"statistics.handle[n={size:,}]",
+            lambda h=get_dataset_registry().add(parse_numbers(numbers)): statistics_analyzer.func(h),
+            size,
+        ))
+        cases.append(BenchCase(
+            f"statistics.invoke[n={size:,}]",
+            lambda n=numbers: statistics_analyzer.invoke({"numbers": n}),
+            size,
+        ))
+
+    series = np.random.default_rng(0).normal(50, 10, 100_000)
+    for window, measure in ROLLING_CASES:
+        cases.append(BenchCase(
+            f"rolling.{measure}[w={window:,}]",
+            lambda w=window, m=measure: compute_rolling(series, w, [m]),
+            len(series),
+        ))
+
+    values = np.random.default_rng(0).normal(50, 10, 1_000_000)
+    for groups in GROUP_COUNTS:
+        codes = np.random.default_rng(groups).integers(0, groups, len(values))
+        cases.append(BenchCase(
+            f"grouped.summary[groups={groups:,}]",
+            lambda c=codes, g=groups: group_statistics(c, values, g, DEFAULT_GROUP_MEASURES),
+            len(values),
+        ))
+
+    cases.append(BenchCase("date.validate[iso]", lambda: validate_date_format("2024-01-15"), 1))
+    for operation, date1, date2 in DATE_CALLS:
+        cases.append(BenchCase(
+            f"date.calculate[{operation}]",
+            lambda o=operation, d1=date1, d2=date2: date_calculator.func(o, d1, d2),
+            1,
+        ))
+        arguments = {"operation": operation, "date1": date1}
+        if date2 is not None:
+            arguments["date2"] = date2
+        cases.append(BenchCase(
+            f"date.invoke[{operation}]",
+            lambda a=arguments: date_calculator.invoke(a),
+            1,
+        ))
+
+    offsets = np.random.default_rng(0).integers(0, 20_000, (2, BULK_DATE_COUNT))
+    first, second = (", ".join(np.datetime_as_string(np.datetime64("1980-01-01") + o).tolist()) for o in offsets)
+    bulk_operations = [
+        ("difference", second), ("add_days", "30"), ("day_of_week", None),
+        ("business_days", second), ("add_business_days", "15"),
+        ("add_months", "1"), ("diff_ymd", second),
+    ]
+    for operation, values in bulk_operations:
+        cases.append(BenchCase(
+            f"dates.bulk[{operation} n={BULK_DATE_COUNT:,}]",
+            lambda o=operation, v=values: bulk_dates(o, first, v),
+            BULK_DATE_COUNT,
+        ))
+
+    for label, frequency, weekdays, count in RECURRENCE_CASES:
+        rule = RecurrenceRule(frequency, by_weekday=weekdays)
+        cases.append(BenchCase(
+            f"dates.recurrence[{label} count={count:,}]",
+            lambda r=rule, c=count: summarize_occurrences(islice(r.occurrences(date(2000, 1, 1)), c), 50),
+            count,
+        ))
+
+    return cases
+
+
+def measure(func: Callable[[], Any], min_time: float = 0.05, repeat: int = 5) -> float:
+    """
+    Returns the best per-call time in microseconds.
+
+    The number of calls per repeat grows until one repeat takes at least
+    min_time seconds, so fast and slow cases are measured equally well.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    best = min([elapsed] + timer.repeat(repeat=repeat - 1, number=number))
+    return best / number * 1e6
+
+
+def run_cases(cases: List[BenchCase], min_time: float = 0.05, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """Measures each case and returns its latency and throughput by name."""
+    results = {}
+    for case in cases:
+        latency = measure(case.func, min_time, repeat)
+        calls_per_second = 1e6 / latency
+        results[case.name] = {
+            "latency_us": round(latency, 3),
+            "calls_per_s": round(calls_per_second, 1),
+            "items_per_s": round(calls_per_second * case.items, 1),
+        }
+    return results
+
+
+def compare_results(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Regression]:
+    """
+    Finds the cases whose latency grew by more than threshold percent.
+
+    Cases missing from either side are ignored, so adding or removing
+    cases does not break the comparison.
+    """
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        change = (current["latency_us"] / reference["latency_us"] - 1) * 100
+        if change > threshold:
+            regressions.append(Regression(name, reference["latency_us"], current["latency_us"], change))
+    return regressions
+
+
+def load_baseline(path: Path) -> Dict[str, Dict[str, float]]:
+    """Reads the results stored in a baseline file."""
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)["results"]
+
+
+def save_baseline(path: Path, results: Dict[str, Dict[str, float]]) -> None:
+    """Writes results as a baseline, with the machine they were measured on."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "created": date.today().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(document, file, indent=2, ensure_ascii=False)
+        file.write("\n")
+
+
+def _format_change(name: str, baseline: Optional[Dict[str, Dict[str, float]]], latency: float) -> str:
+    if baseline is None or name not in baseline:
+        return ""
+    return f"{(latency / baseline[name]['latency_us'] - 1) * 100:+.1f}%"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--compare", action="store_true", help="fail if a case regressed past the threshold")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown in percent (default: %(default)s)")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="shorter, noisier measurements")
+    args = parser.parse_args()
+
+    cases = [case for case in build_cases() if args.filter in case.name]
+    baseline = load_baseline(args.baseline) if args.baseline.exists() else None
+
+    min_time, repeat = (0.01, 3) if args.quick else (0.05, 5)
+    results = run_cases(cases, min_time, repeat)
+
+    print(f"{'case':<40} {'latency (us)':>13} {'calls/s':>12} {'items/s':>14} {'vs baseline':>12}")
+    for name, result in results.items():
+        print(
+            f"{name:<40} {result['latency_us']:>13.2f} {result['calls_per_s']:>12,.0f} "
+            f"{result['items_per_s']:>14,.0f} {_format_change(name, baseline, result['latency_us']):>12}"
+        )
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if args.compare:
+        if baseline is None:
+            sys.exit(f"No baseline found at {args.baseline}; run with --save first")
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold}%:")
+            for regression in regressions:
+                print(
+                    f"  {regression.name}: {regression.baseline_us:.2f} -> "
+                    f"{regression.current_us:.2f} us ({regression.change_percent:+.1f}%)"
+                )
+            sys.exit(1)
+        print(f"\nNo case regressed by more than {args.threshold}%")
+
+
+if __name__ == "__main__":
+    main()
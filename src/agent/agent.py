@@ -7,9 +7,18 @@ from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 from langchain_core.messages import AIMessage, SystemMessage, HumanMessage, ToolMessage
 
-from src.tools.calculator import calculator
+from src.tools.calculator import calculator, calculator_batch, vectorized_calculator
 from src.tools.statistics import statistics_analyzer
+from src.tools.rolling import rolling_statistics
+from src.tools.grouped import grouped_statistics
+from src.tools.file_statistics import file_statistics, set_data_directory
 from src.tools.date_calculator import date_calculator
+from src.tools.bulk_dates import bulk_date_calculator
+from src.tools.business_days import set_holiday_file
+from src.tools.recurrence import recurrence_dates
+from src.tools.parallel import enable_parallel_statistics
+from src.tools.sandbox import enable_sandbox
+from src.utils.config import BUSINESS_HOLIDAYS_FILE, CALCULATOR_SANDBOX_WORKERS, STATISTICS_DATA_DIR, STATISTICS_WORKERS
 from src.llm.client import get_llm
 from src.utils.logger import get_logger
 
@@ -25,8 +34,22 @@ class AgentState(TypedDict):
 def create_agent_graph():
     """Creates the agent graph with tool calling."""
 
+    # Expensive calculations run in worker processes so they can be cancelled
+    if CALCULATOR_SANDBOX_WORKERS:
+        enable_sandbox(workers=CALCULATOR_SANDBOX_WORKERS)
+
+    # Dataset files can only be read from the configured directory
+    set_data_directory(STATISTICS_DATA_DIR)
+
+    # Very large dataset files and datasets are summarized by several processes
+    if STATISTICS_WORKERS:
+        enable_parallel_statistics(workers=STATISTICS_WORKERS)
+
+    # Business-day operations skip the holidays of the configured file
+    set_holiday_file(BUSINESS_HOLIDAYS_FILE or None)
+
     # Available tools
-    tools = [calculator, statistics_analyzer, date_calculator]
+    tools = [calculator, calculator_batch, vectorized_calculator, statistics_analyzer, rolling_statistics, grouped_statistics, file_statistics, date_calculator, bulk_date_calculator, recurrence_dates]
     tool_map = {tool.name: tool for tool in tools}
 
     # LLM with bound tools
@@ -43,24 +66,79 @@ def create_agent_graph():
    - Potências, raízes quadradas
    - Funções trigonométricas
    - Exemplos: "quanto é 128 * 46?", "raiz de 144", "2 elevado a 8"
+   - Use exact=True para inteiros grandes ou frações exatas (ex.: "2**200", "1/3 + 1/6")
+   - Somatórios e produtórios: sum(expressão, variável, início, fim) e prod(...), com limites inclusivos
+     (ex.: "soma de i^2 para i de 1 a 10^7" → sum(i**2, i, 1, 10**7)); nunca expanda os termos
 
-2. **statistics_analyzer** - Use para análise estatística:
+2. **calculator_batch** - Use quando a pergunta tiver VÁRIOS cálculos independentes:
+   - Avalia uma lista de expressões (com rótulos opcionais) em uma única chamada
+   - Exemplo: "calcule a área, o perímetro e a diagonal deste retângulo"
+
+3. **vectorized_calculator** - Use para aplicar UMA fórmula a MUITOS valores:
+   - Avalia a expressão com variáveis sobre listas de valores em uma única chamada
+   - Exemplo: "calcule a * sin(b) + c para cada linha desta tabela"
+
+4. **statistics_analyzer** - Use para análise estatística:
    - Média, mediana, moda
    - Desvio padrão, variância
    - Quartis
    - Exemplo: "calcule a média de 10, 20, 30, 40, 50"
-
-3. **date_calculator** - Use para operações com datas:
+   - Se a pergunta pede só algumas medidas, passe measures (ex.: ["media"] ou ["mediana", "iqr"]) para calcular e retornar apenas elas
+   - Para conjuntos muito grandes, approximate=True estima mediana e quartis e informa o erro (erro_rank)
+   - O resultado traz o identificador do conjunto (ex.: "conjunto": "ds:3"); em perguntas seguintes sobre os mesmos dados, passe "ds:3" em vez de repetir os números (também vale como variável do vectorized_calculator)
+
+5. **rolling_statistics** - Use para estatísticas em JANELAS MÓVEIS de uma série:
+   - Média móvel, soma, desvio padrão, variância, mediana, mínimo, máximo e quantis por janela
+   - Uma única chamada calcula todas as janelas; NUNCA chame statistics_analyzer janela por janela
+   - Aceita o identificador do conjunto (ex.: "ds:3") no lugar dos números
+   - Exemplo: "calcule a média móvel de 7 dias destas vendas"
+
+6. **grouped_statistics** - Use para estatísticas POR GRUPO/CATEGORIA:
+   - Recebe pares "chave, valor" ou as colunas de chave e valor de um arquivo CSV
+   - Uma única chamada calcula contagem, média, desvio, mínimo, mediana, máximo e quantis de todos os grupos
+   - top e sort_by listam só os maiores (ou menores) grupos por uma medida
+   - Exemplo: "qual a latência média por endpoint?"
+
+7. **file_statistics** - Use para estatísticas de dados que estão em um ARQUIVO:
+   - CSV (uma coluna, por nome ou índice), .npy ou binário de floats
+   - Informe apenas o caminho e a coluna; NUNCA copie os números do arquivo para a conversa
+   - Exemplo: "analise a coluna valor de vendas.csv"
+
+8. **date_calculator** - Use para operações com datas:
    - Diferença entre datas
    - Adicionar/subtrair dias
    - Calcular idade
    - Dia da semana
+   - Dias úteis (sem fins de semana e feriados nacionais): business_days conta, add_business_days/subtract_business_days somam ou subtraem, is_business_day verifica uma data
    - Exemplo: "quantos anos tenho se nasci em 1990-03-15?"
+   - Exemplo: "quantos dias úteis há entre 2024-03-01 e 2024-03-31?"
+   - Meses e anos: add_months/add_years (número negativo subtrai; o dia é ajustado ao fim de meses mais curtos), months_between (meses completos) e diff_ymd (anos, meses e dias)
+   - Exemplo: "quanto é 2024-01-31 mais 3 meses?" ou "quantos anos, meses e dias entre 2020-02-29 e 2024-03-15?"
+
+9. **bulk_date_calculator** - Use para a mesma operação com datas sobre MUITAS datas:
+   - As mesmas operações da date_calculator (exceto age), inclusive as de dias úteis, sobre uma lista de datas em uma única chamada
+   - values traz as segundas datas ou os números de dias: um por data, ou um único valor para todas
+   - Exemplo: "qual o dia da semana de cada uma destas 50 datas de entrega?"
+
+10. **recurrence_dates** - Use para listar DATAS RECORRENTES:
+   - frequency daily, weekly, monthly ou yearly, com interval (a cada N períodos)
+   - by_weekday com códigos MO, TU, WE, TH, FR, SA, SU; em monthly/yearly aceita a ordem (ex.: ["2TU"] segunda terça, ["-1FR"] última sexta)
+   - by_month_day com dias do mês (ex.: [15] ou [-1] para o último dia)
+   - Sempre informe count ou until; séries longas vêm resumidas (total, primeiras e últimas datas)
+   - Exemplo: "liste toda segunda terça-feira do mês em 2025"
 
 ⚠️ QUANDO USAR FERRAMENTAS:
 - Se a pergunta envolve CÁLCULO → use calculator
+- Se há vários cálculos diferentes → use calculator_batch (uma única chamada)
+- Se a mesma fórmula deve ser aplicada a vários valores → use vectorized_calculator
 - Se a pergunta envolve ANÁLISE de números → use statistics_analyzer
+- Se a pergunta pede média móvel ou estatística por janela → use rolling_statistics
+- Se a pergunta pede estatísticas por categoria/grupo → use grouped_statistics (uma única chamada)
+- Se os números estão em um arquivo → use file_statistics
 - Se a pergunta envolve DATAS → use date_calculator
+- Se a pergunta envolve DIAS ÚTEIS ou feriados → use as operações de dias úteis da date_calculator; NUNCA conte dia a dia
+- Se a mesma operação deve ser feita com várias datas → use bulk_date_calculator (uma única chamada)
+- Se a pergunta pede datas que se repetem (toda semana, todo mês, a cada N dias) → use recurrence_dates
 - Se é conhecimento geral → responda diretamente SEM ferramenta
 
 ✅ Sempre responda em português brasileiro de forma natural e clara."""
@@ -36,7 +36,7 @@ IMPORTANTE: Sempre responda em português brasileiro (PT-BR) de forma natural e
 2. **statistics_analyzer** - Para análise estatística de dados
    - Use quando precisar calcular estatísticas de um conjunto de números
    - Calcula média, mediana, moda, desvio padrão, quartis, etc.
-   - Entrada: números separados por vírgula
+   - Entrada: números separados por vírgula, ponto e vírgula, espaço ou quebra de linha
    - Exemplos: "analise os números 10, 20, 30, 40, 50"
 
 3. **date_calculator** - Para cálculos com datas
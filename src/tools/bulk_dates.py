@@ -0,0 +1,327 @@
+"""
+Vectorized date arithmetic over many dates at once.
+
+Lists of ISO dates are parsed into NumPy datetime64[D] arrays (days since
+1970-01-01), so differences, offsets and weekdays are plain integer array
+operations instead of one datetime object per date.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from langchain_core.tools import tool
+
+from src.tools.business_days import get_business_calendar
+from src.tools.date_calculator import DAY_NAMES, validate_date_format
+from src.tools.parsing import NumberParseError, parse_numbers, split_tokens
+
+
+BULK_OPERATIONS = [
+    "difference", "add_days", "subtract_days", "day_of_week",
+    "business_days", "add_business_days", "subtract_business_days", "is_business_day",
+    "add_months", "add_years", "months_between", "diff_ymd",
+]
+
+# Operations whose values are second dates; the other ones take numbers
+_DATE_PAIR_OPERATIONS = ("difference", "business_days", "months_between", "diff_ymd")
+
+# Range of dates the single-date tool (Python's datetime) can represent
+MIN_DATE = np.datetime64("0001-01-01", "D")
+MAX_DATE = np.datetime64("9999-12-31", "D")
+_MAX_SPAN = int((MAX_DATE - MIN_DATE).astype(np.int64))
+_OUT_OF_RANGE = "Resultado fora do intervalo de datas suportado (anos 1 a 9999)"
+
+# Character positions of the digits and of the dashes in YYYY-MM-DD
+_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9]
+_DASHES = [4, 7]
+
+
+def _check_iso_layout(strings: np.ndarray) -> bool:
+    """Whether every string is exactly DDDD-DD-DD, checked on the code points."""
+    if strings.dtype.itemsize != 10 * 4 or np.any(np.char.str_len(strings) != 10):
+        return False
+    codes = strings.view(np.uint32).reshape(-1, 10)
+    digits = codes[:, _DIGITS]
+    return bool(np.all((digits >= ord("0")) & (digits <= ord("9"))) and np.all(codes[:, _DASHES] == ord("-")))
+
+
+def parse_dates(dates: Union[str, List[str]]) -> np.ndarray:
+    """
+    Parses ISO dates (YYYY-MM-DD) into a datetime64[D] array.
+
+    The layout of all strings is checked at once and NumPy converts them
+    in one call. Otherwise the dates go one by one through
+    validate_date_format and its memo of parsed strings, so they are
+    accepted or rejected exactly as by date_calculator, with the position
+    of the first invalid one.
+
+    Args:
+        dates: The dates as text, separated by commas, semicolons,
+               whitespace or newlines, or as a list of strings
+
+    Returns:
+        One-dimensional datetime64[D] array
+
+    Raises:
+        ValueError: If a date is invalid, with its 1-based position
+    """
+    tokens = split_tokens(dates) if isinstance(dates, str) else [date.strip() for date in dates]
+    if not tokens:
+        return np.empty(0, dtype="datetime64[D]")
+
+    strings = np.array(tokens)
+    if _check_iso_layout(strings):
+        try:
+            parsed = strings.astype("datetime64[D]")
+            if parsed.min() >= MIN_DATE:
+                return parsed
+        except ValueError:
+            pass
+
+    parsed_dates = []
+    for index, token in enumerate(tokens, start=1):
+        try:
+            parsed_dates.append(validate_date_format(token).date())
+        except ValueError as e:
+            raise ValueError(f"{e} (data {index})") from None
+    return np.array(parsed_dates, dtype="datetime64[D]")
+
+
+def parse_day_counts(days: Union[str, List[Union[int, str]]], unit: str = "dias") -> np.ndarray:
+    """
+    Parses whole numbers of days (or months, years) into an int64 array.
+
+    Args:
+        days: The numbers, as text or as a list
+        unit: Name of the unit in the error messages
+
+    Raises:
+        ValueError: If a value is not a whole number, with its position
+    """
+    try:
+        values = parse_numbers(days) if isinstance(days, str) else np.array([float(day) for day in days])
+    except NumberParseError as e:
+        raise ValueError(f"Número de {unit} inválido: '{e.token}' (valor {e.index})") from None
+    except (TypeError, ValueError):
+        raise ValueError(f"Os números de {unit} devem ser inteiros") from None
+
+    invalid = np.flatnonzero(~np.isfinite(values) | (values != np.round(values)))
+    if len(invalid):
+        raise ValueError(f"Número de {unit} inválido: '{values[invalid[0]]:g}' (valor {invalid[0] + 1}); use inteiros")
+    # Larger offsets leave the supported range from any date (and could overflow int64)
+    if len(values) and np.abs(values).max() > _MAX_SPAN:
+        raise ValueError(_OUT_OF_RANGE)
+    return values.astype(np.int64)
+
+
+def day_differences(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Absolute number of days between paired dates, as date_calculator's 'difference'."""
+    return np.abs((second - first).astype(np.int64))
+
+
+def shift_days(dates: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """
+    Adds a (possibly negative) number of days to each date.
+
+    Raises:
+        ValueError: If a result falls outside years 1 to 9999
+    """
+    if len(days) and np.abs(days).max() > _MAX_SPAN:
+        raise ValueError(_OUT_OF_RANGE)
+    return check_range(dates + days.astype("timedelta64[D]"))
+
+
+def check_range(dates: np.ndarray) -> np.ndarray:
+    """
+    Returns the dates unchanged if all of them are in years 1 to 9999.
+
+    Raises:
+        ValueError: If a date falls outside that range
+    """
+    if len(dates) and (dates.min() < MIN_DATE or dates.max() > MAX_DATE):
+        raise ValueError(_OUT_OF_RANGE)
+    return dates
+
+
+def _add_months(dates: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """add_months without the range check, for intermediate results."""
+    month_starts = dates.astype("datetime64[M]")
+    day_index = (dates - month_starts.astype("datetime64[D]")).astype(np.int64)
+    target = month_starts + np.asarray(months).astype("timedelta64[M]")
+    target_days = target.astype("datetime64[D]")
+    month_lengths = ((target + 1).astype("datetime64[D]") - target_days).astype(np.int64)
+    return target_days + np.minimum(day_index, month_lengths - 1).astype("timedelta64[D]")
+
+
+def shift_months(dates: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """
+    Moves each date by whole months, clamping the day to the length of the
+    target month, as date_calculator's add_months.
+
+    Raises:
+        ValueError: If a result falls outside years 1 to 9999
+    """
+    return check_range(_add_months(dates, months))
+
+
+def full_months(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Whole months between paired dates, in either order, as date_calculator's months_between."""
+    start, end = np.minimum(first, second), np.maximum(first, second)
+    months = (end.astype("datetime64[M]") - start.astype("datetime64[M]")).astype(np.int64)
+    return months - (_add_months(start, months) > end)
+
+
+def ymd_differences(first: np.ndarray, second: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Years, months and days between paired dates, as date_calculator's diff_ymd."""
+    start, end = np.minimum(first, second), np.maximum(first, second)
+    months = full_months(start, end)
+    days = (end - _add_months(start, months)).astype(np.int64)
+    return months // 12, months % 12, days
+
+
+def weekdays(dates: np.ndarray) -> np.ndarray:
+    """Weekday of each date, Monday being 0 (1970-01-01 was a Thursday)."""
+    return (dates.astype(np.int64) + 3) % 7
+
+
+def format_dates(dates: np.ndarray) -> List[str]:
+    """Writes datetime64[D] values as ISO strings."""
+    return np.datetime_as_string(dates, unit="D").tolist()
+
+
+def _pair(first: np.ndarray, second: np.ndarray, name: str) -> None:
+    """Checks that second has one value, or one per date."""
+    if len(second) not in (1, len(first)):
+        raise ValueError(
+            f"{name} deve ter um único valor ou um por data ({len(first)}), recebidos {len(second)}"
+        )
+
+
+def bulk_dates(operation: str, dates: Union[str, List[str]], values: Union[str, List[Any], None] = None) -> Dict[str, Any]:
+    """
+    Runs a date_calculator operation over many dates at once.
+
+    Args:
+        operation: One of BULK_OPERATIONS
+        dates: The dates
+        values: The second dates (_DATE_PAIR_OPERATIONS) or the numbers of
+                days, months or years (the add/subtract operations); a
+                single value applies to every date
+
+    Returns:
+        The columnar result of bulk_date_calculator
+
+    Raises:
+        ValueError: If the operation or an input is invalid
+    """
+    operation = operation.lower().strip()
+    if operation not in BULK_OPERATIONS:
+        raise ValueError(f"Operação inválida '{operation}'. Operações suportadas são: {', '.join(BULK_OPERATIONS)}")
+
+    first = parse_dates(dates)
+    if len(first) == 0:
+        raise ValueError("Nenhuma data fornecida em dates.")
+    result: Dict[str, Any] = {"operacao": operation, "contagem": len(first)}
+
+    if operation == "day_of_week":
+        days = weekdays(first)
+        result["dias_da_semana"] = np.array(DAY_NAMES)[days].tolist()
+        return result
+    if operation == "is_business_day":
+        result["dia_util"] = get_business_calendar().is_business_day(first).tolist()
+        return result
+
+    if values is None or (isinstance(values, str) and not values.strip()) or len(values) == 0:
+        needed = "as datas finais" if operation in _DATE_PAIR_OPERATIONS else "os números de dias, meses ou anos"
+        raise ValueError(f"A operação '{operation}' requer values com {needed}.")
+
+    if operation in _DATE_PAIR_OPERATIONS:
+        second = parse_dates(values)
+        _pair(first, second, "values")
+        if operation == "difference":
+            result["dias"] = day_differences(first, second).tolist()
+        elif operation == "business_days":
+            result["dias_uteis"] = get_business_calendar().count(first, second).tolist()
+        elif operation == "months_between":
+            result["meses"] = full_months(first, second).tolist()
+        else:
+            years, months, days = ymd_differences(first, second)
+            result.update(anos=years.tolist(), meses=months.tolist(), dias=days.tolist())
+        return result
+
+    unit = {"add_months": "meses", "add_years": "anos"}.get(operation, "dias")
+    counts = parse_day_counts(values, unit)
+    _pair(first, counts, "values")
+    if operation.startswith("subtract"):
+        counts = -counts
+    if operation == "add_months":
+        shifted = shift_months(first, counts)
+    elif operation == "add_years":
+        shifted = shift_months(first, 12 * counts)
+    elif operation.endswith("business_days"):
+        shifted = check_range(get_business_calendar().offset(first, counts))
+    else:
+        shifted = shift_days(first, counts)
+    result["datas"] = format_dates(shifted)
+    return result
+
+
+@tool
+def bulk_date_calculator(operation: str, dates: str, values: Optional[str] = None) -> str:
+    """
+    Performs a date_calculator operation on many dates in a single call.
+
+    Use it instead of calling date_calculator once per date. The results
+    come back as one list, in the order of the dates.
+
+    Supported operations:
+    1. 'difference' - Days between each date and the matching date in values
+    2. 'add_days' - Adds the number of days in values to each date
+    3. 'subtract_days' - Subtracts the number of days in values from each date
+    4. 'day_of_week' - Day name of each date
+    5. 'business_days' - Business days between each date and the matching
+       date in values, both included
+    6. 'add_business_days' - Adds the number of business days in values to each date
+    7. 'subtract_business_days' - Subtracts the number of business days in values
+    8. 'is_business_day' - Whether each date is a business day
+    9. 'add_months' / 'add_years' - Adds the number of months or years in
+       values to each date (negative numbers subtract)
+    10. 'months_between' - Whole months between each date and the matching
+        date in values
+    11. 'diff_ymd' - Years, months and days between each date and the
+        matching date in values
+
+    Business days and month arithmetic follow date_calculator: Monday to
+    Friday except the holidays of the business calendar, and the day is
+    clamped to the end of shorter months (2024-01-31 plus one month is
+    2024-02-29).
+
+    Args:
+        operation: One of the operations above
+        dates: Dates in YYYY-MM-DD format, separated by commas, semicolons,
+               spaces or newlines
+        values: Second dates (for 'difference', 'business_days',
+                'months_between' and 'diff_ymd') or numbers of days, months
+                or years (for the add/subtract operations): one per date, or
+                a single value used for every date
+
+    Returns:
+        A JSON-formatted string with the operation, the number of dates and
+        the results: "dias" (differences), "dias_uteis" (business days),
+        "datas" (new dates), "meses" (whole months), "anos"/"meses"/"dias"
+        (diff_ymd), "dias_da_semana" (day names) or "dia_util" (true/false).
+
+    Examples:
+        >>> bulk_date_calculator("add_days", "2024-01-01, 2024-02-01", "30")
+        {"operacao": "add_days", "contagem": 2, "datas": ["2024-01-31", "2024-03-02"]}
+    """
+    try:
+        if not operation or not operation.strip():
+            return json.dumps({"erro": "Operação não informada."}, indent=2, ensure_ascii=False)
+        if not dates or not dates.strip():
+            return json.dumps({"erro": "Nenhuma data fornecida em dates."}, indent=2, ensure_ascii=False)
+        return json.dumps(bulk_dates(operation, dates, values), indent=2, ensure_ascii=False)
+    except ValueError as e:
+        return json.dumps({"erro": str(e)}, indent=2, ensure_ascii=False)
+    except Exception as e:
+        return json.dumps({"erro": f"Ocorreu um erro inesperado: {str(e)}"}, indent=2, ensure_ascii=False)
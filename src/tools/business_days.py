@@ -0,0 +1,226 @@
+"""
+Business-day calendar: weekends plus holidays loaded from a local file.
+
+Holiday rules are expanded once into a sorted array of dates and handed to
+NumPy's busdaycalendar, so counting business days between two dates or
+moving a date by N business days is a binary search over the holidays
+instead of a day-by-day loop, for one date or for a whole array.
+"""
+import re
+from pathlib import Path
+from threading import Lock
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+
+DEFAULT_HOLIDAY_FILE = Path(__file__).parent / "data" / "brazil_holidays.txt"
+
+# Monday to Friday are working days
+DEFAULT_WEEKMASK = "1111100"
+
+# Years the holiday rules are expanded over (every year datetime supports)
+FIRST_YEAR = 1
+LAST_YEAR = 9999
+
+_FIXED = re.compile(r"^(\d{2})-(\d{2})$")
+_EASTER = re.compile(r"^easter([+-]\d+)?$", re.IGNORECASE)
+_SINGLE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def easter_sundays(years: np.ndarray) -> np.ndarray:
+    """
+    Gregorian Easter Sunday of each year (anonymous Gregorian algorithm).
+
+    Args:
+        years: Integer array of years
+
+    Returns:
+        datetime64[D] array with one date per year
+    """
+    a = years % 19
+    b, c = years // 100, years % 100
+    d, e = b // 4, b % 4
+    g = (b - (b + 8) // 25 + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return make_dates(years, month, day + 1)
+
+
+def make_dates(years: np.ndarray, months: Union[int, np.ndarray], days: Union[int, np.ndarray]) -> np.ndarray:
+    """Builds datetime64[D] values from year, month and day arrays."""
+    first_of_month = (np.asarray(years) - 1970).astype("datetime64[Y]") + (np.asarray(months) - 1).astype("timedelta64[M]")
+    return first_of_month.astype("datetime64[D]") + (np.asarray(days) - 1).astype("timedelta64[D]")
+
+
+def expand_rule(rule: str, years: np.ndarray) -> np.ndarray:
+    """
+    Expands one holiday rule into its dates over the given years.
+
+    Raises:
+        ValueError: If the rule is not MM-DD, easter[+-N] or YYYY-MM-DD
+    """
+    fixed = _FIXED.match(rule)
+    if fixed:
+        month, day = int(fixed.group(1)), int(fixed.group(2))
+        if not 1 <= month <= 12 or not 1 <= day <= 31:
+            raise ValueError(f"data inválida '{rule}'")
+        dates = make_dates(years, month, day)
+        # Drops dates that overflowed into the next month (e.g. 02-29 in common years)
+        return dates[(dates.astype("datetime64[M]") - dates.astype("datetime64[Y]")).astype(int) == month - 1]
+
+    easter = _EASTER.match(rule)
+    if easter:
+        return easter_sundays(years) + int(easter.group(1) or 0)
+
+    if _SINGLE.match(rule):
+        try:
+            date = np.datetime64(rule, "D")
+        except ValueError:
+            raise ValueError(f"data inválida '{rule}'") from None
+        year = date.astype("datetime64[Y]").astype(int) + 1970
+        return np.array([date] if years[0] <= year <= years[-1] else [], dtype="datetime64[D]")
+
+    raise ValueError(f"regra desconhecida '{rule}'; use MM-DD, easter+N ou AAAA-MM-DD")
+
+
+def load_holidays(path: Union[str, Path]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reads a holiday file and expands its rules into sorted dates.
+
+    Args:
+        path: File with one "rule; name[; first year]" per line
+
+    Returns:
+        (dates, names): sorted datetime64[D] array of the holidays and the
+        name of each one; a date shared by two rules keeps the first name
+
+    Raises:
+        ValueError: If the file is missing or a line is invalid
+    """
+    path = Path(path).expanduser()
+    if not path.is_file():
+        raise ValueError(f"Arquivo de feriados não encontrado: {path}")
+
+    all_years = np.arange(FIRST_YEAR, LAST_YEAR + 1)
+    dates, rules, labels = [], [], []
+    for number, line in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        fields = [field.strip() for field in line.split(";")]
+        if len(fields) not in (2, 3) or not fields[0] or not fields[1]:
+            raise ValueError(f"Linha {number} do arquivo de feriados inválida: use 'regra; nome' ou 'regra; nome; ano inicial'")
+        years = all_years
+        if len(fields) == 3:
+            if not fields[2].isdigit():
+                raise ValueError(f"Linha {number} do arquivo de feriados inválida: ano inicial '{fields[2]}'")
+            years = all_years[all_years >= int(fields[2])]
+        try:
+            expanded = expand_rule(fields[0], years)
+        except ValueError as e:
+            raise ValueError(f"Linha {number} do arquivo de feriados inválida: {e}") from None
+        dates.append(expanded)
+        rules.append(np.full(len(expanded), len(labels)))
+        labels.append(fields[1])
+
+    if not dates:
+        return np.empty(0, dtype="datetime64[D]"), np.empty(0, dtype=object)
+    dates, rules = np.concatenate(dates), np.concatenate(rules)
+    # Stable sort keeps rules in file order, so unique() keeps the first name
+    order = np.argsort(dates, kind="stable")
+    dates, first = np.unique(dates[order], return_index=True)
+    return dates, np.array(labels, dtype=object)[rules[order][first]]
+
+
+class BusinessCalendar:
+    """
+    Working days (weekmask) and holidays, with vectorized queries.
+
+    Every method accepts datetime64[D] scalars or arrays and broadcasts
+    them like NumPy's busday functions.
+
+    Args:
+        holidays: datetime64[D] array of the holidays
+        names: Name of each holiday, in the same order
+        weekmask: Seven '1'/'0' characters, Monday first
+    """
+
+    def __init__(self, holidays: np.ndarray, names: np.ndarray, weekmask: str = DEFAULT_WEEKMASK):
+        order = np.argsort(holidays)
+        self.holidays = np.asarray(holidays, dtype="datetime64[D]")[order]
+        self.names = np.asarray(names, dtype=object)[order]
+        self.weekmask = weekmask
+        self.calendar = np.busdaycalendar(weekmask=weekmask, holidays=self.holidays)
+
+    def count(self, start, end) -> np.ndarray:
+        """Business days from start to end, counting both dates, in either order."""
+        first, last = np.minimum(start, end), np.maximum(start, end)
+        return np.busday_count(first, last + np.timedelta64(1, "D"), busdaycal=self.calendar)
+
+    def offset(self, dates, days) -> np.ndarray:
+        """
+        Moves each date by a number of business days.
+
+        A date that is not a business day counts from the previous business
+        day when moving forward and from the next one when moving backward,
+        so adding 1 to a Saturday gives the Monday. Zero moves a
+        non-business date to the next business day.
+        """
+        days = np.asarray(days)
+        forward = np.busday_offset(dates, days, roll="backward", busdaycal=self.calendar)
+        backward = np.busday_offset(dates, days, roll="forward", busdaycal=self.calendar)
+        return np.where(days > 0, forward, backward)
+
+    def is_business_day(self, dates) -> np.ndarray:
+        """Whether each date is a business day."""
+        return np.is_busday(dates, busdaycal=self.calendar)
+
+    def holiday_name(self, date: np.datetime64) -> Optional[str]:
+        """Name of the holiday on the date, or None."""
+        index = np.searchsorted(self.holidays, date)
+        if index < len(self.holidays) and self.holidays[index] == date:
+            return self.names[index]
+        return None
+
+    def holidays_between(self, start: np.datetime64, end: np.datetime64) -> List[Tuple[str, str]]:
+        """(ISO date, name) of the holidays from start to end, both included."""
+        first, last = min(start, end), max(start, end)
+        lo = np.searchsorted(self.holidays, first, side="left")
+        hi = np.searchsorted(self.holidays, last, side="right")
+        return [(str(date), name) for date, name in zip(self.holidays[lo:hi], self.names[lo:hi])]
+
+
+_holiday_file: Path = DEFAULT_HOLIDAY_FILE
+_calendar: Optional[BusinessCalendar] = None
+_lock = Lock()
+
+
+def set_holiday_file(path: Optional[Union[str, Path]]) -> None:
+    """
+    Selects the holiday file of the business calendar.
+
+    Args:
+        path: The holiday file, or None for the bundled Brazilian national holidays
+    """
+    global _holiday_file, _calendar
+    with _lock:
+        _holiday_file = Path(path).expanduser() if path else DEFAULT_HOLIDAY_FILE
+        _calendar = None
+
+
+def get_business_calendar() -> BusinessCalendar:
+    """
+    Returns the business calendar, loading the holiday file on first use.
+
+    Raises:
+        ValueError: If the holiday file is missing or invalid
+    """
+    global _calendar
+    with _lock:
+        if _calendar is None:
+            _calendar = BusinessCalendar(*load_holidays(_holiday_file))
+        return _calendar
@@ -2,11 +2,24 @@
 Advanced calculator tool for mathematical operations.
 """
 import ast
+import functools
+import json
 import math
 import operator
-from typing import Union
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from fractions import Fraction
+from typing import (
+    Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, Mapping, Optional, Tuple, Union,
+)
+import numpy as np
 from langchain_core.tools import tool
 
+from src.tools.datasets import get_dataset_registry, is_handle
+from src.tools.parsing import NumberParseError, parse_numbers
+
 
 # Supported operators
 OPERATORS = {
@@ -41,6 +54,9 @@ def safe_eval(node: ast.AST) -> float:
     """
     Safely evaluates an AST (Abstract Syntax Tree) node.
 
+    The node is compiled into a post-order instruction list and run by an
+    iterative loop, so arbitrarily deep expressions use constant stack space.
+
     Args:
         node: AST node to evaluate
 
@@ -51,59 +67,1808 @@ def safe_eval(node: ast.AST) -> float:
         ValueError: If the expression contains unsupported operations
         ZeroDivisionError: If division by zero is attempted
     """
-    if isinstance(node, ast.Constant):
-        return float(node.value)
+    return run_program(compile_program(node), {})
+
+
+def _np_log(x, base=None):
+    """NumPy counterpart of math.log, including the optional base argument."""
+    if base is None:
+        return np.log(x)
+    return np.log(x) / np.log(base)
+
+
+# NumPy equivalents of MATH_FUNCTIONS used by the vectorized mode
+NUMPY_FUNCTIONS = {
+    'sqrt': np.sqrt,
+    'pow': np.power,
+    'sin': np.sin,
+    'cos': np.cos,
+    'tan': np.tan,
+    'log': _np_log,
+    'log10': np.log10,
+    'exp': np.exp,
+    'abs': np.abs,
+    'ceil': np.ceil,
+    'floor': np.floor,
+    'pi': np.pi,
+    'e': np.e,
+}
+
+
+
+def _exact_value(value: Any) -> Any:
+    """Returns an int for integral Fractions, leaving other values unchanged."""
+    if isinstance(value, Fraction) and value.denominator == 1:
+        return value.numerator
+    return value
+
+
+def _is_exact(value: Any) -> bool:
+    return isinstance(value, (int, Fraction)) and not isinstance(value, bool)
+
+
+def _exact_truediv(left: Any, right: Any) -> Any:
+    """Division that stays exact for int/Fraction operands."""
+    if type(left) is int and type(right) is int:
+        # Fast path: evenly divisible ints never build a Fraction
+        quotient, remainder = divmod(left, right)
+        if not remainder:
+            return quotient
+        return _exact_value(Fraction(left, right))
+    if _is_exact(left) and _is_exact(right):
+        return _exact_value(Fraction(left) / right)
+    return operator.truediv(left, right)
+
+
+def _exact_pow(base: Any, exponent: Any, *modulus: Any) -> Any:
+    """Power that stays exact for rational bases and integral exponents."""
+    if type(base) is int and type(exponent) is int and exponent >= 0 and not modulus:
+        return base ** exponent
+    if modulus:
+        return pow(base, exponent, *modulus)
+    exponent = _exact_value(exponent)
+    if _is_exact(base) and isinstance(exponent, int) and not isinstance(exponent, bool):
+        if isinstance(base, int) and exponent >= 0:
+            return base ** exponent
+        return _exact_value(Fraction(base) ** exponent)
+    return operator.pow(base, exponent)
+
+
+def _exact_sqrt(value: Any) -> Any:
+    """Square root that is exact for perfect squares and falls back to float."""
+    if _is_exact(value) and value >= 0:
+        fraction = Fraction(value)
+        numerator = math.isqrt(fraction.numerator)
+        denominator = math.isqrt(fraction.denominator)
+        if numerator * numerator == fraction.numerator and denominator * denominator == fraction.denominator:
+            return _exact_value(Fraction(numerator, denominator))
+    return math.sqrt(value)
+
+
+# Operators whose exact-mode behavior differs from OPERATORS
+EXACT_OPERATORS = {
+    **OPERATORS,
+    ast.Div: _exact_truediv,
+    ast.Pow: _exact_pow,
+}
+
+# Functions whose exact-mode behavior differs from MATH_FUNCTIONS; the
+# remaining (transcendental) functions always produce floats
+EXACT_FUNCTIONS = {
+    **MATH_FUNCTIONS,
+    'sqrt': _exact_sqrt,
+    'pow': _exact_pow,
+}
+
+# Functions that may return exact values in exact mode
+EXACT_PRESERVING = frozenset({'sqrt', 'pow', 'abs', 'ceil', 'floor'})
+
+
+def _exact_constant(value: Any) -> Any:
+    """Converts a literal to an int or Fraction, mirroring how it is written."""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and math.isfinite(value):
+        # repr() gives the shortest decimal that round-trips, so 0.1 -> 1/10
+        return _exact_value(Fraction(repr(value)))
+    return float(value)
+
+
+def _to_float_result(value: Any) -> Any:
+    return float(value)
+
+
+def _to_exact_result(value: Any) -> Any:
+    if type(value) is int:
+        return value
+    if _is_exact(value):
+        return _exact_value(value)
+    return float(value)
+
+
+Env = Mapping[str, Any]
+
+
+class BudgetExceededError(ValueError):
+    """Raised when an expression is estimated to exceed the evaluation budget."""
+
+
+class EvaluationTimeoutError(BudgetExceededError):
+    """Raised when an evaluation runs past its wall-clock limit."""
+
+
+class EvaluationBudget:
+    """
+    Limits applied to every evaluation.
+
+    Attributes:
+        max_operations: Maximum number of nodes (operations, literals and
+                        names) in an expression
+        max_result_digits: Maximum estimated number of decimal digits of any
+                           exact intermediate result (ints and Fractions);
+                           floats are bounded by the hardware and always fit
+        timeout: Wall-clock limit in seconds for a single evaluation,
+                 or None for no limit. In-process it is best effort: the
+                 deadline is checked between operations, so a single exact
+                 ** or pow() that fits max_result_digits can run past it.
+                 Only the sandbox (src/tools/sandbox.py) can stop an
+                 evaluation mid-operation
+        max_iterations: Maximum number of terms sum() and prod() may
+                        evaluate one by one in a single evaluation (closed
+                        forms do not count)
+    """
+
+    def __init__(
+        self,
+        max_operations: int = 100_000,
+        max_result_digits: int = 10_000,
+        timeout: Optional[float] = 2.0,
+        max_iterations: int = 10_000_000,
+    ):
+        self.max_operations = max_operations
+        self.max_result_digits = max_result_digits
+        self.timeout = timeout
+        self.max_iterations = max_iterations
+
+    def check(self, cost: "ExpressionCost") -> None:
+        """
+        Rejects an expression whose estimated cost is over the budget.
+
+        Raises:
+            BudgetExceededError: If any limit would be exceeded
+        """
+        if cost.operations > self.max_operations:
+            _record_metric("budget_rejections")
+            raise BudgetExceededError(
+                f"Expression too large: {cost.operations} operations "
+                f"(limit {self.max_operations})"
+            )
+        if cost.digits > self.max_result_digits:
+            _record_metric("budget_rejections")
+            raise BudgetExceededError(
+                f"Result too large: about {_format_digits(cost.digits)} digits "
+                f"(limit {self.max_result_digits})"
+            )
+
+    def __repr__(self) -> str:
+        return (
+            f"EvaluationBudget(max_operations={self.max_operations}, "
+            f"max_result_digits={self.max_result_digits}, timeout={self.timeout}, "
+            f"max_iterations={self.max_iterations})"
+        )
+
+
+# Estimated cost of an expression: node count and, in exact mode, the
+# largest number of decimal digits any intermediate result may have
+ExpressionCost = namedtuple("ExpressionCost", ["operations", "digits"])
+
+_default_budget = EvaluationBudget()
+
+_metrics = {"budget_rejections": 0, "timeouts": 0}
+_metrics_lock = threading.Lock()
+
+# Deadline, budget and iterations used by the evaluation running on the
+# current thread
+_evaluation_state = threading.local()
+
+
+def _record_metric(name: str) -> None:
+    with _metrics_lock:
+        _metrics[name] += 1
+
+
+def _format_digits(digits: float) -> str:
+    return f"{digits:.3g}" if digits >= 1e6 else str(math.ceil(digits))
+
+
+def _check_deadline() -> None:
+    """
+    Aborts the current evaluation if its wall-clock limit has passed.
+
+    Called between operations, never during one; see EvaluationBudget.timeout.
+    """
+    deadline = getattr(_evaluation_state, "deadline", None)
+    if deadline is not None and time.monotonic() > deadline:
+        _evaluation_state.deadline = None
+        _record_metric("timeouts")
+        raise EvaluationTimeoutError("Evaluation exceeded the time limit")
+
+
+def _consume_iterations(count: int) -> None:
+    """
+    Charges iterations of sum()/prod() to the running evaluation.
+
+    Raises:
+        BudgetExceededError: If the evaluation would exceed max_iterations
+    """
+    budget = getattr(_evaluation_state, "budget", None)
+    # Outside CompiledExpression.__call__ each reduction is checked on its own
+    used = count if budget is None else _evaluation_state.iterations + count
+    limit = (budget or _default_budget).max_iterations
+    if used > limit:
+        _record_metric("budget_rejections")
+        raise BudgetExceededError(f"Too many iterations: {used} (limit {limit})")
+    if budget is not None:
+        _evaluation_state.iterations = used
+
+
+def _current_budget() -> EvaluationBudget:
+    return getattr(_evaluation_state, "budget", None) or _default_budget
+
+
+def get_evaluation_budget() -> EvaluationBudget:
+    """Returns the budget applied when none is given explicitly."""
+    return _default_budget
+
+
+def set_evaluation_budget(budget: EvaluationBudget) -> None:
+    """Replaces the budget applied when none is given explicitly."""
+    global _default_budget
+    _default_budget = budget
+
+
+# Instruction kinds of a compiled program. Each instruction is a tuple
+# (kind, payload, a, b) whose result is stored in the slot matching its
+# position in the program; a and b refer to the slots of its operands.
+_CONST, _LOAD, _UNARY, _BINARY, _GUARDED_BINARY, _CALL, _REDUCE = range(7)
+
+# Kinds whose a (and b, unless None) are operand slots; _CALL has a tuple
+_SLOT_KINDS = (_UNARY, _BINARY, _GUARDED_BINARY, _REDUCE)
+
+# Range constructs sum(expression, variable, start, end) and prod(...)
+RANGE_FUNCTIONS = frozenset({'sum', 'prod'})
+
+Instruction = Tuple[int, Any, Any, Any]
+
+_CompileContext = namedtuple(
+    "_CompileContext", ["functions", "operators", "variables", "vectorized", "exact"]
+)
+
+
+def _range_function(node: ast.Call) -> Optional[str]:
+    """
+    Returns 'sum' or 'prod' for a range construct call, None for other calls.
+
+    Raises:
+        ValueError: If a range construct does not have the form
+                    name(expression, variable, start, end)
+    """
+    name = node.func.id if isinstance(node.func, ast.Name) else None
+    if name not in RANGE_FUNCTIONS:
+        return None
+    if len(node.args) != 4 or node.keywords or not isinstance(node.args[1], ast.Name):
+        raise ValueError(f"{name}() expects (expression, variable, start, end)")
+    return name
+
+
+def _children(node: ast.AST) -> List[ast.AST]:
+    """Returns the operand nodes of a supported node, in evaluation order."""
+    if isinstance(node, ast.BinOp):
+        return [node.left, node.right]
+    if isinstance(node, ast.UnaryOp):
+        return [node.operand]
+    if isinstance(node, ast.Call):
+        if _range_function(node):
+            # The summand is compiled separately, only the limits are operands
+            return node.args[2:]
+        return list(node.args)
+    return []
+
+
+def _post_order(node: ast.AST) -> List[ast.AST]:
+    """
+    Lists the nodes of an expression tree children-first, without recursion.
+
+    Raises:
+        ValueError: As soon as a node of an unsupported type is reached
+    """
+    if isinstance(node, ast.Expression):
+        node = node.body
+
+    # Visiting parent, right, left and reversing gives left, right, parent
+    stack = [node]
+    order = []
+    while stack:
+        node = stack.pop()
+        if type(node) not in _NODE_COMPILERS:
+            raise ValueError(f"Unsupported expression type: {type(node).__name__}")
+        order.append(node)
+        stack.extend(_children(node))
+    order.reverse()
+    return order
+
+
+def _compile_constant(node: ast.Constant, operands: List[int], ctx: _CompileContext) -> Instruction:
+    value = _exact_constant(node.value) if ctx.exact else float(node.value)
+    return (_CONST, value, None, None)
+
 
-    elif isinstance(node, ast.Name):
-        if node.id in MATH_FUNCTIONS:
-            return MATH_FUNCTIONS[node.id]
+def _compile_name(node: ast.Name, operands: List[int], ctx: _CompileContext) -> Instruction:
+    if node.id in ctx.variables:
+        return (_LOAD, node.id, None, None)
+    if node.id not in ctx.functions:
         raise ValueError(f"Unsupported constant: {node.id}")
+    return (_CONST, ctx.functions[node.id], None, None)
 
-    elif isinstance(node, ast.BinOp):
-        left = safe_eval(node.left)
-        right = safe_eval(node.right)
-        op = OPERATORS.get(type(node.op))
 
-        if op is None:
-            raise ValueError(f"Unsupported operation: {type(node.op).__name__}")
+def _compile_binop(node: ast.BinOp, operands: List[int], ctx: _CompileContext) -> Instruction:
+    op = ctx.operators.get(type(node.op))
+    if op is None:
+        raise ValueError(f"Unsupported operation: {type(node.op).__name__}")
 
-        if isinstance(node.op, ast.Div) and right == 0:
-            raise ZeroDivisionError("Division by zero is not allowed")
+    if isinstance(node.op, ast.Div):
+        op = _checked_division(op, ctx.vectorized)
 
-        return op(left, right)
+    # Multiplication and power are the only binary operations whose cost
+    # grows with operand size, so they check the evaluation deadline
+    kind = _GUARDED_BINARY if isinstance(node.op, (ast.Mult, ast.Pow)) else _BINARY
+    return (kind, op, operands[0], operands[1])
 
-    elif isinstance(node, ast.UnaryOp):
-        operand = safe_eval(node.operand)
-        op = OPERATORS.get(type(node.op))
 
-        if op is None:
-            raise ValueError(f"Unsupported unary operation: {type(node.op).__name__}")
+def _compile_unaryop(node: ast.UnaryOp, operands: List[int], ctx: _CompileContext) -> Instruction:
+    op = ctx.operators.get(type(node.op))
+    if op is None:
+        raise ValueError(f"Unsupported unary operation: {type(node.op).__name__}")
+    return (_UNARY, op, operands[0], None)
 
-        return op(operand)
 
-    elif isinstance(node, ast.Call):
-        func_name = node.func.id if isinstance(node.func, ast.Name) else None
+def _compile_call(node: ast.Call, operands: List[int], ctx: _CompileContext) -> Instruction:
+    func_name = node.func.id if isinstance(node.func, ast.Name) else None
+
+    if func_name in RANGE_FUNCTIONS:
+        reduction = RangeReduction(func_name, node.args[1].id, node.args[0], ctx)
+        return (_REDUCE, reduction, operands[0], operands[1])
+
+    if func_name not in ctx.functions:
+        raise ValueError(f"Unsupported function: {func_name}")
+
+    return (_CALL, _checked_call(ctx.functions[func_name], func_name, _call_converter(func_name, ctx)),
+            tuple(operands), None)
+
+
+def _call_converter(func_name: str, ctx: _CompileContext) -> Callable[[Any], Any]:
+    """Conversion applied to the results of a function in the given mode."""
+    if ctx.vectorized:
+        return np.asarray
+    if ctx.exact and func_name in EXACT_PRESERVING:
+        return _to_exact_result
+    return _to_float_result
+
+
+# Dispatch table from AST node type to the function that compiles it
+_NODE_COMPILERS = {
+    ast.Constant: _compile_constant,
+    ast.Name: _compile_name,
+    ast.BinOp: _compile_binop,
+    ast.UnaryOp: _compile_unaryop,
+    ast.Call: _compile_call,
+}
+
+
+# Names of the operations the optimizer knows identities for, keyed by the
+# callable stored in the instruction
+_OPERATION_NAMES: Dict[Callable, str] = {
+    operator.add: 'add',
+    operator.sub: 'sub',
+    operator.mul: 'mul',
+    operator.pow: 'pow',
+    _exact_pow: 'pow',
+    operator.neg: 'neg',
+    operator.pos: 'pos',
+}
 
-        if func_name not in MATH_FUNCTIONS:
-            raise ValueError(f"Unsupported function: {func_name}")
 
-        func = MATH_FUNCTIONS[func_name]
-        args = [safe_eval(arg) for arg in node.args]
+# The wrappers are memoized so that the same operation always compiles to the
+# same callable, which lets optimize_program recognize repeated computations
+@functools.lru_cache(maxsize=None)
+def _checked_division(op: Callable[[Any, Any], Any], vectorized: bool) -> Callable[[Any, Any], Any]:
+    """Wraps a division operator with the division-by-zero check."""
+    if vectorized:
+        def divide(numerator, denominator):
+            if np.any(denominator == 0):
+                raise ZeroDivisionError("Division by zero is not allowed")
+            return op(numerator, denominator)
+    else:
+        def divide(numerator, denominator):
+            if denominator == 0:
+                raise ZeroDivisionError("Division by zero is not allowed")
+            return op(numerator, denominator)
+    _OPERATION_NAMES[divide] = 'div'
+    return divide
+
 
+@functools.lru_cache(maxsize=None)
+def _checked_call(func: Callable, func_name: str, convert: Callable[[Any], Any]) -> Callable[[List[Any]], Any]:
+    """Wraps a function so its errors surface as ValueError."""
+    def call(args):
         try:
-            return float(func(*args))
+            return convert(func(*args))
         except Exception as e:
             raise ValueError(f"Error calling {func_name}: {str(e)}")
+    _OPERATION_NAMES[call] = func_name
+    return call
+
+
+def compile_program(
+    node: ast.AST,
+    variables: FrozenSet[str] = frozenset(),
+    vectorized: bool = False,
+    exact: bool = False,
+) -> List[Instruction]:
+    """
+    Validates an AST and flattens it into a post-order instruction list.
+
+    Performs the same checks as the original recursive evaluator, but only
+    once: constants are converted, names and operators are resolved and
+    unsupported nodes are rejected up front. The traversal is iterative, so
+    expressions of any depth compile without hitting the recursion limit.
+
+    Args:
+        node: AST node to compile
+        variables: Names allowed as free variables, bound at evaluation time
+        vectorized: If True, functions map to NumPy ufuncs so variables can
+                    be bound to whole arrays
+        exact: If True, integer and decimal literals are kept as ints and
+               Fractions, and only transcendental functions produce floats
+
+    Returns:
+        Instruction list to be executed by run_program
+
+    Raises:
+        ValueError: If the expression contains unsupported operations
+    """
+    return _compile_nodes(_post_order(node), _compile_context(variables, vectorized, exact))
+
+
+def _compile_context(variables: FrozenSet[str], vectorized: bool, exact: bool) -> _CompileContext:
+    if vectorized and exact:
+        raise ValueError("Exact mode is not available for vectorized evaluation")
+
+    if vectorized:
+        functions, operators = NUMPY_FUNCTIONS, OPERATORS
+    elif exact:
+        functions, operators = EXACT_FUNCTIONS, EXACT_OPERATORS
+    else:
+        functions, operators = MATH_FUNCTIONS, OPERATORS
+    return _CompileContext(functions, operators, variables, vectorized, exact)
+
+
+def _arity(node: ast.AST) -> int:
+    """Number of operand nodes, i.e. len(_children(node))."""
+    if isinstance(node, ast.BinOp):
+        return 2
+    if isinstance(node, ast.UnaryOp):
+        return 1
+    if isinstance(node, ast.Call):
+        return 2 if _range_function(node) else len(node.args)
+    return 0
+
+
+def _compile_nodes(nodes: List[ast.AST], ctx: _CompileContext) -> List[Instruction]:
+    program: List[Instruction] = []
+    # In post-order, the operands of a node are the last pending results
+    pending: List[int] = []
+    for current in nodes:
+        arity = _arity(current)
+        if arity:
+            operands = pending[-arity:]
+            del pending[-arity:]
+        else:
+            operands = []
+        pending.append(len(program))
+        program.append(_NODE_COMPILERS[type(current)](current, operands, ctx))
+    return program
+
+
+def release_plan(program: List[Instruction]) -> List[Tuple[int, ...]]:
+    """
+    Computes, for each instruction, the slots that are no longer needed once
+    it has run. Used to free large intermediate arrays in vectorized mode.
+    """
+    last_use: Dict[int, int] = {}
+    for index, (kind, _, a, b) in enumerate(program):
+        if kind == _CALL:
+            for slot in a:
+                last_use[slot] = index
+        elif kind in _SLOT_KINDS:
+            last_use[a] = index
+            if b is not None:
+                last_use[b] = index
+
+    releases: List[List[int]] = [[] for _ in program]
+    for slot, index in last_use.items():
+        releases[index].append(slot)
+    return [tuple(slots) for slots in releases]
+
+
+def run_program(
+    program: List[Instruction],
+    env: Env,
+    releases: Optional[List[Tuple[int, ...]]] = None,
+) -> Any:
+    """
+    Executes a compiled instruction list in a single loop (no recursion).
+
+    Args:
+        program: Instructions produced by compile_program
+        env: Variable bindings
+        releases: Optional release plan; when given, intermediate values are
+                  dropped as soon as their last consumer has run
+
+    Returns:
+        The value of the last instruction
+    """
+    values: List[Any] = []
+    append = values.append
+
+    for index, (kind, payload, a, b) in enumerate(program):
+        if kind == _BINARY:
+            append(payload(values[a], values[b]))
+        elif kind == _CONST:
+            append(payload)
+        elif kind == _GUARDED_BINARY:
+            _check_deadline()
+            append(payload(values[a], values[b]))
+        elif kind == _UNARY:
+            append(payload(values[a]))
+        elif kind == _LOAD:
+            append(env[payload])
+        elif kind == _CALL:
+            _check_deadline()
+            append(payload([values[slot] for slot in a]))
+        else:
+            _check_deadline()
+            append(payload(values[a], values[b], env))
+
+        if releases is not None:
+            for slot in releases[index]:
+                values[slot] = None
+
+    return values[-1]
+
+
+OptimizationReport = namedtuple("OptimizationReport", ["folded", "deduplicated", "simplified", "removed"])
+
+# Largest exact result, in bits, computed at compile time; bigger results
+# are left to the evaluation, where the budget and the time limit apply
+_FOLD_MAX_BITS = 4096
+
+# Operations that give the same result whatever the order of their operands
+_COMMUTATIVE = frozenset({'add', 'mul'})
+
+
+def _is_plain_number(value: Any, target: int) -> bool:
+    """True for an int, float or Fraction (not bool) equal to target."""
+    return isinstance(value, (int, float, Fraction)) and not isinstance(value, bool) and value == target
+
+
+def _bit_size(value: Any) -> int:
+    if isinstance(value, Fraction):
+        return value.numerator.bit_length() + value.denominator.bit_length()
+    return max(abs(value).bit_length(), 1)
+
+
+def _cheap_to_fold(payload: Callable, values: List[Any]) -> bool:
+    """Whether running an operation on constants is cheap enough at compile time."""
+    if not all(_is_exact(value) for value in values):
+        # Float arithmetic takes constant time
+        return True
+    if _OPERATION_NAMES.get(payload) == 'pow' and len(values) == 2:
+        base, exponent = values
+        return abs(exponent) * _bit_size(base) <= _FOLD_MAX_BITS
+    return sum(_bit_size(value) for value in values) <= _FOLD_MAX_BITS
+
+
+def _fold(kind: int, payload: Callable, values: List[Any]) -> Any:
+    """Runs a single instruction on constant operands."""
+    if kind == _UNARY:
+        return payload(values[0])
+    if kind == _CALL:
+        return payload(values)
+    return payload(values[0], values[1])
+
+
+def _simplify(kind: int, payload: Callable, a: Any, b: Any,
+              program: List[Instruction], constants: Dict[int, Any]) -> Optional[int]:
+    """
+    Applies the algebraic identities that hold for every IEEE 754 value,
+    including -0.0, infinities and NaN. Returns the slot that already holds
+    the result, or None.
+
+    x*1, 1*x, x/1, x**1 and x-0 are x, and -(-x) and +x are x. Identities
+    such as x+0, x*0, x-x or x/x are deliberately not applied: they fail
+    for -0.0, infinities or NaN, or would hide a runtime error.
+    """
+    name = _OPERATION_NAMES.get(payload)
+    if kind == _UNARY:
+        operand = program[a]
+        if name == 'pos' and operand[0] != _CONST:
+            return a
+        if name == 'neg' and operand[0] == _UNARY and _OPERATION_NAMES.get(operand[1]) == 'neg':
+            return operand[2]
+        return None
+
+    if kind not in (_BINARY, _GUARDED_BINARY):
+        return None
+    # Constant operands are folded instead; x*1 must keep failing when x is
+    # a function name such as "sqrt"
+    if name in ('mul', 'div', 'pow', 'sub') and b in constants and a not in constants:
+        if name == 'sub' and _is_plain_number(constants[b], 0):
+            return a
+        if name != 'sub' and _is_plain_number(constants[b], 1):
+            return a
+    if name == 'mul' and a in constants and b not in constants and _is_plain_number(constants[a], 1):
+        return b
+    return None
+
+
+def _value_key(kind: int, payload: Any, a: Any, b: Any) -> Optional[Hashable]:
+    """Key under which identical computations are numbered, or None."""
+    if kind == _CONST:
+        if isinstance(payload, (int, float, Fraction)):
+            # repr tells 0.0 from -0.0 and 1 from 1.0, which compare equal
+            return (_CONST, type(payload), repr(payload))
+        return (_CONST, id(payload))
+    if kind == _LOAD:
+        return (_LOAD, payload)
+    if kind in (_BINARY, _GUARDED_BINARY) and _OPERATION_NAMES.get(payload) in _COMMUTATIVE and b < a:
+        a, b = b, a
+    return (kind, payload, a, b)
+
+
+def _remove_dead(program: List[Instruction]) -> List[Instruction]:
+    """Drops instructions the last one does not depend on, renumbering slots."""
+    live = [False] * len(program)
+    live[-1] = True
+    for index in range(len(program) - 1, -1, -1):
+        if not live[index]:
+            continue
+        kind, _, a, b = program[index]
+        if kind == _CALL:
+            for slot in a:
+                live[slot] = True
+        elif kind in _SLOT_KINDS:
+            live[a] = True
+            if b is not None:
+                live[b] = True
+
+    renumbered: Dict[int, int] = {}
+    kept: List[Instruction] = []
+    for index, (kind, payload, a, b) in enumerate(program):
+        if not live[index]:
+            continue
+        renumbered[index] = len(kept)
+        if kind == _CALL:
+            a = tuple(renumbered[slot] for slot in a)
+        elif kind in _SLOT_KINDS:
+            a = renumbered[a]
+            if b is not None:
+                b = renumbered[b]
+        kept.append((kind, payload, a, b))
+    return kept
+
+
+def optimize_program(program: List[Instruction]) -> Tuple[List[Instruction], OptimizationReport]:
+    """
+    Simplifies a compiled program without changing its results.
+
+    In a single pass over the instructions:
+
+    - operations whose operands are all constants are folded into a constant
+      (e.g. pi/2), unless they fail, in which case the error is kept for
+      evaluation time, or are exact powers too large to compute up front;
+    - identical computations are numbered once and shared, so a repeated
+      subexpression such as sqrt(x**2+y**2) is only evaluated once;
+    - identities that are exact in floating point are applied (see _simplify).
+
+    Instructions that are no longer used are then removed.
+
+    Args:
+        program: Instructions produced by compile_program
+
+    Returns:
+        The optimized program and a report of how many instructions were
+        folded, deduplicated, simplified and removed in total
+    """
+    optimized: List[Instruction] = []
+    remap: List[int] = []
+    numbering: Dict[Hashable, int] = {}
+    constants: Dict[int, Any] = {}
+    folded = deduplicated = simplified = 0
+
+    # Fold with the same NumPy error handling as vectorized evaluation, so that
+    # e.g. log(0) is left to fail at evaluation time instead of folding to -inf
+    with np.errstate(divide='raise', invalid='raise', over='raise'):
+        for kind, payload, a, b in program:
+            if kind == _CALL:
+                a = tuple(remap[slot] for slot in a)
+            elif kind in _SLOT_KINDS:
+                a = remap[a]
+                if b is not None:
+                    b = remap[b]
+
+            same = _simplify(kind, payload, a, b, optimized, constants)
+            if same is not None:
+                simplified += 1
+                remap.append(same)
+                continue
+
+            # Reductions are not folded: they may run for as long as the time limit allows
+            operands = a if kind == _CALL else (a,) if kind == _UNARY else (a, b)
+            if kind not in (_CONST, _LOAD, _REDUCE) and all(slot in constants for slot in operands):
+                values = [constants[slot] for slot in operands]
+                if _cheap_to_fold(payload, values):
+                    try:
+                        value = _fold(kind, payload, values)
+                    except Exception:
+                        pass
+                    else:
+                        folded += 1
+                        kind, payload, a, b = _CONST, value, None, None
+
+            key = _value_key(kind, payload, a, b)
+            if key in numbering:
+                deduplicated += 1
+                remap.append(numbering[key])
+                continue
+
+            slot = len(optimized)
+            numbering[key] = slot
+            if kind == _CONST:
+                constants[slot] = payload
+            optimized.append((kind, payload, a, b))
+            remap.append(slot)
+
+    # The result must come last; anything after it is unused
+    optimized = _remove_dead(optimized[:remap[-1] + 1])
+    report = OptimizationReport(folded, deduplicated, simplified, len(program) - len(optimized))
+    return optimized, report
+
+
+# Highest power of the summation variable handled by the closed forms, and
+# the most terms c * n**d * r**n a summand may expand to
+_MAX_SERIES_DEGREE = 32
+_MAX_SERIES_TERMS = 64
+
+# Number of terms evaluated per NumPy chunk when no closed form applies
+_RANGE_CHUNK = 1 << 16
+
+# Largest geometric sum, in digits, computed with exact rationals in float mode
+_EXACT_GEOMETRIC_DIGITS = 2_000
+
+# A summand written as a sum of terms coefficient * n**degree * ratio**n,
+# stored as {ratio: {degree: coefficient}}
+SeriesTerms = Dict[Any, Dict[int, Any]]
+
+
+class _NoClosedForm(Exception):
+    """Internal signal: a summand does not have a recognized closed form."""
+
+
+def _series_constant(terms: SeriesTerms) -> Any:
+    """Returns the value of terms that do not depend on the variable."""
+    if not terms:
+        return 0
+    if len(terms) == 1:
+        (ratio, polynomial), = terms.items()
+        if ratio == 1 and list(polynomial) == [0]:
+            return polynomial[0]
+    raise _NoClosedForm
+
+
+def _prune_terms(terms: SeriesTerms) -> SeriesTerms:
+    """Drops zero coefficients and rejects non-finite or too many terms."""
+    pruned = {}
+    for ratio, polynomial in terms.items():
+        polynomial = {degree: c for degree, c in polynomial.items() if c != 0}
+        for value in (ratio, *polynomial.values()):
+            if isinstance(value, float) and not math.isfinite(value):
+                raise _NoClosedForm
+        if polynomial:
+            pruned[ratio] = polynomial
+    if len(pruned) > _MAX_SERIES_TERMS:
+        raise _NoClosedForm
+    return pruned
+
+
+def _map_coefficients(terms: SeriesTerms, op: Callable[[Any], Any]) -> SeriesTerms:
+    return _prune_terms({
+        ratio: {degree: op(c) for degree, c in polynomial.items()}
+        for ratio, polynomial in terms.items()
+    })
+
+
+def _add_terms(left: SeriesTerms, right: SeriesTerms, ops: Mapping) -> SeriesTerms:
+    result = {ratio: dict(polynomial) for ratio, polynomial in left.items()}
+    for ratio, polynomial in right.items():
+        target = result.setdefault(ratio, {})
+        for degree, c in polynomial.items():
+            target[degree] = ops[ast.Add](target[degree], c) if degree in target else c
+    return _prune_terms(result)
+
+
+def _multiply_terms(left: SeriesTerms, right: SeriesTerms, ops: Mapping) -> SeriesTerms:
+    add, multiply = ops[ast.Add], ops[ast.Mult]
+    result: SeriesTerms = {}
+    for left_ratio, left_polynomial in left.items():
+        for right_ratio, right_polynomial in right.items():
+            target = result.setdefault(multiply(left_ratio, right_ratio), {})
+            for left_degree, left_c in left_polynomial.items():
+                for right_degree, right_c in right_polynomial.items():
+                    degree = left_degree + right_degree
+                    if degree > _MAX_SERIES_DEGREE:
+                        raise _NoClosedForm
+                    product = multiply(left_c, right_c)
+                    target[degree] = add(target[degree], product) if degree in target else product
+    return _prune_terms(result)
+
+
+def _real_power(base: Any, exponent: Any, ops: Mapping) -> Any:
+    """base ** exponent for constants, if cheap and real."""
+    power = ops[ast.Pow]
+    if not _cheap_to_fold(power, [base, exponent]):
+        raise _NoClosedForm
+    value = power(base, exponent)
+    if isinstance(value, complex):
+        raise _NoClosedForm
+    return value
+
+
+def _power_terms(base: SeriesTerms, exponent: SeriesTerms, ops: Mapping, one: Any) -> SeriesTerms:
+    """base ** exponent, for a small constant integer exponent or a constant base."""
+    try:
+        count = _series_constant(exponent)
+    except _NoClosedForm:
+        count = None
+
+    if count is not None:
+        if count == int(count) and 0 <= count <= _MAX_SERIES_DEGREE:
+            result = {one: {0: one}}
+            for _ in range(int(count)):
+                result = _multiply_terms(result, base, ops)
+            return result
+        return _prune_terms({one: {0: _real_power(_series_constant(base), count, ops)}})
+
+    # c ** (p*n + q) is the geometric term c**q * (c**p)**n
+    c = _series_constant(base)
+    if c == 0 or set(exponent) != {1} or not set(exponent[1]) <= {0, 1}:
+        raise _NoClosedForm
+    slope, offset = exponent[1].get(1, 0), exponent[1].get(0, 0)
+    return _prune_terms({_real_power(c, slope, ops): {0: _real_power(c, offset, ops)}})
+
+
+def _node_terms(node: ast.AST, operands: List[SeriesTerms], variable: str,
+                ctx: _CompileContext, one: Any) -> SeriesTerms:
+    ops = ctx.operators
+
+    if isinstance(node, ast.Constant):
+        return _prune_terms({one: {0: _exact_constant(node.value) if ctx.exact else float(node.value)}})
+
+    if isinstance(node, ast.Name):
+        if node.id == variable:
+            return {one: {1: one}}
+        value = ctx.functions.get(node.id)
+        if isinstance(value, float):
+            return {one: {0: value}}
+        raise _NoClosedForm
+
+    if isinstance(node, ast.UnaryOp):
+        if isinstance(node.op, ast.USub):
+            return _map_coefficients(operands[0], ops[ast.USub])
+        return operands[0]
+
+    if isinstance(node, ast.BinOp):
+        left, right = operands
+        if isinstance(node.op, ast.Add):
+            return _add_terms(left, right, ops)
+        if isinstance(node.op, ast.Sub):
+            return _add_terms(left, _map_coefficients(right, ops[ast.USub]), ops)
+        if isinstance(node.op, ast.Mult):
+            return _multiply_terms(left, right, ops)
+        if isinstance(node.op, ast.Div):
+            divisor = _series_constant(right)
+            return _map_coefficients(left, lambda c: ops[ast.Div](c, divisor))
+        return _power_terms(left, right, ops, one)
+
+    # Calls of functions on constants, e.g. sqrt(2) * n
+    func_name = node.func.id
+    if func_name in RANGE_FUNCTIONS:
+        raise _NoClosedForm
+    args = [_series_constant(terms) for terms in operands]
+    value = _call_converter(func_name, ctx)(ctx.functions[func_name](*args))
+    return _prune_terms({one: {0: float(value) if ctx.vectorized else value}})
+
+
+def _series_terms(body: ast.AST, variable: str, ctx: _CompileContext) -> Optional[SeriesTerms]:
+    """
+    Rewrites a summand as a sum of terms coefficient * n**degree * ratio**n,
+    where n is the variable, or returns None if it cannot be written so.
+    """
+    one = 1 if ctx.exact else 1.0
+    pending: List[SeriesTerms] = []
+    try:
+        for current in _post_order(body):
+            arity = _arity(current)
+            operands = pending[len(pending) - arity:]
+            del pending[len(pending) - arity:]
+            pending.append(_node_terms(current, operands, variable, ctx, one))
+    except Exception:
+        # Anything unusual is left to the term-by-term evaluation, which
+        # also reports errors properly
+        return None
+    return pending[-1]
+
+
+@functools.lru_cache(maxsize=None)
+def _bernoulli_numbers(count: int) -> Tuple[Fraction, ...]:
+    """B_0 ... B_count, with B_1 = -1/2."""
+    numbers = [Fraction(1)]
+    for m in range(1, count + 1):
+        numbers.append(-sum(math.comb(m + 1, k) * numbers[k] for k in range(m)) / (m + 1))
+    return tuple(numbers)
+
+
+@functools.lru_cache(maxsize=None)
+def _faulhaber(degree: int) -> Tuple[Fraction, ...]:
+    """Coefficients, lowest power first, of the polynomial 1**d + 2**d + ... + n**d."""
+    bernoulli = _bernoulli_numbers(degree)
+    coefficients = [Fraction(0)] * (degree + 2)
+    for j in range(degree + 1):
+        b = Fraction(1, 2) if j == 1 else bernoulli[j]
+        coefficients[degree + 1 - j] = math.comb(degree + 1, j) * b / (degree + 1)
+    return tuple(coefficients)
+
+
+def _power_sum(degree: int, start: int, end: int) -> int:
+    """
+    Exact value of start**degree + ... + end**degree.
+
+    Faulhaber's polynomial P satisfies P(n) - P(n-1) = n**degree for every
+    integer n, so the sum is P(end) - P(start - 1), negative limits included.
+    """
+    coefficients = _faulhaber(degree)
+
+    def evaluate(n: int) -> Fraction:
+        value = Fraction(0)
+        for c in reversed(coefficients):
+            value = value * n + c
+        return value
+
+    return (evaluate(end) - evaluate(start - 1)).numerator
+
+
+def _range_limit(name: str, value: Any) -> int:
+    if isinstance(value, np.ndarray):
+        value = value.item()
+    if isinstance(value, Fraction) and value.denominator == 1:
+        return value.numerator
+    if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+        return int(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    raise ValueError(f"The limits of {name}() must be integers")
+
+
+def _check_exact_digits(digits: float) -> None:
+    """Rejects an exact closed-form result that would exceed the digit budget."""
+    _current_budget().check(ExpressionCost(0, digits))
+
+
+class RangeReduction:
+    """
+    Runtime part of sum(expression, variable, start, end) and prod(...).
+
+    The limits are inclusive. The summand is analyzed once, at compile
+    time: polynomial sums use Faulhaber's formula and geometric sums and
+    products use their closed forms, so sum(i**2, i, 1, 10**7) costs the
+    same as sum(i**2, i, 1, 10). Other summands are evaluated term by term,
+    over NumPy chunks in float mode and one term at a time in exact mode,
+    within the max_iterations budget and the time limit.
+    """
+
+    __slots__ = ("name", "variable", "exact", "operators", "identity", "free", "terms", "program", "releases")
+
+    def __init__(self, name: str, variable: str, body: ast.AST, ctx: _CompileContext):
+        if variable in ctx.functions:
+            raise ValueError(f"Invalid {name}() variable: {variable}")
+
+        self.name = name
+        self.variable = variable
+        self.exact = ctx.exact
+        self.operators = ctx.operators
+        identity = 0 if name == 'sum' else 1
+        self.identity = identity if ctx.exact else float(identity)
+        # Outer variables the summand depends on
+        self.free = tuple(sorted({
+            child.id for child in ast.walk(body)
+            if isinstance(child, ast.Name) and child.id in ctx.variables and child.id != variable
+        }))
+
+        body_ctx = _compile_context(ctx.variables | {variable}, not ctx.exact, ctx.exact)
+        self.program, _ = optimize_program(_compile_nodes(_post_order(body), body_ctx))
+        self.releases = None if ctx.exact else release_plan(self.program)
+
+        terms = _series_terms(body, variable, ctx)
+        self.terms = terms if terms is not None and self._has_closed_form(terms) else None
+
+    def _has_closed_form(self, terms: SeriesTerms) -> bool:
+        if self.name == 'prod':
+            return len(terms) <= 1 and all(list(polynomial) == [0] for polynomial in terms.values())
+        return all(ratio == 1 or list(polynomial) == [0] for ratio, polynomial in terms.items())
+
+    def __call__(self, start: Any, end: Any, env: Env) -> Any:
+        if any(isinstance(value, np.ndarray) and value.ndim for value in (start, end, *self._free_values(env))):
+            return self._elementwise(start, end, env)
+
+        start, end = _range_limit(self.name, start), _range_limit(self.name, end)
+        if end < start:
+            return self.identity
+        if self.terms is not None:
+            return self._closed_sum(start, end) if self.name == 'sum' else self._closed_product(start, end)
+
+        _consume_iterations(end - start + 1)
+        if self.exact:
+            return self._iterate(start, end, env)
+        try:
+            with np.errstate(divide='raise', invalid='raise', over='raise'):
+                return self._iterate_chunks(start, end, env)
+        except FloatingPointError as e:
+            raise ValueError(f"Error calling {self.name}: {str(e)}")
 
-    elif isinstance(node, ast.Expression):
-        return safe_eval(node.body)
+    def _free_values(self, env: Env) -> List[Any]:
+        return [env[name] for name in self.free]
 
+    def _elementwise(self, start: Any, end: Any, env: Env) -> np.ndarray:
+        """Evaluates once per element when limits or outer variables are arrays."""
+        columns = np.broadcast_arrays(*(
+            np.asarray(value, dtype=np.float64) for value in (start, end, *self._free_values(env))
+        ))
+        result = np.empty(columns[0].shape)
+        _consume_iterations(result.size)
+
+        scalar_env = dict(env)
+        for index in np.ndindex(result.shape):
+            _check_deadline()
+            for name, column in zip(self.free, columns[2:]):
+                scalar_env[name] = float(column[index])
+            result[index] = self(float(columns[0][index]), float(columns[1][index]), scalar_env)
+        return result
+
+    def _iterate(self, start: int, end: int, env: Env) -> Any:
+        combine = operator.add if self.name == 'sum' else operator.mul
+        env = dict(env)
+        total = self.identity
+        for offset, value in enumerate(range(start, end + 1)):
+            if not offset & 1023:
+                _check_deadline()
+            env[self.variable] = value
+            total = combine(total, run_program(self.program, env))
+        return _exact_value(total)
+
+    def _iterate_chunks(self, start: int, end: int, env: Env) -> float:
+        env = dict(env)
+        partials = []
+        for low in range(start, end + 1, _RANGE_CHUNK):
+            _check_deadline()
+            terms = np.arange(low, min(low + _RANGE_CHUNK, end + 1), dtype=np.float64)
+            env[self.variable] = terms
+            values = np.broadcast_to(run_program(self.program, env, self.releases), terms.shape)
+            partials.append(values.sum() if self.name == 'sum' else values.prod())
+        if self.name == 'sum':
+            return math.fsum(partials)
+        return float(np.prod(partials))
+
+    def _closed_sum(self, start: int, end: int) -> Any:
+        count = end - start + 1
+        polynomial_total = Fraction(0)
+        inexact = not self.exact
+        geometric_total = None
+
+        for ratio, polynomial in self.terms.items():
+            if ratio != 1:
+                part = self._geometric_sum(polynomial[0], ratio, start, count)
+                geometric_total = part if geometric_total is None else geometric_total + part
+                continue
+            for degree, c in polynomial.items():
+                if isinstance(c, float):
+                    inexact = True
+                elif self.exact:
+                    _check_exact_digits(
+                        (degree + 1) * _literal_digits(max(abs(start), abs(end)) + 1) + _literal_digits(c)
+                    )
+                # Accumulated exactly, so float results are correctly rounded
+                polynomial_total += Fraction(c) * _power_sum(degree, start, end)
+
+        total = float(polynomial_total) if inexact else _exact_value(polynomial_total)
+        return total if geometric_total is None else total + geometric_total
+
+    def _geometric_sum(self, c: Any, ratio: Any, start: int, count: int) -> Any:
+        """c*ratio**start + ... + c*ratio**(start + count - 1)."""
+        exact = _is_exact(c) and _is_exact(ratio)
+        digits = (abs(start) + count) * _literal_digits(Fraction(ratio)) + _literal_digits(Fraction(c))
+        if exact:
+            _check_exact_digits(digits)
+        if exact or digits <= _EXACT_GEOMETRIC_DIGITS:
+            # Floats are computed exactly too when cheap, then rounded once
+            value = Fraction(c) * Fraction(ratio) ** start * (Fraction(ratio) ** count - 1) / (Fraction(ratio) - 1)
+            return _exact_value(value) if exact else float(value)
+
+        ratio = float(ratio)
+        if ratio > 0:
+            # expm1/log keep the result accurate for ratios close to 1
+            growth = math.expm1(count * math.log(ratio)) / (ratio - 1)
+        else:
+            growth = (ratio ** count - 1) / (ratio - 1)
+        return float(c) * ratio ** start * growth
+
+    def _closed_product(self, start: int, end: int) -> Any:
+        if not self.terms:
+            return 0 if self.exact else 0.0
+
+        count = end - start + 1
+        (ratio, polynomial), = self.terms.items()
+        c = polynomial[0]
+        # prod(c * ratio**n) = c**count * ratio**(start + ... + end)
+        exponent = (start + end) * count // 2
+        if _is_exact(c) and _is_exact(ratio):
+            _check_exact_digits(count * _literal_digits(c) + abs(exponent) * _literal_digits(ratio))
+            return _exact_value(Fraction(c) ** count * Fraction(ratio) ** exponent)
+        return float(c) ** count * float(ratio) ** exponent
+
+    def __repr__(self) -> str:
+        return f"RangeReduction({self.name!r}, {self.variable!r})"
+
+
+# Upper bound, in decimal digits, of any float result
+_FLOAT_DIGITS = 309.0
+
+# Kinds of values tracked by the cost estimate
+_INT, _RATIONAL, _FLOAT = 0, 1, 2
+
+
+def _literal_digits(value: Any) -> float:
+    """
+    Size of an exact literal as log10 of its magnitude, summed over numerator
+    and denominator for Fractions (so 0.1 = 1/10 counts as 1).
+    """
+    if isinstance(value, Fraction):
+        return _literal_digits(value.numerator) + _literal_digits(value.denominator)
+    return math.log10(abs(value)) if value else 0.0
+
+
+def _combine_kind(*kinds: int) -> int:
+    return max(kinds)
+
+
+def estimate_cost(node: ast.AST, exact: bool = False) -> ExpressionCost:
+    """
+    Estimates the cost of evaluating an AST before executing it.
+
+    Counts the nodes and, in exact mode, computes an upper bound for the
+    number of decimal digits (log10 of the magnitude) of each intermediate
+    result. Floats never exceed about 309 digits, so only ints and Fractions
+    can blow up (e.g. '10**10**8' would need a hundred million digits).
+
+    Args:
+        node: AST node to inspect
+        exact: Whether the expression will be evaluated in exact mode
+
+    Returns:
+        ExpressionCost with the node count and the largest digit estimate
+    """
+    return _estimate_nodes(_post_order(node), exact)
+
+
+def _estimate_nodes(nodes: List[ast.AST], exact: bool) -> ExpressionCost:
+    if not exact:
+        # Float results are bounded, only the size of the expression matters
+        summands = sum(_summand_size(node) for node in nodes if type(node) is ast.Call)
+        return ExpressionCost(len(nodes) + summands, 0.0)
+
+    (operations, _, _), largest = _estimate_exact(nodes, {})
+    return ExpressionCost(operations, largest)
+
+
+def _estimate_exact(nodes: List[ast.AST], bounds: Dict[str, float]) -> Tuple[Tuple[int, float, int], float]:
+    """
+    Estimates a post-ordered tree in exact mode.
+
+    Args:
+        nodes: Nodes in post-order
+        bounds: Digit bounds of the integer variables in scope (the
+                variables of enclosing sum()/prod() calls)
+
+    Returns:
+        The (operations, digits, kind) estimate of the result and the
+        largest digit estimate of any exact intermediate result
+    """
+    # Per pending node: (operations, digits, kind)
+    pending: List[Tuple[int, float, int]] = []
+    largest = 0.0
+    result = (0, 0.0, _FLOAT)
+
+    for current in nodes:
+        arity = _arity(current)
+        if arity:
+            children = pending[-arity:]
+            del pending[-arity:]
+        else:
+            children = []
+        if type(current) is ast.Call and _range_function(current):
+            result, summand_largest = _estimate_range(current, children, bounds)
+            largest = max(largest, summand_largest)
+        else:
+            result = _estimate_node(current, children, True, bounds)
+        pending.append(result)
+        if result[2] != _FLOAT:
+            largest = max(largest, result[1])
+
+    return result, largest
+
+
+def _estimate_range(node: ast.Call, children: List[Tuple[int, float, int]],
+                    bounds: Dict[str, float]) -> Tuple[Tuple[int, float, int], float]:
+    """
+    Estimates sum(expression, variable, start, end) or prod(...) in exact mode.
+
+    The variable is an int no larger than the larger limit, and there are at
+    most |start| + |end| + 1 terms, so a sum of ints adds the digits of the
+    term count to those of the summand, while products (and sums of
+    Fractions, whose denominators multiply) add the summand's digits once
+    per term, like repeated multiplication.
+    """
+    (_, start_digits, _), (_, end_digits, _) = children
+    operations = 1 + children[0][0] + children[1][0] + _summand_size(node)
+
+    variable_digits = max(start_digits, end_digits)
+    count_digits = variable_digits + math.log10(1.0 + 10.0 ** -abs(start_digits - end_digits) + 10.0 ** -variable_digits)
+    (_, digits, kind), largest = _estimate_exact(
+        _post_order(node.args[0]), {**bounds, node.args[1].id: variable_digits}
+    )
+
+    if kind == _FLOAT:
+        digits = _FLOAT_DIGITS
+    elif node.func.id == 'sum' and kind == _INT:
+        digits += count_digits
     else:
-        raise ValueError(f"Unsupported expression type: {type(node).__name__}")
+        digits *= 10.0 ** min(count_digits, 300.0)
+    return (operations, digits, kind), largest
+
+
+def _estimate_node(node: ast.AST, children: List[Tuple[int, float, int]], exact: bool,
+                   bounds: Optional[Mapping[str, float]] = None) -> Tuple[int, float, int]:
+    """Returns (operations, digits, kind) for a node given its children's estimates."""
+    operations = 1 + sum(child[0] for child in children)
+
+    if isinstance(node, ast.Constant):
+        if not exact:
+            return operations, _FLOAT_DIGITS, _FLOAT
+        try:
+            value = _exact_constant(node.value)
+        except (TypeError, ValueError):
+            return operations, 1.0, _FLOAT
+        if isinstance(value, float):
+            return operations, _FLOAT_DIGITS, _FLOAT
+        return operations, _literal_digits(value), _INT if isinstance(value, int) else _RATIONAL
+
+    if isinstance(node, ast.BinOp):
+        (_, left_digits, left_kind), (_, right_digits, right_kind) = children
+        kind = _combine_kind(left_kind, right_kind)
+
+        if isinstance(node.op, ast.Pow):
+            digits, kind = _pow_digits(left_digits, left_kind, right_digits, right_kind)
+        elif kind == _FLOAT:
+            digits = _FLOAT_DIGITS
+        elif isinstance(node.op, ast.Div):
+            digits, kind = left_digits + right_digits, _RATIONAL
+        elif isinstance(node.op, ast.Mult) or kind == _RATIONAL:
+            digits = left_digits + right_digits
+        else:
+            # |a + b| <= |a| + |b|, computed in log10 space
+            high, low = max(left_digits, right_digits), min(left_digits, right_digits)
+            digits = high + math.log10(1.0 + 10.0 ** (low - high))
+        return operations, digits, kind
+
+    if isinstance(node, ast.UnaryOp):
+        return operations, children[0][1], children[0][2]
+
+    if isinstance(node, ast.Call):
+        func_name = node.func.id if isinstance(node.func, ast.Name) else None
+
+        if exact and func_name == 'pow' and len(children) == 2:
+            digits, kind = _pow_digits(children[0][1], children[0][2], children[1][1], children[1][2])
+        elif exact and func_name in ('abs', 'ceil', 'floor') and children:
+            digits, kind = children[0][1], children[0][2]
+            if func_name != 'abs' and kind != _INT:
+                kind = _INT
+        elif exact and func_name == 'sqrt' and children:
+            digits, kind = children[0][1] / 2 + 1, children[0][2]
+        else:
+            digits, kind = _FLOAT_DIGITS, _FLOAT
+        return operations, digits, kind
+
+    # Variables of enclosing sum()/prod() calls are bounded ints
+    if isinstance(node, ast.Name) and bounds and node.id in bounds:
+        return operations, bounds[node.id], _INT
+
+    # Names (constants, variables)
+    return operations, _FLOAT_DIGITS, _FLOAT
+
+
+def _summand_size(node: ast.Call) -> int:
+    """Nodes of the summand and variable of a sum()/prod() call, 0 for other calls."""
+    if not _range_function(node):
+        return 0
+    return sum(1 for _ in ast.walk(node.args[0])) + 1
+
+
+def _pow_digits(base_digits: float, base_kind: int, exponent_digits: float, exponent_kind: int):
+    """Upper bound for the digits of base ** exponent."""
+    if base_kind == _FLOAT or exponent_kind != _INT:
+        return _FLOAT_DIGITS, _FLOAT
+    # |exponent| <= 10 ** exponent_digits, and every factor adds base_digits
+    exponent_bound = 10.0 ** min(exponent_digits, 300.0)
+    return base_digits * exponent_bound, base_kind
+
+
+# Python builds the AST recursively, so deep expressions (e.g. a sum of
+# thousands of terms) need a higher recursion limit while parsing. The cap
+# keeps the C stack well within the default 8 MB of a worker thread.
+_MAX_PARSE_RECURSION_LIMIT = 25_000
+_parse_lock = threading.Lock()
+
+
+def parse_expression(expression: str) -> ast.Expression:
+    """
+    Parses an expression, allowing deeply nested operator chains.
+
+    Args:
+        expression: The mathematical expression to parse
+
+    Returns:
+        The parsed ast.Expression
+
+    Raises:
+        SyntaxError: If the expression cannot be parsed
+        ValueError: If the expression is nested too deeply to be parsed
+    """
+    with _parse_lock:
+        previous = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(previous, min(len(expression) + 100, _MAX_PARSE_RECURSION_LIMIT)))
+        try:
+            return ast.parse(expression, mode='eval')
+        except RecursionError:
+            raise ValueError("Expression is nested too deeply to be parsed")
+        finally:
+            sys.setrecursionlimit(previous)
+
+
+class CompiledExpression:
+    """
+    A parsed and validated expression that can be evaluated repeatedly.
+
+    Attributes:
+        expression: Normalized source text of the expression
+        variables: Free variable names the expression accepts
+        vectorized: Whether the expression evaluates over NumPy arrays
+        exact: Whether the expression keeps exact int/Fraction results
+        cost: Estimated cost, checked against the budget on every call
+        program: Post-order instruction list executed by run_program
+        optimization: OptimizationReport of the optimizer pass, or None if
+                      the program was not optimized
+    """
+
+    __slots__ = (
+        "expression", "variables", "vectorized", "exact", "cost", "program", "optimization", "_releases",
+    )
+
+    def __init__(
+        self,
+        expression: str,
+        program: List[Instruction],
+        variables: FrozenSet[str] = frozenset(),
+        vectorized: bool = False,
+        exact: bool = False,
+        cost: ExpressionCost = ExpressionCost(0, 0.0),
+        optimization: Optional[OptimizationReport] = None,
+    ):
+        self.expression = expression
+        self.program = program
+        self.optimization = optimization
+        self.variables = variables
+        self.vectorized = vectorized
+        self.exact = exact
+        self.cost = cost
+        # Vectorized intermediates can be large arrays, so free them early
+        self._releases = release_plan(program) if vectorized else None
+
+    def __call__(self, bindings: Optional[Env] = None, budget: Optional[EvaluationBudget] = None) -> Any:
+        bindings = bindings or {}
+        missing = self.variables.difference(bindings)
+        if missing:
+            raise ValueError(f"Missing values for variables: {', '.join(sorted(missing))}")
+
+        budget = budget or _default_budget
+        budget.check(self.cost)
+
+        state = _evaluation_state
+        previous = (
+            getattr(state, "deadline", None), getattr(state, "budget", None), getattr(state, "iterations", 0)
+        )
+        if budget.timeout is not None:
+            state.deadline = time.monotonic() + budget.timeout
+        state.budget, state.iterations = budget, 0
+        try:
+            if not self.vectorized:
+                return run_program(self.program, bindings)
+            # Surface NumPy domain/overflow problems as errors, like the math module does
+            with np.errstate(divide='raise', invalid='raise', over='raise'):
+                return run_program(self.program, bindings, self._releases)
+        finally:
+            state.deadline, state.budget, state.iterations = previous
+
+    def __repr__(self) -> str:
+        return f"CompiledExpression({self.expression!r})"
+
+
+def normalize_expression(expression: str) -> str:
+    """
+    Normalizes an expression so equivalent spellings share a cache entry.
+
+    Leading/trailing whitespace is removed and internal runs of whitespace
+    collapse to a single space, e.g. '2  +   2 ' becomes '2 + 2'.
+
+    Args:
+        expression: Raw expression text
+
+    Returns:
+        Normalized expression text
+    """
+    return " ".join(expression.split())
+
+
+def compile_expression(
+    expression: str,
+    variables: Iterable[str] = (),
+    vectorized: bool = False,
+    exact: bool = False,
+    optimize: bool = True,
+) -> CompiledExpression:
+    """
+    Parses, validates and compiles an expression without using the cache.
+
+    Args:
+        expression: The mathematical expression to compile
+        variables: Names allowed as free variables
+        vectorized: Compile for evaluation over NumPy arrays
+        exact: Keep exact int/Fraction arithmetic where possible
+        optimize: Fold constants, share repeated subexpressions and apply
+                  safe identities (see optimize_program)
+
+    Returns:
+        CompiledExpression ready to be evaluated
+
+    Raises:
+        SyntaxError: If the expression cannot be parsed
+        ValueError: If the expression contains unsupported operations
+    """
+    variables = _validate_variable_names(variables)
+    normalized = normalize_expression(expression)
+    nodes = _post_order(parse_expression(normalized))
+    program = _compile_nodes(nodes, _compile_context(variables, vectorized, exact))
+    report = None
+    if optimize:
+        program, report = optimize_program(program)
+    return CompiledExpression(
+        normalized,
+        program,
+        variables,
+        vectorized,
+        exact,
+        # The budget applies to the expression as written, so optimizing
+        # never changes which expressions are accepted
+        _estimate_nodes(nodes, exact),
+        report,
+    )
+
+
+def _validate_variable_names(names: Iterable[str]) -> FrozenSet[str]:
+    """Checks that variable names are identifiers that do not shadow functions."""
+    names = frozenset(names)
+    for name in names:
+        if not isinstance(name, str) or not name.isidentifier():
+            raise ValueError(f"Invalid variable name: {name!r}")
+        if name in MATH_FUNCTIONS or name in RANGE_FUNCTIONS:
+            raise ValueError(f"Variable name conflicts with a built-in function or constant: {name}")
+    return names
+
+
+# Default number of compiled expressions kept in memory
+DEFAULT_CACHE_SIZE = 1024
+
+
+class ExpressionCache:
+    """
+    Thread-safe bounded LRU cache of compiled expressions.
+
+    Keeps hit, miss and eviction counters so the effectiveness of the cache
+    can be monitored. A maxsize of 0 disables caching.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        if maxsize < 0:
+            raise ValueError("Cache size must be zero or positive")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, CompiledExpression]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[CompiledExpression]:
+        """Returns the cached entry for key (marking it as recently used) or None."""
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return compiled
+
+    def put(self, key: Hashable, compiled: CompiledExpression) -> None:
+        """Stores an entry, evicting the least recently used ones if full."""
+        with self._lock:
+            if self.maxsize == 0:
+                return
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def resize(self, maxsize: int) -> None:
+        """Changes the capacity, evicting entries that no longer fit."""
+        if maxsize < 0:
+            raise ValueError("Cache size must be zero or positive")
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self) -> None:
+        """Removes every entry and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Returns a snapshot of the cache counters."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+_expression_cache = ExpressionCache()
+
+
+def get_compiled_expression(
+    expression: str,
+    variables: Iterable[str] = (),
+    vectorized: bool = False,
+    exact: bool = False,
+) -> CompiledExpression:
+    """
+    Returns the compiled form of an expression, using the LRU cache.
+
+    Repeated expressions (after normalization) skip parsing and validation.
+    The cache key also includes the variable names and the evaluation mode.
+
+    Args:
+        expression: The mathematical expression to compile
+        variables: Names allowed as free variables
+        vectorized: Compile for evaluation over NumPy arrays
+        exact: Keep exact int/Fraction arithmetic where possible
+
+    Returns:
+        CompiledExpression ready to be evaluated
+
+    Raises:
+        SyntaxError: If the expression cannot be parsed
+        ValueError: If the expression contains unsupported operations
+    """
+    normalized = normalize_expression(expression)
+    key = (normalized, frozenset(variables), vectorized, exact)
+    compiled = _expression_cache.get(key)
+    if compiled is None:
+        compiled = compile_expression(normalized, variables, vectorized, exact)
+        _expression_cache.put(key, compiled)
+    return compiled
+
+
+def get_expression_cache_stats() -> Dict[str, int]:
+    """Returns hit/miss/eviction counters and the size of the expression cache."""
+    return _expression_cache.stats()
+
+
+def set_expression_cache_size(maxsize: int) -> None:
+    """Changes the maximum number of cached expressions (0 disables the cache)."""
+    _expression_cache.resize(maxsize)
+
+
+def clear_expression_cache() -> None:
+    """Empties the expression cache and resets its counters."""
+    _expression_cache.clear()
+
+
+def get_calculator_metrics() -> Dict[str, Any]:
+    """
+    Returns the calculator counters: cache statistics, budget rejections
+    (expressions refused before running) and evaluations that timed out,
+    plus the execution backend statistics when one is installed.
+    """
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    metrics["cache"] = get_expression_cache_stats()
+    if _execution_backend is not None:
+        metrics["backend"] = _execution_backend.stats()
+    return metrics
+
+
+def reset_calculator_metrics() -> None:
+    """Resets the budget and timeout counters."""
+    with _metrics_lock:
+        for name in _metrics:
+            _metrics[name] = 0
+
+
+# Optional backend that runs selected evaluations outside this process
+# (see src/tools/sandbox.py); None evaluates everything in-process
+_execution_backend = None
+
+
+def get_execution_backend() -> Any:
+    """Returns the execution backend in use, or None for in-process evaluation."""
+    return _execution_backend
+
+
+def set_execution_backend(backend: Any) -> None:
+    """
+    Installs (or, with None, removes) an execution backend.
+
+    A backend provides should_isolate(compiled) -> bool, which decides
+    whether a compiled expression is expensive enough to be run elsewhere,
+    and evaluate(expression, exact, budget), which runs it there.
+    """
+    global _execution_backend
+    _execution_backend = backend
+
+
+def evaluate_expression(expression: str, exact: bool = False) -> Any:
+    """
+    Compiles (through the cache) and evaluates a single expression.
+
+    Args:
+        expression: The mathematical expression to evaluate
+        exact: Keep exact int/Fraction arithmetic where possible
+
+    Returns:
+        The evaluated result
+
+    Raises:
+        ValueError: If the expression is empty, malformed or unsupported
+        ZeroDivisionError: If division by zero is attempted
+    """
+    # Remove whitespace
+    expression = expression.strip()
+
+    if not expression:
+        raise ValueError("Expressão vazia fornecida")
+
+    # Parse and validate the expression (cached by normalized text)
+    try:
+        compiled = get_compiled_expression(expression, exact=exact)
+    except SyntaxError as e:
+        raise ValueError(f"Sintaxe inválida na expressão: {str(e)}")
+
+    backend = _execution_backend
+    if backend is not None and backend.should_isolate(compiled):
+        # Rejects over-budget expressions before they reach the backend
+        _default_budget.check(compiled.cost)
+        try:
+            return backend.evaluate(compiled.expression, exact=exact, budget=_default_budget)
+        except EvaluationTimeoutError:
+            # Counted here, since the backend's own counters live elsewhere
+            _record_metric("timeouts")
+            raise
+
+    return compiled()
+
+
+def format_result(result: Any) -> str:
+    """
+    Formats an evaluated result for display.
+
+    Args:
+        result: Value returned by the evaluator
+
+    Returns:
+        The result as text, without unnecessary decimal points for integers.
+        Exact fractions are shown as 'p/q' followed by their decimal value.
+    """
+    if isinstance(result, float) and result.is_integer():
+        return str(int(result))
+    if isinstance(result, Fraction):
+        return f"{_format_int(result.numerator)}/{_format_int(result.denominator)} (≈ {float(result)})"
+    if isinstance(result, int) and not isinstance(result, bool):
+        return _format_int(result)
+    return str(result)
+
+
+def _format_int(value: int) -> str:
+    """Formats an int, using scientific notation beyond the int-to-str digit limit."""
+    try:
+        return str(value)
+    except ValueError:
+        exponent = math.floor(math.log10(abs(value)))
+        mantissa = 10 ** (math.log10(abs(value)) - exponent)
+        sign = "-" if value < 0 else ""
+        return f"≈ {sign}{mantissa:.15f}e+{exponent}"
+
+
+def _error_message(error: Exception) -> str:
+    """Maps an evaluation exception to the message shown to the user."""
+    if isinstance(error, (ZeroDivisionError, ValueError)):
+        return str(error)
+    return f"Ocorreu um erro inesperado: {str(error)}"
+
+
+def _json_result(result: Any) -> Any:
+    """Returns the result as a JSON number when possible, or as formatted text."""
+    if isinstance(result, float) and math.isfinite(result):
+        return int(result) if result.is_integer() else result
+    if isinstance(result, int) and not isinstance(result, bool):
+        text = _format_int(result)
+        return result if text.lstrip("-").isdigit() else text
+    return format_result(result)
 
 
 @tool
-def calculator(expression: str) -> str:
+def calculator(expression: str, exact: bool = False) -> str:
     """
     Evaluates mathematical expressions including basic operations and common mathematical functions.
 
@@ -111,6 +1876,8 @@ def calculator(expression: str) -> str:
     - Basic operations: +, -, *, /, ** (power)
     - Mathematical functions: sqrt(), pow(), sin(), cos(), tan(), log(), log10(), exp(), abs(), ceil(), floor()
     - Constants: pi, e
+    - Sums and products over an integer range, limits included:
+      sum(expression, variable, start, end) and prod(expression, variable, start, end)
 
     Args:
         expression: The mathematical expression to evaluate.
@@ -121,6 +1888,11 @@ def calculator(expression: str) -> str:
                    - '45 * 23 + 17'
                    - 'sin(pi / 2)'
                    - '(10 + 5) * 3 / 2'
+                   - 'sum(i**2, i, 1, 10**7)'
+                   - 'prod(1 + 1/k, k, 1, 10)'
+        exact: If True, integer and fractional arithmetic is done exactly
+              (e.g. '2**200', '10**30 + 1', '1/3 + 1/6'). Transcendental
+              functions (sin, log, exp, ...) and pi/e still use floats.
 
     Returns:
         A string containing the calculated result or an error message.
@@ -136,36 +1908,177 @@ def calculator(expression: str) -> str:
         "Resultado: 0"
         >>> calculator("10 / 0")
         "Erro: Divisão por zero não é permitida"
+        >>> calculator("1/3 + 1/6", exact=True)
+        "Resultado: 1/2 (≈ 0.5)"
     """
     try:
-        # Remove whitespace
-        expression = expression.strip()
+        result = evaluate_expression(expression, exact=exact)
+        return f"Resultado: {format_result(result)}"
+    except Exception as e:
+        return f"Erro: {_error_message(e)}"
+
+
+@tool
+def calculator_batch(
+    expressions: List[str],
+    labels: Optional[List[str]] = None,
+    exact: bool = False,
+) -> str:
+    """
+    Evaluates several independent mathematical expressions in a single call.
+
+    Use this instead of multiple calculator calls when a question needs more
+    than one calculation. Each expression is evaluated on its own, so an
+    error in one of them does not affect the others.
+
+    Args:
+        expressions: List of expressions, with the same syntax as calculator.
+                    Example: ['128 * 46', 'sqrt(2025)', '(15 + 25) * 3 - 10']
+        labels: Optional list of short names, one per expression, used to
+               identify each result. Example: ['area', 'lado', 'total']
+        exact: If True, integer and fractional arithmetic is done exactly
 
-        if not expression:
-            return "Erro: Expressão vazia fornecida"
+    Returns:
+        A compact JSON string with one entry per expression, in input order,
+        holding either 'resultado' or 'erro', plus success/error counts.
+
+    Examples:
+        >>> calculator_batch(["2 + 2", "10 / 0"], ["soma", "divisao"])
+        {"resultados":[{"rotulo":"soma","resultado":4},{"rotulo":"divisao","erro":"Division by zero is not allowed"}],"sucessos":1,"erros":1}
+    """
+    if not expressions:
+        return json.dumps({"erro": "Nenhuma expressão fornecida"}, ensure_ascii=False)
+
+    if labels is not None and len(labels) != len(expressions):
+        return json.dumps({
+            "erro": f"Foram fornecidos {len(labels)} rótulos para {len(expressions)} expressões"
+        }, ensure_ascii=False)
+
+    entries = []
+    errors = 0
+    for index, expression in enumerate(expressions):
+        if labels is not None:
+            entry = {"rotulo": labels[index]}
+        else:
+            entry = {"expressao": expression}
 
-        # Parse the expression into an AST
         try:
-            tree = ast.parse(expression, mode='eval')
+            entry["resultado"] = _json_result(evaluate_expression(expression, exact=exact))
+        except Exception as e:
+            entry["erro"] = _error_message(e)
+            errors += 1
+
+        entries.append(entry)
+
+    return json.dumps({
+        "resultados": entries,
+        "sucessos": len(entries) - errors,
+        "erros": errors,
+    }, ensure_ascii=False, separators=(",", ":"))
+
+
+def evaluate_vectorized(expression: str, variables: Mapping[str, Any]) -> np.ndarray:
+    """
+    Evaluates an expression over whole columns of variable bindings at once.
+
+    Each variable is bound to an array (or scalar) and the expression runs
+    as a single vectorized NumPy pass, giving the same values the scalar
+    calculator would give row by row.
+
+    Args:
+        expression: Mathematical expression using the variable names,
+                    e.g. 'a * sin(b) + c'
+        variables: Mapping from variable name to a column of values, or to
+                   the values as text ('1, 2, 3', one per line, ...), or to
+                   a dataset handle such as 'ds:3'
+
+    Returns:
+        Float64 array with one result per row
+
+    Raises:
+        SyntaxError: If the expression cannot be parsed
+        ValueError: If the expression or the bindings are invalid
+        ZeroDivisionError: If any row divides by zero
+
+    Examples:
+        >>> evaluate_vectorized("a * 2 + b", {"a": [1, 2, 3], "b": [10, 20, 30]})
+        array([12., 24., 36.])
+    """
+    compiled = get_compiled_expression(expression, variables.keys(), vectorized=True)
+
+    columns = {}
+    for name, values in variables.items():
+        if isinstance(values, str) and is_handle(values):
+            # A dataset registered by the statistics tools
+            columns[name] = get_dataset_registry().get(values)
+            continue
+        if isinstance(values, str):
+            try:
+                columns[name] = parse_numbers(values)
+            except NumberParseError as e:
+                raise ValueError(
+                    f"Invalid number '{e.token}' for variable '{name}' at position {e.position}"
+                ) from None
+            continue
+        try:
+            columns[name] = np.asarray(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError(f"Values for variable '{name}' must be numeric")
+
+    try:
+        shape = np.broadcast_shapes(*(column.shape for column in columns.values()))
+    except ValueError:
+        raise ValueError("All variables must have the same number of values")
+
+    result = compiled(columns)
+    return np.broadcast_to(np.asarray(result, dtype=np.float64), shape).copy()
+
+
+@tool
+def vectorized_calculator(expression: str, variables: Dict[str, Union[List[float], str]]) -> str:
+    """
+    Evaluates one mathematical expression over many rows of variable values in a single call.
+
+    Use this instead of calling calculator repeatedly when the same formula
+    must be applied to a list or table of values.
+
+    Supports the same operations, functions and constants as calculator,
+    plus free variables whose values are given as lists of equal length.
+
+    Args:
+        expression: The expression using variable names, e.g. 'a * sin(b) + c'
+        variables: Mapping from variable name to its list of values,
+                  e.g. {"a": [1, 2, 3], "b": [0, 0.5, 1], "c": [10, 10, 10]};
+                  a list may also be given as text, e.g. {"a": "1; 2; 3"},
+                  or as the handle of a dataset, e.g. {"a": "ds:3"}
+
+    Returns:
+        A JSON-formatted string with the number of rows and one result per row.
+
+    Examples:
+        >>> vectorized_calculator("x ** 2 + 1", {"x": [1, 2, 3]})
+        {"contagem": 3, "resultados": [2.0, 5.0, 10.0]}
+    """
+    try:
+        if not expression or not expression.strip():
+            return json.dumps({"erro": "Expressão vazia fornecida"}, ensure_ascii=False)
+
+        if not variables:
+            return json.dumps({
+                "erro": "Nenhuma variável fornecida. Use a ferramenta calculator para expressões sem variáveis."
+            }, ensure_ascii=False)
+
+        try:
+            results = evaluate_vectorized(expression, variables)
         except SyntaxError as e:
-            return f"Erro: Sintaxe inválida na expressão: {str(e)}"
-
-        # Safely evaluate the AST
-        result = safe_eval(tree)
-
-        # Format the result
-        if isinstance(result, float):
-            # Remove unnecessary decimal points for integers
-            if result.is_integer():
-                return f"Resultado: {int(result)}"
-            else:
-                return f"Resultado: {result}"
-        else:
-            return f"Resultado: {result}"
+            return json.dumps({"erro": f"Sintaxe inválida na expressão: {str(e)}"}, ensure_ascii=False)
+
+        return json.dumps({
+            "contagem": int(results.size),
+            "resultados": results.tolist(),
+        }, ensure_ascii=False)
 
-    except ZeroDivisionError as e:
-        return f"Erro: {str(e)}"
-    except ValueError as e:
-        return f"Erro: {str(e)}"
+    except (ValueError, ArithmeticError) as e:
+        return json.dumps({"erro": str(e)}, ensure_ascii=False)
     except Exception as e:
-        return f"Erro: Ocorreu um erro inesperado: {str(e)}"
+        return json.dumps({"erro": f"Ocorreu um erro inesperado: {str(e)}"}, ensure_ascii=False)
@@ -0,0 +1,241 @@
+"""
+Registry of parsed datasets, referenced by short handles such as 'ds:42'.
+
+The statistics tools register every list of numbers they parse and return
+its handle, so follow-up questions about the same data can pass the handle
+instead of re-sending (and re-parsing) every value. Results computed for a
+dataset are memoized with it.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from src.tools.parsing import parse_numbers
+
+
+# Default limits of the registry: number of datasets and total array bytes
+DEFAULT_MAX_DATASETS = 64
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+HANDLE_PREFIX = "ds:"
+
+_HANDLE = re.compile(r"^\s*ds:\s*(\d+)\s*$", re.IGNORECASE)
+
+
+def is_handle(text: str) -> bool:
+    """Whether text is a dataset handle such as 'ds:42'."""
+    return bool(_HANDLE.match(text))
+
+
+def normalize_handle(handle: str) -> str:
+    """Writes a handle in its canonical form ('DS: 042 ' becomes 'ds:42')."""
+    match = _HANDLE.match(handle)
+    return f"{HANDLE_PREFIX}{int(match.group(1))}" if match else handle
+
+
+class _Dataset:
+    """A registered array, its content digest and its memoized results."""
+
+    __slots__ = ("values", "digest", "results")
+
+    def __init__(self, values: np.ndarray, digest: bytes):
+        self.values = values
+        self.digest = digest
+        self.results: Dict[Hashable, Any] = {}
+
+
+class DatasetRegistry:
+    """
+    Thread-safe LRU registry of read-only float64 arrays.
+
+    Datasets are evicted, least recently used first, when there are more
+    than max_datasets of them or their arrays add up to more than
+    max_bytes. Registering the same values twice returns the same handle,
+    so results memoized for them are reused.
+    """
+
+    def __init__(self, max_datasets: int = DEFAULT_MAX_DATASETS, max_bytes: int = DEFAULT_MAX_BYTES):
+        if max_datasets < 1 or max_bytes < 1:
+            raise ValueError("The registry limits must be positive")
+        self.max_datasets = max_datasets
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.result_hits = 0
+        self._entries: "OrderedDict[str, _Dataset]" = OrderedDict()
+        self._by_digest: Dict[bytes, str] = {}
+        self._bytes = 0
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, handle: str) -> bool:
+        return normalize_handle(handle) in self._entries
+
+    def add(self, values: np.ndarray, copy: bool = True) -> str:
+        """
+        Registers an array and returns its handle.
+
+        Args:
+            values: The numbers; stored as a read-only float64 array
+            copy: Store a copy; with False an owned float64 array is
+                  stored as it is and made read-only
+
+        Raises:
+            ValueError: If the array alone is larger than max_bytes
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.nbytes > self.max_bytes:
+            raise ValueError(
+                f"Conjunto de dados grande demais para o registro: {values.nbytes} bytes (limite {self.max_bytes})"
+            )
+        if copy or values.base is not None:
+            values = values.copy()
+        values.flags.writeable = False
+
+        digest = hashlib.blake2b(values.tobytes(), digest_size=16).digest()
+        with self._lock:
+            handle = self._by_digest.get(digest)
+            if handle is not None:
+                self._entries.move_to_end(handle)
+                return handle
+
+            handle = f"{HANDLE_PREFIX}{self._next_id}"
+            self._next_id += 1
+            self._entries[handle] = _Dataset(values, digest)
+            self._by_digest[digest] = handle
+            self._bytes += values.nbytes
+            self._evict()
+            return handle
+
+    def _get_entry(self, handle: str) -> _Dataset:
+        handle = normalize_handle(handle)
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None:
+                self.misses += 1
+                raise ValueError(
+                    f"Conjunto de dados '{handle}' não encontrado; ele pode ter sido descartado. "
+                    "Envie os números novamente."
+                )
+            self._entries.move_to_end(handle)
+            self.hits += 1
+            return entry
+
+    def get(self, handle: str) -> np.ndarray:
+        """
+        Returns the read-only array registered under handle.
+
+        Raises:
+            ValueError: If the handle is unknown or was evicted
+        """
+        return self._get_entry(handle).values
+
+    def memoize(self, handle: str, key: Hashable, compute: Callable[[np.ndarray], Any]) -> Any:
+        """
+        Returns the result stored for (handle, key), computing it once.
+
+        Args:
+            handle: The dataset handle
+            key: Identifies the computation and its parameters
+            compute: Called with the array when the result is not stored
+
+        Raises:
+            ValueError: If the handle is unknown or was evicted
+        """
+        entry = self._get_entry(handle)
+        with self._lock:
+            if key in entry.results:
+                self.result_hits += 1
+                return entry.results[key]
+        result = compute(entry.values)
+        with self._lock:
+            entry.results[key] = result
+        return result
+
+    def remove(self, handle: str) -> None:
+        """Removes a dataset, if registered."""
+        with self._lock:
+            entry = self._entries.pop(normalize_handle(handle), None)
+            if entry is not None:
+                self._forget(entry)
+
+    def clear(self) -> None:
+        """Removes every dataset and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._by_digest.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.result_hits = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Returns a snapshot of the registry counters and sizes."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "result_hits": self.result_hits,
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "max_datasets": self.max_datasets,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _forget(self, entry: _Dataset) -> None:
+        self._by_digest.pop(entry.digest, None)
+        self._bytes -= entry.values.nbytes
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_datasets or self._bytes > self.max_bytes:
+            _, entry = self._entries.popitem(last=False)
+            self._forget(entry)
+            self.evictions += 1
+
+
+_registry = DatasetRegistry()
+
+
+def get_dataset_registry() -> DatasetRegistry:
+    """Returns the registry shared by the tools."""
+    return _registry
+
+
+def load_numbers(text: str) -> Tuple[np.ndarray, Optional[str]]:
+    """
+    Resolves a tool argument that is either a dataset handle or numbers.
+
+    Inline numbers are parsed with parse_numbers and registered; an empty
+    list, or one too large for the registry, is not registered.
+
+    Args:
+        text: A handle such as 'ds:42', or numbers as parse_numbers accepts
+
+    Returns:
+        (values, handle), with handle None if the values were not registered
+
+    Raises:
+        ValueError: If the handle is unknown or a number is invalid
+    """
+    if is_handle(text):
+        handle = normalize_handle(text)
+        return _registry.get(handle), handle
+
+    values = parse_numbers(text)
+    if len(values) == 0:
+        return values, None
+    try:
+        return values, _registry.add(values, copy=False)
+    except ValueError:
+        # Too large to keep; the values are still usable for this call
+        return values, None
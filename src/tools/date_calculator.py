@@ -1,10 +1,56 @@
 """
 Advanced date calculator tool for date and time calculations.
 """
+import calendar
+import functools
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
+
+import numpy as np
 from langchain_core.tools import tool
 
+from src.tools.business_days import get_business_calendar
+
+
+# Portuguese day names, indexed by weekday (Monday is 0)
+DAY_NAMES = ['Segunda-feira', 'Terça-feira', 'Quarta-feira', 'Quinta-feira', 'Sexta-feira', 'Sábado', 'Domingo']
+
+
+# Number of recently parsed date strings kept in memory
+DATE_CACHE_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_iso_date(date_str: str) -> datetime:
+    """
+    Parses a YYYY-MM-DD date, memoizing recently seen strings.
+
+    Canonical dates (four-digit year, two-digit month and day) go through
+    datetime.fromisoformat, which is many times faster than strptime; any
+    other string falls back to strptime, so the accepted inputs are the same
+    as before (e.g. '2024-1-5'). Invalid strings raise and are not cached.
+
+    Raises:
+        ValueError: If the string is not a valid date
+    """
+    if len(date_str) == 10 and date_str[4] == "-" and date_str[7] == "-":
+        try:
+            return datetime.fromisoformat(date_str)
+        except ValueError:
+            pass
+    return datetime.strptime(date_str, "%Y-%m-%d")
+
+
+def get_date_cache_stats() -> Dict[str, int]:
+    """Returns hit/miss counters and the size of the parsed date cache."""
+    info = parse_iso_date.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize}
+
+
+def clear_date_cache() -> None:
+    """Empties the parsed date cache and resets its counters."""
+    parse_iso_date.cache_clear()
+
 
 def validate_date_format(date_str: str) -> datetime:
     """
@@ -20,13 +66,53 @@ def validate_date_format(date_str: str) -> datetime:
         ValueError: If the date format is invalid
     """
     try:
-        return datetime.strptime(date_str, "%Y-%m-%d")
+        return parse_iso_date(date_str)
     except ValueError:
         raise ValueError(
             f"Invalid date format: '{date_str}'. Please use YYYY-MM-DD format (e.g., '2024-01-15')"
         )
 
 
+def add_months(day: datetime, months: int) -> datetime:
+    """
+    Moves a date by whole months, clamping the day to the length of the
+    target month: 2024-01-31 plus one month is 2024-02-29, and 2024-02-29
+    plus twelve months is 2025-02-28.
+
+    Raises:
+        ValueError: If the result falls outside years 1 to 9999
+    """
+    year, month = divmod(day.year * 12 + day.month - 1 + months, 12)
+    if not 1 <= year <= 9999:
+        raise ValueError("O resultado está fora do intervalo de datas suportado (anos 1 a 9999).")
+    month += 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def months_between(first: datetime, second: datetime) -> int:
+    """
+    Whole months from the earlier to the later date, in either order: the
+    largest n for which add_months(earlier, n) does not pass the later date
+    (2024-01-31 to 2024-02-29 is one month).
+    """
+    start, end = min(first, second), max(first, second)
+    months = (end.year - start.year) * 12 + end.month - start.month
+    if add_months(start, months) > end:
+        months -= 1
+    return months
+
+
+def diff_ymd(first: datetime, second: datetime) -> Tuple[int, int, int]:
+    """
+    Years, months and days from the earlier to the later date: the whole
+    months of months_between, then the days left after adding them.
+    """
+    start, end = min(first, second), max(first, second)
+    months = months_between(start, end)
+    years, months_left = divmod(months, 12)
+    return years, months_left, (end - add_months(start, months)).days
+
+
 @tool
 def date_calculator(operation: str, date1: str, date2: Optional[str] = None) -> str:
     """
@@ -38,13 +124,29 @@ def date_calculator(operation: str, date1: str, date2: Optional[str] = None) ->
     3. 'subtract_days' - Subtracts days from a date (date1=base date, date2=number of days as string)
     4. 'age' - Calculates age in years from birth date to today (requires date1 as birth date)
     5. 'day_of_week' - Gets the day name for a specific date (requires date1)
+    6. 'business_days' - Counts business days between two dates, both included (requires date1 and date2)
+    7. 'add_business_days' - Adds business days to a date (date1=base date, date2=number of days as string)
+    8. 'subtract_business_days' - Subtracts business days from a date (date1=base date, date2=number of days as string)
+    9. 'is_business_day' - Tells whether a date is a business day, naming the holiday if any (requires date1)
+    10. 'add_months' - Adds months to a date (date1=base date, date2=number of months as string)
+    11. 'add_years' - Adds years to a date (date1=base date, date2=number of years as string)
+    12. 'months_between' - Counts whole months between two dates (requires date1 and date2)
+    13. 'diff_ymd' - Difference between two dates in years, months and days (requires date1 and date2)
+
+    Business days are Monday to Friday except the holidays of the business
+    calendar (Brazilian national holidays by default). Month and year
+    operations clamp the day to the end of shorter months: 2024-01-31 plus
+    one month is 2024-02-29. Negative numbers of months or years subtract.
 
     Args:
         operation: The type of operation to perform.
-                  Must be one of: 'difference', 'add_days', 'subtract_days', 'age', 'day_of_week'
+                  Must be one of: 'difference', 'add_days', 'subtract_days', 'age', 'day_of_week',
+                  'business_days', 'add_business_days', 'subtract_business_days', 'is_business_day',
+                  'add_months', 'add_years', 'months_between', 'diff_ymd'
         date1: First date in YYYY-MM-DD format, or base date for operations
-        date2: Second date in YYYY-MM-DD format (for 'difference'),
-              or number of days as string (for 'add_days'/'subtract_days')
+        date2: Second date in YYYY-MM-DD format (for 'difference', 'business_days',
+              'months_between' and 'diff_ymd'), or number of days, months or years
+              as string (for the add/subtract operations)
 
     Returns:
         A string with the calculation result in readable format.
@@ -64,10 +166,26 @@ def date_calculator(operation: str, date1: str, date2: Optional[str] = None) ->
 
         >>> date_calculator("day_of_week", "2024-01-01")
         "2024-01-01 cai em uma Segunda-feira."
+
+        >>> date_calculator("business_days", "2024-03-01", "2024-03-31")
+        "Entre 2024-03-01 e 2024-03-31 há 20 dias úteis (contando as duas datas)."
+
+        >>> date_calculator("add_business_days", "2024-01-01", "15")
+        "2024-01-01 mais 15 dias úteis é 2024-01-22."
+
+        >>> date_calculator("add_months", "2024-01-31", "1")
+        "2024-01-31 mais 1 meses é 2024-02-29 (dia ajustado ao fim do mês)."
+
+        >>> date_calculator("diff_ymd", "2020-02-29", "2024-03-15")
+        "De 2020-02-29 a 2024-03-15 são 4 anos, 0 meses e 15 dias."
     """
     try:
         # Validate operation
-        valid_operations = ['difference', 'add_days', 'subtract_days', 'age', 'day_of_week']
+        valid_operations = [
+            'difference', 'add_days', 'subtract_days', 'age', 'day_of_week',
+            'business_days', 'add_business_days', 'subtract_business_days', 'is_business_day',
+            'add_months', 'add_years', 'months_between', 'diff_ymd',
+        ]
         operation = operation.lower().strip()
 
         if operation not in valid_operations:
@@ -144,9 +262,85 @@ def date_calculator(operation: str, date1: str, date2: Optional[str] = None) ->
 
         elif operation == 'day_of_week':
             # Get day of week name
-            day_names = ['Segunda-feira', 'Terça-feira', 'Quarta-feira', 'Quinta-feira', 'Sexta-feira', 'Sábado', 'Domingo']
-            day_name = day_names[dt1.weekday()]
+            day_name = DAY_NAMES[dt1.weekday()]
             return f"{date1} cai em uma {day_name}."
 
+        elif operation == 'business_days':
+            # Requires both dates
+            if not date2 or not date2.strip():
+                return "Erro: operação 'business_days' requer tanto date1 quanto date2."
+
+            try:
+                dt2 = validate_date_format(date2.strip())
+            except ValueError as e:
+                return f"Erro em date2: {str(e)}"
+
+            count = get_business_calendar().count(np.datetime64(dt1.date()), np.datetime64(dt2.date()))
+            return f"Entre {date1} e {date2} há {count} dias úteis (contando as duas datas)."
+
+        elif operation in ('add_business_days', 'subtract_business_days'):
+            # Requires date1 and number of business days in date2
+            verb, word = ('adicionar', 'mais') if operation == 'add_business_days' else ('subtrair', 'menos')
+            if not date2 or not date2.strip():
+                return f"Erro: operação '{operation}' requer date2 como o número de dias úteis a {verb}."
+
+            try:
+                days = int(date2.strip())
+            except ValueError:
+                return f"Erro: date2 deve ser um inteiro válido (número de dias), recebido '{date2}'."
+
+            out_of_range = "Erro: O resultado está fora do intervalo de datas suportado (anos 1 a 9999)."
+            if abs(days) > (datetime.max - datetime.min).days:
+                return out_of_range
+            offset = days if operation == 'add_business_days' else -days
+            result_date = get_business_calendar().offset(np.datetime64(dt1.date()), offset)
+            if not np.datetime64('0001-01-01') <= result_date <= np.datetime64('9999-12-31'):
+                return out_of_range
+            return f"{date1} {word} {days} dias úteis é {result_date}."
+
+        elif operation == 'is_business_day':
+            business_calendar = get_business_calendar()
+            day = np.datetime64(dt1.date())
+            if business_calendar.is_business_day(day):
+                return f"{date1} é dia útil ({DAY_NAMES[dt1.weekday()]})."
+            holiday = business_calendar.holiday_name(day)
+            reason = f"feriado: {holiday}" if holiday else f"fim de semana, {DAY_NAMES[dt1.weekday()]}"
+            return f"{date1} não é dia útil ({reason})."
+
+        elif operation in ('add_months', 'add_years'):
+            # Requires date1 and number of months or years in date2
+            unit = 'meses' if operation == 'add_months' else 'anos'
+            if not date2 or not date2.strip():
+                return f"Erro: operação '{operation}' requer date2 como o número de {unit} a adicionar."
+
+            try:
+                amount = int(date2.strip())
+            except ValueError:
+                return f"Erro: date2 deve ser um inteiro válido (número de {unit}), recebido '{date2}'."
+
+            try:
+                result_date = add_months(dt1, amount if operation == 'add_months' else 12 * amount)
+            except ValueError as e:
+                return f"Erro: {str(e)}"
+            result_str = result_date.strftime("%Y-%m-%d")
+            note = " (dia ajustado ao fim do mês)" if result_date.day != dt1.day else ""
+            return f"{date1} mais {amount} {unit} é {result_str}{note}."
+
+        elif operation in ('months_between', 'diff_ymd'):
+            # Requires both dates
+            if not date2 or not date2.strip():
+                return f"Erro: operação '{operation}' requer tanto date1 quanto date2."
+
+            try:
+                dt2 = validate_date_format(date2.strip())
+            except ValueError as e:
+                return f"Erro em date2: {str(e)}"
+
+            if operation == 'months_between':
+                return f"Entre {date1} e {date2} há {months_between(dt1, dt2)} meses completos."
+            years, months, days = diff_ymd(dt1, dt2)
+            start, end = (date1, date2) if dt1 <= dt2 else (date2, date1)
+            return f"De {start} a {end} são {years} anos, {months} meses e {days} dias."
+
     except Exception as e:
         return f"Erro: Ocorreu um erro inesperado: {str(e)}"
@@ -0,0 +1,417 @@
+"""
+Statistics over datasets stored in local files, without sending the values
+through the prompt.
+
+Supports a column of a CSV file, .npy arrays and raw binary float files.
+Binary formats are memory-mapped and CSV files are read in blocks, so the
+data is summarized chunk by chunk with StreamingStatistics and files much
+larger than memory can be analyzed.
+"""
+import csv
+import io
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from langchain_core.tools import tool
+
+from src.tools.parallel import get_statistics_pool
+from src.tools.sketch import QuantileSketch
+from src.tools.statistics import MAX_ERROR_BOUND, MIN_ERROR_BOUND
+from src.tools.streaming import StreamingStatistics
+
+
+# File extensions of each supported format
+CSV_EXTENSIONS = {".csv", ".tsv", ".txt"}
+NPY_EXTENSIONS = {".npy"}
+RAW_EXTENSIONS = {".bin", ".raw", ".dat", ".f64", ".f32"}
+
+# Element types accepted for raw binary files
+RAW_DTYPES = {"float64": np.dtype("<f8"), "float32": np.dtype("<f4")}
+
+# Values read per chunk from memory-mapped files
+CHUNK_VALUES = 1 << 20
+
+# Characters read per block from CSV files
+CSV_BLOCK_SIZE = 1 << 22
+
+# Files with up to this many values are summarized exactly; larger ones
+# get approximate quartiles from the quantile sketch
+FILE_EXACT_LIMIT = 10_000_000
+
+_CSV_DELIMITERS = [",", ";", "\t"]
+
+# Directory that relative paths are resolved against and that absolute
+# paths must stay inside; None allows any path
+_data_directory: Optional[Path] = None
+
+
+def set_data_directory(directory: Optional[Union[str, Path]]) -> None:
+    """
+    Restricts the files the tools may read to one directory.
+
+    Args:
+        directory: The data directory, or None to allow any path
+    """
+    global _data_directory
+    _data_directory = Path(directory).expanduser().resolve() if directory else None
+
+
+def get_data_directory() -> Optional[Path]:
+    """Returns the directory files are restricted to, if any."""
+    return _data_directory
+
+
+def resolve_path(path: str) -> Path:
+    """
+    Resolves a file path given to a tool, enforcing the data directory.
+
+    Raises:
+        ValueError: If the path is outside the data directory or is not a file
+    """
+    candidate = Path(path).expanduser()
+    if _data_directory is not None:
+        candidate = (_data_directory / candidate).resolve()
+        if _data_directory not in candidate.parents:
+            raise ValueError(f"O arquivo deve estar dentro do diretório de dados {_data_directory}")
+    else:
+        candidate = candidate.resolve()
+    if not candidate.is_file():
+        raise ValueError(f"Arquivo não encontrado: {path}")
+    return candidate
+
+
+def detect_format(path: Path) -> str:
+    """
+    Returns "csv", "npy" or "raw" from the file extension.
+
+    Raises:
+        ValueError: If the extension is not supported
+    """
+    suffix = path.suffix.lower()
+    if suffix in CSV_EXTENSIONS:
+        return "csv"
+    if suffix in NPY_EXTENSIONS:
+        return "npy"
+    if suffix in RAW_EXTENSIONS:
+        return "raw"
+    supported = ", ".join(sorted(CSV_EXTENSIONS | NPY_EXTENSIONS | RAW_EXTENSIONS))
+    raise ValueError(f"Formato de arquivo não suportado: '{suffix}'. Use um destes: {supported}")
+
+
+def detect_delimiter(line: str) -> Optional[str]:
+    """The most frequent of ",", ";" and tab in a CSV line, or None for whitespace."""
+    counts = [line.count(candidate) for candidate in _CSV_DELIMITERS]
+    return _CSV_DELIMITERS[counts.index(max(counts))] if max(counts) else None
+
+
+def is_number(text: str) -> bool:
+    """Whether a CSV field is a number."""
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+class FileDataset:
+    """
+    A numeric column stored in a local file, read in chunks.
+
+    Attributes:
+        path: Resolved file path
+        format: "csv", "npy" or "raw"
+        column: Selected column (name or index) for CSV and 2-D .npy
+                files, None otherwise
+        skipped: Empty CSV fields skipped so far
+    """
+
+    def __init__(
+        self,
+        path: str,
+        column: Optional[str] = None,
+        dtype: str = "float64",
+        delimiter: Optional[str] = None,
+    ):
+        self.path = resolve_path(path)
+        self.format = detect_format(self.path)
+        self.column: Optional[Union[str, int]] = None
+        self.skipped = 0
+        self._dtype = dtype
+        self._delimiter = delimiter
+        self._requested_column = column
+
+        if self.format == "csv":
+            self._index, self._has_header, self._delimiter = self._inspect_csv()
+        else:
+            self._array = self._map_array()
+
+    def __repr__(self) -> str:
+        return f"FileDataset({str(self.path)!r}, format={self.format!r}, column={self.column!r})"
+
+    def _map_array(self) -> np.ndarray:
+        """Memory-maps a .npy or raw file as a 1-D array of the selected values."""
+        if self.format == "npy":
+            try:
+                array = np.load(self.path, mmap_mode="r", allow_pickle=False)
+            except ValueError as e:
+                raise ValueError(f"Arquivo .npy inválido: {e}") from None
+            if array.dtype.kind not in "fiub":
+                raise ValueError(f"O arquivo .npy deve conter números, não {array.dtype}")
+        else:
+            dtype = RAW_DTYPES.get(self._dtype)
+            if dtype is None:
+                raise ValueError(f"Tipo inválido para arquivo binário: '{self._dtype}'. Use {', '.join(RAW_DTYPES)}")
+            size = self.path.stat().st_size
+            itemsize = dtype.itemsize
+            if size % itemsize:
+                raise ValueError(f"O tamanho do arquivo ({size} bytes) não é múltiplo de {itemsize} bytes ({self._dtype})")
+            if size == 0:
+                return np.empty(0, dtype=dtype)
+            array = np.memmap(self.path, dtype=dtype, mode="r")
+
+        if array.ndim == 1:
+            return array
+        if array.ndim != 2:
+            raise ValueError(f"O arquivo .npy deve ter 1 ou 2 dimensões, não {array.ndim}")
+
+        column = self._requested_column or "0"
+        if not column.isdigit() or int(column) >= array.shape[1]:
+            raise ValueError(f"Coluna inválida: '{column}'. O arquivo tem {array.shape[1]} colunas (0 a {array.shape[1] - 1})")
+        self.column = int(column)
+        return array[:, self.column]
+
+    def _inspect_csv(self) -> Tuple[int, bool, Optional[str]]:
+        """Finds the delimiter, the column index and whether there is a header."""
+        with open(self.path, encoding="utf-8", newline="") as file:
+            first_line = file.readline().rstrip("\r\n")
+
+        delimiter = self._delimiter
+        if delimiter is None:
+            delimiter = detect_delimiter(first_line)
+
+        fields = next(csv.reader([first_line], delimiter=delimiter or " ", skipinitialspace=True), [])
+        fields = [field.strip() for field in fields if delimiter or field.strip()]
+        column = self._requested_column
+
+        if column is None or column.isdigit():
+            index = int(column or 0)
+            if fields and index >= len(fields):
+                raise ValueError(f"Coluna inválida: '{column}'. O arquivo tem {len(fields)} colunas (0 a {len(fields) - 1})")
+            has_header = bool(fields) and bool(fields[index]) and not is_number(fields[index])
+            self.column = fields[index] if has_header else index
+        else:
+            if column not in fields:
+                raise ValueError(f"Coluna '{column}' não encontrada. Colunas disponíveis: {', '.join(fields)}")
+            index = fields.index(column)
+            has_header = True
+            self.column = column
+
+        return index, has_header, delimiter
+
+    def __len__(self) -> int:
+        """Number of values, known upfront only for binary formats."""
+        if self.format == "csv":
+            raise TypeError("The number of values in a CSV file is only known after reading it")
+        return len(self._array)
+
+    def chunks(self, start: int = 0, stop: Optional[int] = None) -> Iterator[np.ndarray]:
+        """
+        Yields the values as float64 arrays of bounded size.
+
+        Args:
+            start: First value to read (binary formats only)
+            stop: End of the values to read (binary formats only; default
+                  all of them)
+
+        Raises:
+            ValueError: If a CSV field is not a number, with its line
+        """
+        if self.format != "csv":
+            stop = len(self._array) if stop is None else stop
+            for begin in range(start, stop, CHUNK_VALUES):
+                yield np.asarray(self._array[begin:min(begin + CHUNK_VALUES, stop)], dtype=np.float64)
+            return
+
+        self.skipped = 0
+        with open(self.path, encoding="utf-8", newline="") as file:
+            line = 1
+            if self._has_header:
+                file.readline()
+                line = 2
+            pending = ""
+            while True:
+                block = file.read(CSV_BLOCK_SIZE)
+                text = pending + block
+                if block:
+                    cut = text.rfind("\n") + 1
+                    text, pending = text[:cut], text[cut:]
+                if text:
+                    values = self._parse_csv_block(text, line)
+                    line += text.count("\n")
+                    if len(values):
+                        yield values
+                if not block:
+                    break
+
+    def _parse_csv_block(self, text: str, first_line: int) -> np.ndarray:
+        """Parses the selected column of a block of whole CSV lines."""
+        try:
+            return np.loadtxt(
+                io.StringIO(text), dtype=np.float64, delimiter=self._delimiter,
+                usecols=self._index, comments=None, quotechar='"', ndmin=1,
+            )
+        except ValueError:
+            # Empty fields, ragged lines or invalid values: slow path that
+            # skips empty fields and reports the exact line of a bad value
+            pass
+
+        values: List[float] = []
+        rows = csv.reader(io.StringIO(text), delimiter=self._delimiter or " ", skipinitialspace=True)
+        for offset, row in enumerate(rows):
+            if self._delimiter is None:
+                row = [field for field in row if field]
+            if not row:
+                continue
+            field = row[self._index].strip() if self._index < len(row) else ""
+            if not field:
+                self.skipped += 1
+                continue
+            try:
+                values.append(float(field))
+            except ValueError:
+                shown = field if len(field) <= 30 else field[:30] + "..."
+                raise ValueError(f"Valor inválido na linha {first_line + offset}: '{shown}'") from None
+        return np.array(values, dtype=np.float64)
+
+
+class _MappedColumn:
+    """Picklable reference to a binary file column, memory-mapped by each worker."""
+
+    def __init__(self, dataset: FileDataset):
+        self.path = str(dataset.path)
+        self.column = None if dataset.column is None else str(dataset.column)
+        self.dtype = dataset._dtype
+
+    def chunks(self, start: int, stop: int) -> Iterator[np.ndarray]:
+        return FileDataset(self.path, column=self.column, dtype=self.dtype).chunks(start, stop)
+
+
+def summarize_file(
+    path: str,
+    column: Optional[str] = None,
+    dtype: str = "float64",
+    delimiter: Optional[str] = None,
+    error_bound: float = 0.01,
+    exact_limit: int = FILE_EXACT_LIMIT,
+) -> Dict[str, Any]:
+    """
+    Computes the statistics_analyzer measures of a numeric column in a file.
+
+    Binary files with more than exact_limit values are split across the
+    statistics pool, if one is installed (see enable_parallel_statistics)
+    and the file is large enough; each worker memory-maps its part.
+
+    Args:
+        path: The file (resolved against the data directory, if set)
+        column: CSV column name or index, or .npy column index (default
+                the first column)
+        dtype: Element type of raw binary files, "float64" or "float32"
+        delimiter: CSV delimiter (default: detected from the first line)
+        error_bound: Rank error of the quartiles for files with more than
+                     exact_limit values
+        exact_limit: Largest number of values summarized exactly
+
+    Returns:
+        The result of StreamingStatistics.result(), plus "arquivo",
+        "formato", "erro_rank" and, where it applies, "coluna" and
+        "vazios_ignorados"
+
+    Raises:
+        ValueError: If the file cannot be read or holds no numbers
+    """
+    dataset = FileDataset(path, column=column, dtype=dtype, delimiter=delimiter)
+    k = QuantileSketch.for_error(error_bound).k
+    pool = get_statistics_pool()
+    if (
+        pool is not None and dataset.format != "csv"
+        and len(dataset) > exact_limit and pool.should_parallelize(len(dataset))
+    ):
+        accumulator = pool.summarize_source(_MappedColumn(dataset), len(dataset), k=k)
+    else:
+        accumulator = StreamingStatistics(k=k, exact_limit=exact_limit)
+        for chunk in dataset.chunks():
+            accumulator.update(chunk)
+
+    result = accumulator.result()
+    if accumulator.count > 1:
+        result["erro_rank"] = 0.0 if accumulator.exact else round(accumulator.sketch.rank_error, 4)
+    result["arquivo"] = str(dataset.path)
+    result["formato"] = dataset.format
+    if dataset.column is not None:
+        result["coluna"] = dataset.column
+    if dataset.skipped:
+        result["vazios_ignorados"] = dataset.skipped
+    return result
+
+
+@tool
+def file_statistics(
+    path: str,
+    column: Optional[str] = None,
+    dtype: str = "float64",
+    error_bound: float = 0.01,
+) -> str:
+    """
+    Calculates the statistics of statistics_analyzer for a dataset stored in a local file.
+
+    Use this instead of statistics_analyzer when the data is in a file, so
+    the numbers never need to be written out. Files are read in chunks or
+    memory-mapped, so files with hundreds of millions of values work.
+
+    Supported files:
+    - CSV/TSV/TXT: one column of numbers, selected by header name or index
+    - .npy: 1-D array, or a column of a 2-D array
+    - .bin/.raw/.dat/.f64/.f32: raw little-endian floats (dtype float64
+      or float32)
+
+    Files with up to 10 million values are summarized exactly; for larger
+    files median and quartiles are estimated, listed in "aproximados", with
+    the rank error bound in "erro_rank".
+
+    Args:
+        path: Path of the file, relative to the data directory
+        column: CSV column name or index, or .npy column index
+                (default: the first column)
+        dtype: Element type of raw binary files: 'float64' or 'float32'
+        error_bound: Maximum rank error of estimated quartiles, between
+                     0.001 and 0.1
+
+    Returns:
+        A JSON-formatted string with the same measures as
+        statistics_analyzer, plus the file, its format and the column.
+
+    Examples:
+        >>> file_statistics("vendas.csv", column="valor")
+        {"contagem": 1250000, "media": 153.27, ..., "aproximados": [], "erro_rank": 0.0,
+         "arquivo": "/dados/vendas.csv", "formato": "csv", "coluna": "valor"}
+    """
+    try:
+        if not path or not path.strip():
+            return json.dumps({"erro": "Caminho de arquivo vazio fornecido."}, indent=2, ensure_ascii=False)
+
+        if not MIN_ERROR_BOUND <= error_bound <= MAX_ERROR_BOUND:
+            return json.dumps({
+                "erro": f"error_bound deve estar entre {MIN_ERROR_BOUND} e {MAX_ERROR_BOUND}."
+            }, indent=2, ensure_ascii=False)
+
+        result = summarize_file(path.strip(), column=column, dtype=dtype, error_bound=error_bound)
+        return json.dumps(result, indent=2, ensure_ascii=False)
+
+    except ValueError as e:
+        return json.dumps({"erro": str(e)}, indent=2, ensure_ascii=False)
+    except Exception as e:
+        return json.dumps({
+            "erro": f"Ocorreu um erro inesperado: {str(e)}"
+        }, indent=2, ensure_ascii=False)
@@ -0,0 +1,476 @@
+"""
+Grouped (group-by) statistics over key/value pairs.
+
+The keys are factorized once into integer codes, in order of first
+appearance. Counts, sums and squared deviations are then accumulated per
+code with np.bincount, and order statistics are read from a single sort
+of the values by (code, value), so the work is vectorized no matter how
+many groups there are.
+"""
+import csv
+import io
+import json
+import math
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.tools import tool
+
+from src.tools.file_statistics import CSV_BLOCK_SIZE, detect_delimiter, detect_format, is_number, resolve_path
+from src.tools.rolling import quantile_key
+
+
+# Result key of each per-group measure, in output order
+GROUP_MEASURES = ["contagem", "soma", "media", "desvio_padrao", "variancia", "minimo", "q1", "mediana", "q3", "maximo"]
+
+DEFAULT_GROUP_MEASURES = ["contagem", "media", "desvio_padrao", "minimo", "mediana", "maximo"]
+
+# Measures read from the sorted values, with the quantile each one is
+ORDER_MEASURES = {"minimo": 0.0, "q1": 0.25, "mediana": 0.5, "q3": 0.75, "maximo": 1.0}
+
+# Rows reported when no top is given; the remaining groups are only counted
+MAX_ROWS = 100
+
+# A key and its value: the value is the last field, after a comma, colon,
+# equals sign or whitespace
+_PAIR = re.compile(r"^\s*(.+?)\s*[,:=\t ]\s*([^\s,:=]+)\s*$")
+
+
+def factorize(keys: Sequence[str]) -> Tuple[np.ndarray, List[str]]:
+    """
+    Maps each key to an integer code, in order of first appearance.
+
+    Returns:
+        (codes, labels): an int64 array with one code per key, and the
+        key of each code
+    """
+    index: Dict[str, int] = {}
+    codes = np.fromiter((index.setdefault(key, len(index)) for key in keys), dtype=np.int64, count=len(keys))
+    return codes, list(index)
+
+
+def parse_pairs(text: str) -> Tuple[List[str], np.ndarray]:
+    """
+    Parses "key, value" pairs, one per line or separated by semicolons.
+
+    The value is the last field of each pair, so keys may contain spaces
+    ("GET /users, 120"). Key and value may be separated by a comma, colon,
+    equals sign, tab or space.
+
+    Returns:
+        (keys, values): the keys as strings and the values as float64
+
+    Raises:
+        ValueError: If a pair has no value or its value is not a number
+    """
+    keys: List[str] = []
+    values: List[float] = []
+    for number, pair in enumerate(re.split(r"[\n;]", text), start=1):
+        if not pair.strip():
+            continue
+        match = _PAIR.match(pair)
+        if match is None:
+            raise ValueError(f"Par inválido (número {number}): '{pair.strip()}'. Use 'chave, valor'")
+        key, value = match.groups()
+        try:
+            values.append(float(value))
+        except ValueError:
+            raise ValueError(f"Valor inválido no par {number}: '{value}'") from None
+        keys.append(key)
+    return keys, np.array(values, dtype=np.float64)
+
+
+def _find_column(fields: List[str], column: Optional[str], default: int, has_header: bool) -> int:
+    """Index of a CSV column given by name or index."""
+    if column is None:
+        index = default
+    elif column.isdigit():
+        index = int(column)
+    elif has_header and column in fields:
+        return fields.index(column)
+    else:
+        raise ValueError(f"Coluna '{column}' não encontrada. Colunas disponíveis: {', '.join(fields)}")
+    if index >= len(fields):
+        raise ValueError(f"Coluna inválida: '{column}'. O arquivo tem {len(fields)} colunas (0 a {len(fields) - 1})")
+    return index
+
+
+def read_keyed_csv(
+    path: str,
+    key_column: Optional[str] = None,
+    value_column: Optional[str] = None,
+    delimiter: Optional[str] = None,
+) -> Tuple[np.ndarray, List[str], np.ndarray, int]:
+    """
+    Reads a key column and a value column of a CSV file.
+
+    The file is read in blocks of whole lines, each parsed with one
+    np.loadtxt call like file_statistics, and the keys of each block are
+    factorized at once, so only one code per row is kept. Rows with
+    an empty value are skipped.
+
+    Args:
+        path: The file (resolved against the data directory, if set)
+        key_column: Name or index of the key column (default the first)
+        value_column: Name or index of the value column (default the second)
+        delimiter: CSV delimiter (default: detected from the first line)
+
+    Returns:
+        (codes, labels, values, skipped)
+
+    Raises:
+        ValueError: If the file or a column cannot be read, or a value is
+                    not a number
+    """
+    resolved = resolve_path(path)
+    if detect_format(resolved) != "csv":
+        raise ValueError("Estatísticas por grupo de arquivos exigem um arquivo CSV com colunas de chave e valor")
+
+    index: Dict[str, int] = {}
+    codes: List[np.ndarray] = []
+    values: List[np.ndarray] = []
+    skipped = 0
+    with open(resolved, encoding="utf-8", newline="") as file:
+        first_line = file.readline()
+        delimiter = delimiter or detect_delimiter(first_line) or " "
+        fields = [field.strip() for field in next(csv.reader([first_line], delimiter=delimiter, skipinitialspace=True), [])]
+
+        value_default = 1 if len(fields) > 1 else 0
+        if any(column is not None and not column.isdigit() for column in (key_column, value_column)):
+            # A column given by name needs a header
+            has_header = True
+        else:
+            probe = int(value_column) if value_column is not None else value_default
+            has_header = probe < len(fields) and bool(fields[probe]) and not is_number(fields[probe])
+        key_index = _find_column(fields, key_column, 0, has_header)
+        value_index = _find_column(fields, value_column, value_default, has_header)
+
+        file.seek(0)
+        line = 1
+        if has_header:
+            file.readline()
+            line = 2
+        pending = ""
+        while True:
+            block = file.read(CSV_BLOCK_SIZE)
+            text = pending + block
+            if block:
+                cut = text.rfind("\n") + 1
+                text, pending = text[:cut], text[cut:]
+            if text:
+                keys, block_values, block_skipped = _parse_keyed_block(text, line, delimiter, key_index, value_index)
+                line += text.count("\n")
+                skipped += block_skipped
+                if len(keys):
+                    codes.append(_factorize_block(keys, index))
+                    values.append(block_values)
+            if not block:
+                break
+
+    if not codes:
+        return np.array([], dtype=np.int64), list(index), np.array([], dtype=np.float64), skipped
+    return np.concatenate(codes), list(index), np.concatenate(values), skipped
+
+
+def _parse_keyed_block(
+    text: str, first_line: int, delimiter: str, key_index: int, value_index: int,
+) -> Tuple[List[str], np.ndarray, int]:
+    """
+    Parses the key and value columns of a block of whole CSV lines.
+
+    Returns:
+        (keys, values, skipped): the stripped keys, the values as float64
+        and the number of rows skipped for an empty value
+    """
+    try:
+        fields = np.loadtxt(
+            io.StringIO(text), dtype=[("key", object), ("value", np.float64)],
+            delimiter=None if delimiter == " " else delimiter,
+            usecols=(key_index, value_index), comments=None, quotechar='"', ndmin=1,
+        )
+        keys = [key.strip() for key in fields["key"].tolist()]
+        # A quote left in a key was not a whole quoted field; csv reads it
+        if not any('"' in key for key in set(keys)):
+            return keys, fields["value"], 0
+    except ValueError:
+        # Empty fields, ragged lines or invalid values: slow path that
+        # skips empty values and reports the exact line of a bad value
+        pass
+
+    keys: List[str] = []
+    values: List[float] = []
+    skipped = 0
+    rows = csv.reader(io.StringIO(text), delimiter=delimiter, skipinitialspace=True)
+    for line, row in enumerate(rows, start=first_line):
+        if not row:
+            continue
+        if len(row) <= max(key_index, value_index):
+            raise ValueError(f"A linha {line} tem {len(row)} colunas")
+        field = row[value_index].strip()
+        if not field:
+            skipped += 1
+            continue
+        try:
+            values.append(float(field))
+        except ValueError:
+            shown = field if len(field) <= 30 else field[:30] + "..."
+            raise ValueError(f"Valor inválido na linha {line}: '{shown}'") from None
+        keys.append(row[key_index].strip())
+    return keys, np.array(values, dtype=np.float64), skipped
+
+
+def _factorize_block(keys: List[str], index: Dict[str, int]) -> np.ndarray:
+    """
+    Codes of a block of keys, continuing the order of first appearance
+    kept in index, which maps each key seen so far to its code.
+    """
+    codes, labels = factorize(keys)
+    label_codes = np.array([index.setdefault(label, len(index)) for label in labels], dtype=np.int64)
+    return label_codes[codes]
+
+
+def group_statistics(
+    codes: np.ndarray,
+    values: np.ndarray,
+    groups: int,
+    measures: Sequence[str],
+    quantiles: Sequence[float] = (),
+) -> Dict[str, np.ndarray]:
+    """
+    Computes per-group measures without a Python loop over the groups.
+
+    Counts, sums and squared deviations are accumulated with np.bincount;
+    minimum, quartiles, median, maximum and extra quantiles all come from
+    one ordering of the values by (code, value), interpolated as
+    np.quantile.
+    Groups holding a NaN have NaN measures, except the count.
+
+    Args:
+        codes: Group code of each value, from 0 to groups - 1
+        values: Float64 values
+        groups: Number of groups
+        measures: Keys of GROUP_MEASURES
+        quantiles: Extra quantiles between 0 and 1, reported as quantile_key
+
+    Returns:
+        Dictionary from result key to an array with one value per group
+    """
+    counts = np.bincount(codes, minlength=groups)
+    nan = np.isnan(values)
+    has_nan = np.bincount(codes, weights=nan, minlength=groups) > 0 if nan.any() else None
+    clean = np.where(nan, 0.0, values) if has_nan is not None else values
+
+    result: Dict[str, np.ndarray] = {}
+    if "contagem" in measures:
+        result["contagem"] = counts
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sums = np.bincount(codes, weights=clean, minlength=groups)
+        means = sums / counts
+        if "soma" in measures:
+            result["soma"] = sums
+        if "media" in measures:
+            result["media"] = means
+        if "variancia" in measures or "desvio_padrao" in measures:
+            deviations = clean - means[codes]
+            squares = np.bincount(codes, weights=deviations * deviations, minlength=groups)
+            variances = np.where(counts > 1, squares / (counts - 1), np.nan)
+            if "variancia" in measures:
+                result["variancia"] = variances
+            if "desvio_padrao" in measures:
+                result["desvio_padrao"] = np.sqrt(variances)
+
+    order_keys = [key for key in ORDER_MEASURES if key in measures]
+    fractions = [ORDER_MEASURES[key] for key in order_keys] + list(quantiles)
+    if fractions:
+        # Sorting by value and then, stably, by code is much faster than
+        # np.lexsort; the codes are narrowed so the stable sort can use
+        # radix sort when there are few groups
+        by_value = np.argsort(values)
+        narrow = codes[by_value].astype(np.min_scalar_type(max(groups - 1, 0)))
+        sorted_values = values[by_value[np.argsort(narrow, kind="stable")]]
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        last = np.maximum(counts - 1, 0)
+        keys = order_keys + [quantile_key(fraction) for fraction in quantiles]
+        for key, fraction in zip(keys, fractions):
+            # Linear interpolation with the same operations as np.quantile
+            position = last * fraction
+            below = np.floor(position).astype(np.int64)
+            gamma = position - below
+            lower = sorted_values[starts + below]
+            upper = sorted_values[starts + np.minimum(below + 1, last)]
+            difference = upper - lower
+            result[key] = np.where(gamma >= 0.5, upper - difference * (1 - gamma), lower + difference * gamma)
+
+    if has_nan is not None:
+        for key, series in result.items():
+            if key != "contagem":
+                series[has_nan] = np.nan
+
+    ordered = [key for key in GROUP_MEASURES if key in result]
+    ordered += [key for key in result if key not in ordered]
+    return {key: result[key] for key in ordered}
+
+
+def _cell(value: Any) -> Any:
+    """A table cell: counts as int, NaN as null, other numbers rounded."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    value = float(value)
+    return None if math.isnan(value) else round(value, 3)
+
+
+def build_table(
+    labels: List[str],
+    measures: Dict[str, np.ndarray],
+    top: Optional[int] = None,
+    sort_by: Optional[str] = None,
+    ascending: bool = False,
+) -> Dict[str, Any]:
+    """
+    Lays the per-group measures out as one table.
+
+    Args:
+        labels: Key of each group
+        measures: Per-group measures, as group_statistics returns them
+        top: Report only this many groups, after sorting
+        sort_by: Measure to sort the groups by (default: first appearance,
+                 or "contagem" with top)
+        ascending: Sort from the smallest value
+
+    Returns:
+        Dictionary with "grupos" (number of groups), "colunas", "linhas"
+        and, when rows were left out, "grupos_omitidos"
+    """
+    if sort_by is None and top is not None:
+        sort_by = "contagem" if "contagem" in measures else next(iter(measures))
+
+    order = np.arange(len(labels))
+    if sort_by is not None:
+        keys = np.asarray(measures[sort_by], dtype=np.float64)
+        # NaN goes last in both directions; the stable sort keeps ties in
+        # order of first appearance
+        keys = np.where(np.isnan(keys), np.inf, keys if ascending else -keys)
+        order = np.argsort(keys, kind="stable")
+
+    shown = order[:MAX_ROWS if top is None else top]
+    columns = list(measures)
+    table: Dict[str, Any] = {
+        "grupos": len(labels),
+        "colunas": ["grupo"] + columns,
+        "linhas": [[labels[group]] + [_cell(measures[key][group]) for key in columns] for group in shown.tolist()],
+    }
+    if sort_by is not None:
+        table["ordenado_por"] = sort_by + (" (crescente)" if ascending else " (decrescente)")
+    if len(shown) < len(labels):
+        table["grupos_omitidos"] = len(labels) - len(shown)
+    return table
+
+
+@tool
+def grouped_statistics(
+    data: str = "",
+    path: Optional[str] = None,
+    key_column: Optional[str] = None,
+    value_column: Optional[str] = None,
+    measures: Optional[List[str]] = None,
+    quantiles: Optional[List[float]] = None,
+    top: Optional[int] = None,
+    sort_by: Optional[str] = None,
+    ascending: bool = False,
+) -> str:
+    """
+    Calculates statistics per group (group-by) of key/value data, in one call.
+
+    Use it for per-category summaries, e.g. latency by endpoint or sales
+    by region, instead of calling statistics_analyzer once per group. The
+    data is given inline as "key, value" pairs, or as a key column and a
+    value column of a CSV file in the data directory.
+
+    Available measures: "contagem", "soma", "media", "desvio_padrao",
+    "variancia", "minimo", "q1", "mediana", "q3", "maximo" (default:
+    contagem, media, desvio_padrao, minimo, mediana, maximo). Extra
+    quantiles are reported as "p<percent>", e.g. 0.95 as "p95".
+
+    The result is one table: "colunas" names the columns and each row of
+    "linhas" is a group. With top, only the top groups by sort_by
+    (default "contagem") are listed; at most 100 groups are listed
+    otherwise.
+
+    Args:
+        data: Pairs "key, value", one per line or separated by ';',
+              e.g. "api, 120\\napi, 80\\nweb, 35"
+        path: CSV file to read instead of data
+        key_column: Name or index of the key column (default the first)
+        value_column: Name or index of the value column (default the second)
+        measures: Measures to compute per group
+        quantiles: Extra quantiles between 0 and 1, e.g. [0.95, 0.99]
+        top: List only this many groups
+        sort_by: Measure to sort the groups by
+        ascending: Sort from the smallest value (default largest first)
+
+    Returns:
+        A JSON-formatted string with the table.
+
+    Examples:
+        >>> grouped_statistics("api, 120; api, 80; web, 35", measures=["contagem", "media"])
+        {
+          "grupos": 2,
+          "colunas": ["grupo", "contagem", "media"],
+          "linhas": [["api", 2, 100.0], ["web", 1, 35.0]]
+        }
+    """
+    try:
+        measures = [name.strip().lower() for name in (measures or DEFAULT_GROUP_MEASURES)]
+        unknown = [name for name in measures if name not in GROUP_MEASURES]
+        if unknown:
+            return json.dumps({
+                "erro": f"Medida desconhecida: {', '.join(unknown)}. Medidas disponíveis: {', '.join(GROUP_MEASURES)}."
+            }, indent=2, ensure_ascii=False)
+
+        quantiles = [float(fraction) for fraction in (quantiles or [])]
+        if any(not 0 <= fraction <= 1 for fraction in quantiles):
+            return json.dumps({"erro": "Os quantis devem estar entre 0 e 1."}, indent=2, ensure_ascii=False)
+
+        if top is not None and top < 1:
+            return json.dumps({"erro": "top deve ser pelo menos 1."}, indent=2, ensure_ascii=False)
+
+        available = measures + [quantile_key(fraction) for fraction in quantiles]
+        if sort_by is not None:
+            sort_by = sort_by.strip().lower()
+            if sort_by not in available:
+                return json.dumps({
+                    "erro": f"sort_by deve ser uma das medidas calculadas: {', '.join(available)}."
+                }, indent=2, ensure_ascii=False)
+
+        skipped = 0
+        if path and path.strip():
+            try:
+                codes, labels, values, skipped = read_keyed_csv(path.strip(), key_column, value_column)
+            except (ValueError, OSError, UnicodeDecodeError) as e:
+                return json.dumps({"erro": str(e)}, indent=2, ensure_ascii=False)
+        elif data and data.strip():
+            try:
+                keys, values = parse_pairs(data)
+            except ValueError as e:
+                return json.dumps({"erro": str(e)}, indent=2, ensure_ascii=False)
+            codes, labels = factorize(keys)
+        else:
+            return json.dumps({
+                "erro": "Forneça os pares 'chave, valor' em data ou um arquivo CSV em path."
+            }, indent=2, ensure_ascii=False)
+
+        if len(values) == 0:
+            return json.dumps({"erro": "Nenhum valor válido encontrado na entrada."}, indent=2, ensure_ascii=False)
+
+        per_group = group_statistics(codes, values, len(labels), measures, quantiles)
+        result = build_table(labels, per_group, top=top, sort_by=sort_by, ascending=ascending)
+        if skipped:
+            result["vazios_ignorados"] = skipped
+        return json.dumps(result, indent=2, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "erro": f"Ocorreu um erro inesperado: {str(e)}"
+        }, indent=2, ensure_ascii=False)
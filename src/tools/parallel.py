@@ -0,0 +1,217 @@
+"""
+Parallel statistics for very large datasets, across a pool of processes.
+
+The values are split into contiguous parts; each worker process feeds its
+part to a StreamingStatistics accumulator (running moments, frequency
+table and quantile sketch) and returns it, and the partial accumulators
+are merged in order. In-memory arrays are handed to the workers through
+shared memory and files are memory-mapped by each worker, so the values
+themselves are never pickled.
+
+Small datasets are not worth the round trip to the workers: callers check
+should_parallelize() and keep the serial path below min_values. Once
+installed, the pool is used by file_statistics for large binary files and
+by statistics_analyzer, in approximate mode, for large datasets.
+"""
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.tools.statistics import get_statistics_pool, set_statistics_pool
+from src.tools.streaming import StreamingStatistics
+
+
+# Datasets smaller than this are summarized serially by default
+PARALLEL_MIN_VALUES = 1 << 21
+
+# Values a worker reads and adds to its accumulator at a time
+PART_CHUNK_VALUES = 1 << 20
+
+
+class SharedArray:
+    """
+    A copy of a float64 array in shared memory, readable by worker processes.
+
+    Only the name of the memory block is pickled; workers attach to it and
+    read slices. The creator must call close() (or use it as a context
+    manager) to free the block.
+    """
+
+    def __init__(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self.length = len(values)
+        self._memory = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        self.name = self._memory.name
+        np.ndarray(self.length, dtype=np.float64, buffer=self._memory.buf)[:] = values
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getstate__(self) -> dict:
+        return {"name": self.name, "length": self.length, "_memory": None}
+
+    def chunks(self, start: int, stop: int, size: int = PART_CHUNK_VALUES) -> Iterator[np.ndarray]:
+        """Yields copies of the values in [start, stop), size at a time."""
+        memory = shared_memory.SharedMemory(name=self.name)
+        try:
+            view = np.ndarray(self.length, dtype=np.float64, buffer=memory.buf)
+            for begin in range(start, stop, size):
+                yield view[begin:min(begin + size, stop)].copy()
+        finally:
+            # The view must be gone before the block can be closed
+            view = None
+            memory.close()
+
+    def close(self) -> None:
+        """Frees the shared memory block; only the creator may call it."""
+        if self._memory is not None:
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+
+    def __enter__(self) -> "SharedArray":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _summarize_part(source: Any, start: int, stop: int, k: int, max_distinct: int, seed: Optional[int]) -> StreamingStatistics:
+    """Worker task: accumulates the values of source in [start, stop)."""
+    accumulator = StreamingStatistics(k=k, exact_limit=0, max_distinct=max_distinct, seed=seed)
+    for chunk in source.chunks(start, stop):
+        accumulator.update(chunk)
+    return accumulator
+
+
+def split_ranges(length: int, parts: int) -> List[Tuple[int, int]]:
+    """Splits range(length) into at most parts contiguous, non-empty ranges."""
+    bounds = np.linspace(0, length, min(parts, length) + 1).astype(np.int64).tolist()
+    return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if stop > start]
+
+
+class StatisticsPool:
+    """
+    Pool of worker processes that summarize parts of a dataset in parallel.
+
+    Install it with enable_parallel_statistics() so the statistics tools
+    use it for large datasets.
+
+    Attributes:
+        workers: Number of worker processes
+        min_values: Smallest dataset summarized in parallel
+        parts_per_worker: Parts each worker gets, so a slow part does not
+                          leave the other workers idle
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        min_values: int = PARALLEL_MIN_VALUES,
+        parts_per_worker: int = 4,
+        start_method: str = "spawn",
+    ):
+        workers = workers or os.cpu_count() or 1
+        if workers < 1 or parts_per_worker < 1:
+            raise ValueError("A statistics pool needs at least one worker and one part per worker")
+        self.workers = workers
+        self.min_values = min_values
+        self.parts_per_worker = parts_per_worker
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(start_method),
+        )
+
+    def __repr__(self) -> str:
+        return f"StatisticsPool(workers={self.workers}, min_values={self.min_values})"
+
+    def should_parallelize(self, count: int) -> bool:
+        """Whether a dataset of count values is worth splitting across the workers."""
+        return self.workers > 1 and count >= self.min_values
+
+    def summarize_source(
+        self,
+        source: Any,
+        length: int,
+        k: int = 200,
+        max_distinct: int = 10_000,
+        seed: Optional[int] = 0,
+    ) -> StreamingStatistics:
+        """
+        Summarizes a dataset that the workers read themselves.
+
+        Args:
+            source: Picklable object whose chunks(start, stop) method
+                    yields the float64 values in [start, stop), e.g. a
+                    SharedArray
+            length: Number of values in source
+            k: Size of the quantile sketches
+            max_distinct: Largest frequency table kept for the mode
+            seed: Seed of the first part's sketch; part i uses seed + i
+
+        Returns:
+            The merged accumulator, with approximate quartiles
+        """
+        ranges = split_ranges(length, self.workers * self.parts_per_worker)
+        futures = [
+            self._executor.submit(
+                _summarize_part, source, start, stop, k, max_distinct,
+                None if seed is None else seed + index,
+            )
+            for index, (start, stop) in enumerate(ranges)
+        ]
+
+        result = StreamingStatistics(k=k, exact_limit=0, max_distinct=max_distinct, seed=seed)
+        for future in futures:
+            result.merge(future.result())
+        return result
+
+    def summarize_array(self, values: np.ndarray, k: int = 200, max_distinct: int = 10_000, seed: Optional[int] = 0) -> StreamingStatistics:
+        """
+        Summarizes an in-memory array, shared with the workers through
+        shared memory. See summarize_source for the arguments.
+        """
+        with SharedArray(values) as shared:
+            return self.summarize_source(shared, len(shared), k=k, max_distinct=max_distinct, seed=seed)
+
+    def close(self) -> None:
+        """Stops the worker processes."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "StatisticsPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def enable_parallel_statistics(**options: Any) -> StatisticsPool:
+    """
+    Starts a StatisticsPool and installs it for the statistics tools.
+
+    Args:
+        **options: Keyword arguments for StatisticsPool
+
+    Returns:
+        The installed pool
+    """
+    disable_parallel_statistics()
+    pool = StatisticsPool(**options)
+    set_statistics_pool(pool)
+    return pool
+
+
+def disable_parallel_statistics() -> None:
+    """Removes the installed statistics pool, if any, and stops its workers."""
+    pool = get_statistics_pool()
+    if isinstance(pool, StatisticsPool):
+        set_statistics_pool(None)
+        pool.close()
+
+
+atexit.register(disable_parallel_statistics)
@@ -0,0 +1,373 @@
+"""
+Recurring dates: daily, weekly, monthly and yearly rules with an interval
+and by-weekday / by-month-day constraints, a subset of iCalendar RRULE.
+
+Occurrences are produced lazily, one period (day, week, month or year) at a
+time, so a rule can be counted or cut at any date without building the whole
+series; the tool keeps only the first and last dates it shows.
+"""
+import calendar
+import json
+import re
+from collections import deque
+from datetime import date, timedelta
+from itertools import islice
+from typing import Iterator, List, Optional, Set, Tuple
+
+from langchain_core.tools import tool
+
+from src.tools.date_calculator import validate_date_format
+
+
+FREQUENCIES = ["daily", "weekly", "monthly", "yearly"]
+
+# iCalendar weekday codes, indexed by weekday (Monday is 0)
+WEEKDAY_CODES = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+# Most occurrences one tool call may enumerate
+MAX_OCCURRENCES = 100_000
+
+# Dates listed in the output before it is summarized
+DEFAULT_MAX_DATES = 50
+
+# Largest max_dates a tool call may ask for, since every listed date goes
+# into the agent's context
+MAX_LISTED_DATES = 1_000
+
+_WEEKDAY = re.compile(r"^([+-]?\d{1,2})?(MO|TU|WE|TH|FR|SA|SU)$", re.IGNORECASE)
+
+
+def parse_weekday(code: str) -> Tuple[int, int]:
+    """
+    Parses a weekday code such as 'TU', '2TU' (second Tuesday) or '-1FR'
+    (last Friday).
+
+    Returns:
+        (nth, weekday): nth is 0 for every such weekday; weekday is 0 for Monday
+
+    Raises:
+        ValueError: If the code is invalid
+    """
+    match = _WEEKDAY.match(code.strip())
+    if not match or match.group(1) in ("0", "+0", "-0", "00"):
+        raise ValueError(
+            f"Dia da semana inválido: '{code}'. Use {', '.join(WEEKDAY_CODES)}, "
+            "opcionalmente precedido da ordem (ex.: '2TU' para a segunda terça, '-1FR' para a última sexta)"
+        )
+    return int(match.group(1) or 0), WEEKDAY_CODES.index(match.group(2).upper())
+
+
+def _resolve_month_day(day: int, days_in_month: int) -> Optional[int]:
+    """Day of the month for a positive or negative (from the end) month day, if it exists."""
+    resolved = day if day > 0 else days_in_month + day + 1
+    return resolved if 1 <= resolved <= days_in_month else None
+
+
+def _nth(dates: List[date], nth: int) -> List[date]:
+    """The nth date of the list (negative counts from the end), or none."""
+    if nth == 0:
+        return dates
+    index = nth - 1 if nth > 0 else nth
+    return [dates[index]] if -len(dates) <= index < len(dates) else []
+
+
+class RecurrenceRule:
+    """
+    A recurrence rule: every interval days, weeks, months or years,
+    optionally restricted to some weekdays or days of the month.
+
+    Within each period the candidates are:
+    - daily: the day itself
+    - weekly: the by_weekday days of the week (Monday to Sunday), or the
+      weekday of the start date
+    - monthly: the by_month_day days and/or the by_weekday days of the
+      month, or the day of the month of the start date
+    - yearly: the same, over the whole year; without constraints, the
+      month and day of the start date
+
+    When both by_weekday and by_month_day are given, a date must match both.
+    by_weekday entries may carry an order ('2TU', '-1FR') in monthly and
+    yearly rules; by_month_day entries may be negative (-1 is the last day).
+    Dates that do not exist in a period (e.g. the 31st in April) are skipped.
+
+    Args:
+        frequency: 'daily', 'weekly', 'monthly' or 'yearly'
+        interval: Number of periods between occurrences
+        by_weekday: Weekday codes, e.g. ['MO', 'WE'] or ['2TU']
+        by_month_day: Days of the month, 1 to 31 or -31 to -1
+
+    Raises:
+        ValueError: If a parameter is invalid
+    """
+
+    def __init__(
+        self,
+        frequency: str,
+        interval: int = 1,
+        by_weekday: Optional[List[str]] = None,
+        by_month_day: Optional[List[int]] = None,
+    ):
+        self.frequency = frequency.lower().strip()
+        if self.frequency not in FREQUENCIES:
+            raise ValueError(f"Frequência inválida '{frequency}'. Frequências suportadas são: {', '.join(FREQUENCIES)}")
+        if isinstance(interval, bool) or not isinstance(interval, int) or interval < 1:
+            raise ValueError("O intervalo deve ser um inteiro maior ou igual a 1.")
+        self.interval = interval
+
+        self.weekdays = [parse_weekday(code) for code in by_weekday or []]
+        self._weekday_set = {weekday for _, weekday in self.weekdays}
+        limit = {"monthly": 5, "yearly": 53}.get(self.frequency, 0)
+        for (nth, _), code in zip(self.weekdays, by_weekday or []):
+            if abs(nth) > limit:
+                if limit == 0:
+                    raise ValueError(f"A ordem em '{code}' só é permitida nas frequências monthly e yearly.")
+                raise ValueError(f"A ordem em '{code}' deve estar entre -{limit} e {limit} na frequência {self.frequency}.")
+
+        self.month_days = list(by_month_day or [])
+        for day in self.month_days:
+            if isinstance(day, bool) or not isinstance(day, int) or day == 0 or abs(day) > 31:
+                raise ValueError(f"Dia do mês inválido: {day}. Use 1 a 31, ou -1 a -31 contando do fim do mês.")
+
+    def occurrences(self, start: date, until: Optional[date] = None) -> Iterator[date]:
+        """
+        Lazily yields the dates of the rule, in order.
+
+        Args:
+            start: First date of the series; earlier candidates are skipped
+            until: Last date allowed, if any (the series otherwise ends in 9999)
+        """
+        for candidates in self._periods(start):
+            for day in candidates:
+                if until is not None and day > until:
+                    return
+                if day >= start:
+                    yield day
+
+    def _periods(self, start: date) -> Iterator[List[date]]:
+        """Candidate dates of each period, in order, until year 9999."""
+        if self.frequency == "daily":
+            step = timedelta(days=self.interval)
+            day = start
+            while True:
+                if self._matches(day):
+                    yield [day]
+                try:
+                    day += step
+                except OverflowError:
+                    return
+
+        elif self.frequency == "weekly":
+            weekdays = sorted(self._weekday_set) or [start.weekday()]
+            monday = start - timedelta(days=start.weekday())
+            step = timedelta(weeks=self.interval)
+            while True:
+                week = []
+                for weekday in weekdays:
+                    try:
+                        day = monday + timedelta(days=weekday)
+                    except OverflowError:
+                        break
+                    if self._matches_month_day(day):
+                        week.append(day)
+                yield week
+                try:
+                    monday += step
+                except OverflowError:
+                    return
+
+        elif self.frequency == "monthly":
+            index = start.year * 12 + start.month - 1
+            while index < 10000 * 12:
+                yield self._month_candidates(index // 12, index % 12 + 1, start)
+                index += self.interval
+
+        else:
+            for year in range(start.year, 10000, self.interval):
+                yield self._year_candidates(year, start)
+
+    def _matches(self, day: date) -> bool:
+        """Whether a day of a daily rule passes the weekday and month-day filters."""
+        if self.weekdays and day.weekday() not in self._weekday_set:
+            return False
+        return self._matches_month_day(day)
+
+    def _matches_month_day(self, day: date) -> bool:
+        if not self.month_days:
+            return True
+        days_in_month = calendar.monthrange(day.year, day.month)[1]
+        return day.day in {_resolve_month_day(month_day, days_in_month) for month_day in self.month_days}
+
+    def _month_days(self, year: int, month: int) -> Set[int]:
+        """The by_month_day days that exist in the month."""
+        days_in_month = calendar.monthrange(year, month)[1]
+        resolved = {_resolve_month_day(day, days_in_month) for day in self.month_days}
+        resolved.discard(None)
+        return resolved
+
+    def _month_candidates(self, year: int, month: int, start: date) -> List[date]:
+        first_weekday, days_in_month = calendar.monthrange(year, month)
+        days = None
+        if self.month_days:
+            days = self._month_days(year, month)
+        if self.weekdays:
+            matching = set()
+            for nth, weekday in self.weekdays:
+                first = 1 + (weekday - first_weekday) % 7
+                all_days = [date(year, month, day) for day in range(first, days_in_month + 1, 7)]
+                matching.update(day.day for day in _nth(all_days, nth))
+            days = matching if days is None else days & matching
+        if days is None:
+            days = {start.day} if start.day <= days_in_month else set()
+        return [date(year, month, day) for day in sorted(days)]
+
+    def _year_candidates(self, year: int, start: date) -> List[date]:
+        dates = None
+        if self.month_days:
+            dates = {date(year, month, day) for month in range(1, 13) for day in self._month_days(year, month)}
+        if self.weekdays:
+            first_day, last_day = date(year, 1, 1).toordinal(), date(year, 12, 31).toordinal()
+            matching = set()
+            for nth, weekday in self.weekdays:
+                first = first_day + (weekday - date(year, 1, 1).weekday()) % 7
+                all_days = [date.fromordinal(ordinal) for ordinal in range(first, last_day + 1, 7)]
+                matching.update(_nth(all_days, nth))
+            dates = matching if dates is None else dates & matching
+        if dates is None:
+            if start.month == 2 and start.day == 29 and not calendar.isleap(year):
+                return []
+            return [date(year, start.month, start.day)]
+        return sorted(dates)
+
+    def describe(self) -> str:
+        """Short description of the rule, e.g. 'monthly a cada 1; by_weekday 2TU'."""
+        parts = [f"{self.frequency} a cada {self.interval}"]
+        if self.weekdays:
+            parts.append("by_weekday " + ",".join(
+                f"{nth if nth else ''}{WEEKDAY_CODES[weekday]}" for nth, weekday in self.weekdays
+            ))
+        if self.month_days:
+            parts.append("by_month_day " + ",".join(str(day) for day in self.month_days))
+        return "; ".join(parts)
+
+
+def summarize_occurrences(occurrences: Iterator[date], max_dates: int) -> dict:
+    """
+    Counts a series of dates keeping only the ones to show.
+
+    Up to max_dates dates are listed; longer series show the first half and
+    the last half of max_dates, so memory stays bounded however long the
+    series is.
+
+    Raises:
+        ValueError: If the series has more than MAX_OCCURRENCES dates
+    """
+    head: List[date] = []
+    tail: deque = deque(maxlen=max_dates // 2)
+    total = 0
+    last_day = None
+    for last_day in occurrences:
+        total += 1
+        if total > MAX_OCCURRENCES:
+            raise ValueError(
+                f"A série tem mais de {MAX_OCCURRENCES} datas; reduza o período (until) ou use count."
+            )
+        if len(head) < max_dates:
+            head.append(last_day)
+        else:
+            tail.append(last_day)
+
+    summary = {"total": total}
+    if total:
+        summary["primeira"] = head[0].isoformat()
+        summary["ultima"] = last_day.isoformat()
+    if total <= max_dates:
+        summary["datas"] = [day.isoformat() for day in head]
+        return summary
+
+    shown = head[:max_dates - max_dates // 2]
+    # The tail buffer only holds dates after the head, which may be fewer than needed
+    later = head[len(shown):] + list(tail)
+    last = later[len(later) - max_dates // 2:]
+    summary["datas"] = [day.isoformat() for day in shown]
+    summary["ultimas_datas"] = [day.isoformat() for day in last]
+    summary["datas_omitidas"] = total - len(shown) - len(last)
+    return summary
+
+
+@tool
+def recurrence_dates(
+    start: str,
+    frequency: str,
+    interval: int = 1,
+    by_weekday: Optional[List[str]] = None,
+    by_month_day: Optional[List[int]] = None,
+    count: Optional[int] = None,
+    until: Optional[str] = None,
+    max_dates: int = DEFAULT_MAX_DATES,
+) -> str:
+    """
+    Lists recurring dates: every N days, weeks, months or years, optionally
+    on given weekdays or days of the month.
+
+    Use it for questions like "every second Tuesday of the month in 2025" or
+    "every 10 days from 2024-01-01 until 2026" instead of adding days one by
+    one.
+
+    Args:
+        start: First date of the series (YYYY-MM-DD); for monthly and yearly
+               rules without constraints, its day (and month) repeat
+        frequency: 'daily', 'weekly', 'monthly' or 'yearly'
+        interval: Number of periods between occurrences (default 1)
+        by_weekday: Weekdays as MO, TU, WE, TH, FR, SA, SU; in monthly and
+                    yearly rules they may carry an order, e.g. ['2TU'] for
+                    the second Tuesday or ['-1FR'] for the last Friday
+        by_month_day: Days of the month, e.g. [1, 15] or [-1] for the last day
+        count: Number of occurrences to generate
+        until: Last date allowed (YYYY-MM-DD, included)
+        max_dates: Dates listed in full; longer series list only the first
+                   and last ones (default 50, at most 1,000)
+
+    Returns:
+        A JSON-formatted string with the rule, the total number of dates, the
+        first and last dates and the dates themselves ("datas", plus
+        "ultimas_datas" and "datas_omitidas" when the series is summarized).
+
+    Examples:
+        >>> recurrence_dates("2025-01-01", "monthly", by_weekday=["2TU"], until="2025-12-31")
+        {"regra": "monthly a cada 1; by_weekday 2TU", "total": 12, "primeira": "2025-01-14", ...}
+    """
+    try:
+        if count is None and until is None:
+            return json.dumps({"erro": "Informe count ou until para limitar a série."}, indent=2, ensure_ascii=False)
+        if count is not None and (isinstance(count, bool) or not isinstance(count, int) or count < 1):
+            return json.dumps({"erro": "count deve ser um inteiro maior ou igual a 1."}, indent=2, ensure_ascii=False)
+        if count is not None and count > MAX_OCCURRENCES:
+            return json.dumps({"erro": f"count deve ser no máximo {MAX_OCCURRENCES}."}, indent=2, ensure_ascii=False)
+        if isinstance(max_dates, bool) or not isinstance(max_dates, int) or max_dates < 1:
+            return json.dumps({"erro": "max_dates deve ser um inteiro maior ou igual a 1."}, indent=2, ensure_ascii=False)
+        if max_dates > MAX_LISTED_DATES:
+            return json.dumps({"erro": f"max_dates deve ser no máximo {MAX_LISTED_DATES}."}, indent=2, ensure_ascii=False)
+
+        try:
+            start_date = validate_date_format(start.strip()).date()
+        except ValueError as e:
+            return json.dumps({"erro": f"Erro em start: {str(e)}"}, indent=2, ensure_ascii=False)
+        until_date = None
+        if until is not None:
+            try:
+                until_date = validate_date_format(until.strip()).date()
+            except ValueError as e:
+                return json.dumps({"erro": f"Erro em until: {str(e)}"}, indent=2, ensure_ascii=False)
+
+        rule = RecurrenceRule(frequency, interval, by_weekday, by_month_day)
+        occurrences = rule.occurrences(start_date, until_date)
+        if count is not None:
+            occurrences = islice(occurrences, count)
+
+        result = {"regra": rule.describe(), "inicio": start_date.isoformat()}
+        result.update(summarize_occurrences(occurrences, max_dates))
+        return json.dumps(result, indent=2, ensure_ascii=False)
+    except ValueError as e:
+        return json.dumps({"erro": str(e)}, indent=2, ensure_ascii=False)
+    except Exception as e:
+        return json.dumps({"erro": f"Ocorreu um erro inesperado: {str(e)}"}, indent=2, ensure_ascii=False)
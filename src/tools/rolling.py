@@ -0,0 +1,460 @@
+"""
+Rolling (moving-window) statistics over a series of numbers.
+
+Sum, mean, variance and standard deviation of every window come from
+cumulative sums restarted every window values, in O(n) regardless of the
+window size. Median,
+quantiles, minimum and maximum need the order of the values inside each
+window: small windows are sorted all at once with NumPy, and larger ones
+slide over a sorted window that inserts and removes one value per step.
+"""
+import bisect
+import itertools
+import json
+import math
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.tools import tool
+
+from src.tools.datasets import get_dataset_registry, is_handle, load_numbers
+
+
+# Result key of each rolling measure
+ROLLING_MEASURES = ["soma", "media", "variancia", "desvio_padrao", "mediana", "minimo", "maximo"]
+
+# Measures read from the sorted window, with the quantile each one is
+ORDER_MEASURES = {"mediana": 0.5, "minimo": 0.0, "maximo": 1.0}
+
+# Windows up to this size are sorted all at once; larger ones slide over a
+# SortedWindow, whose cost per step grows much more slowly with the size
+VECTORIZED_MAX_WINDOW = 64
+
+# Windows sorted per block in the vectorized path, to bound the memory of
+# the (block, window) copy
+_SORT_BLOCK_VALUES = 1 << 22
+
+# Default number of windows reported; longer results are downsampled
+DEFAULT_MAX_POINTS = 200
+
+
+def _blocks(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Values cut into rows of window values, zero-padded so that every window
+    starts in some row k and ends in row k + 1.
+    """
+    rows = -(-(len(values) - window + 1) // window) + 1
+    blocks = np.zeros(rows * window, dtype=np.float64)
+    blocks[:len(values)] = values
+    return blocks.reshape(rows, window)
+
+
+def _spanning_sums(head: np.ndarray, tail: np.ndarray, count: int) -> np.ndarray:
+    """
+    head[k, r:].sum() + tail[k, :r].sum() for every row k and offset r, in
+    row-major order, from one cumulative sum per row of each array.
+    """
+    suffix = np.cumsum(head[:, ::-1], axis=1)[:, ::-1]
+    prefix = np.zeros_like(tail)
+    np.cumsum(tail[:, :-1], axis=1, out=prefix[:, 1:])
+    return (suffix + prefix).ravel()[:count]
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Sum of every window of values, in O(n).
+
+    The window starting at offset r of a row is the end of that row plus
+    the beginning of the next, so it is the sum of a cumulative sum taken
+    backwards over one row and one taken forwards over the next. Both only
+    add values of the window itself, so, unlike a single cumulative sum
+    over the whole series, a large value cannot swamp later windows.
+    """
+    blocks = _blocks(values, window)
+    return _spanning_sums(blocks[:-1], blocks[1:], len(values) - window + 1)
+
+
+def _windows_with(mask: np.ndarray, window: int) -> Optional[np.ndarray]:
+    """Mask of the windows holding a True value of mask, or None if it has none."""
+    if not mask.any():
+        return None
+    return _window_sums(mask.astype(np.float64), window) > 0
+
+
+def rolling_sum(data: np.ndarray, window: int) -> np.ndarray:
+    """
+    Sum of every window of consecutive values, in O(n).
+
+    Args:
+        data: One-dimensional float array
+        window: Values per window, between 1 and len(data)
+
+    Returns:
+        Float64 array with len(data) - window + 1 sums; windows holding a
+        NaN, or both inf and -inf, are NaN, and other windows holding an
+        infinity are that infinity
+    """
+    finite = np.isfinite(data)
+    if finite.all():
+        return _window_sums(data, window)
+
+    sums = _window_sums(np.where(finite, data, 0.0), window)
+    positive = _windows_with(data == np.inf, window)
+    negative = _windows_with(data == -np.inf, window)
+    if positive is not None:
+        sums[positive] = np.inf
+    if negative is not None:
+        sums[negative] = -np.inf
+        if positive is not None:
+            sums[positive & negative] = np.nan
+    nan = _windows_with(np.isnan(data), window)
+    if nan is not None:
+        sums[nan] = np.nan
+    return sums
+
+
+def rolling_mean(data: np.ndarray, window: int) -> np.ndarray:
+    """Mean of every window of consecutive values, in O(n). See rolling_sum."""
+    return rolling_sum(data, window) / window
+
+
+def rolling_variance(data: np.ndarray, window: int) -> np.ndarray:
+    """
+    Sample variance of every window of consecutive values, in O(n).
+
+    The sums of x and x**2 are taken as in _window_sums, with the values
+    shifted by the last value of the row the window starts in. That value
+    is inside every such window, which keeps the difference of the two
+    sums well conditioned for data far from zero.
+
+    Args:
+        data: One-dimensional float array
+        window: Values per window, between 2 and len(data)
+
+    Returns:
+        Float64 array with len(data) - window + 1 variances; windows
+        holding a NaN or an infinity are NaN
+    """
+    finite = np.isfinite(data)
+    invalid = None if finite.all() else _windows_with(~finite, window)
+    blocks = _blocks(data if invalid is None else np.where(finite, data, 0.0), window)
+
+    shifts = blocks[:-1, -1:]
+    head = blocks[:-1] - shifts
+    tail = blocks[1:] - shifts
+    count = len(data) - window + 1
+    sums = _spanning_sums(head, tail, count)
+    squares = _spanning_sums(head * head, tail * tail, count)
+    variances = (squares - sums * sums / window) / (window - 1)
+    # Rounding can leave tiny negative values for constant windows
+    np.maximum(variances, 0.0, out=variances)
+    if invalid is not None:
+        variances[invalid] = np.nan
+    return variances
+
+
+class SortedWindow:
+    """
+    The values of a sliding window, kept sorted for order statistics.
+
+    Values are stored in blocks of at most 2 * load sorted values, so
+    inserting or removing one value moves at most one block and finding
+    the value of a given rank walks the block lengths: both take about
+    O(sqrt(n)) instead of the O(n) of a single sorted list. NaN values are
+    counted but not stored.
+    """
+
+    def __init__(self, load: int = 256):
+        self._load = load
+        self._blocks: List[List[float]] = []
+        self._maxima: List[float] = []
+        self._lengths: List[int] = []
+        self._count = 0
+        self.nan_count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, value: float) -> None:
+        """Inserts a value."""
+        if value != value:
+            self.nan_count += 1
+            return
+        self._count += 1
+        if not self._blocks:
+            self._blocks.append([value])
+            self._maxima.append(value)
+            self._lengths.append(1)
+            return
+
+        index = min(bisect.bisect_left(self._maxima, value), len(self._blocks) - 1)
+        block = self._blocks[index]
+        bisect.insort(block, value)
+        self._maxima[index] = block[-1]
+        self._lengths[index] += 1
+        if len(block) > 2 * self._load:
+            # Split an overfull block in two
+            self._blocks.insert(index + 1, block[self._load:])
+            del block[self._load:]
+            self._maxima.insert(index, block[-1])
+            self._lengths[index] = self._load
+            self._lengths.insert(index + 1, len(self._blocks[index + 1]))
+
+    def remove(self, value: float) -> None:
+        """Removes one occurrence of a value that was added."""
+        if value != value:
+            self.nan_count -= 1
+            return
+        self._count -= 1
+        index = bisect.bisect_left(self._maxima, value)
+        block = self._blocks[index]
+        del block[bisect.bisect_left(block, value)]
+        if block:
+            self._maxima[index] = block[-1]
+            self._lengths[index] -= 1
+        else:
+            del self._blocks[index]
+            del self._maxima[index]
+            del self._lengths[index]
+
+    def __getitem__(self, rank: int) -> float:
+        """The value of a given rank (0 is the smallest)."""
+        if not 0 <= rank < self._count:
+            raise IndexError("rank out of range")
+        if len(self._blocks) <= 8:
+            # Walking a few blocks is cheaper than accumulating their lengths
+            for block in self._blocks:
+                if rank < len(block):
+                    return block[rank]
+                rank -= len(block)
+        ends = list(itertools.accumulate(self._lengths))
+        index = bisect.bisect_right(ends, rank)
+        return self._blocks[index][rank - ends[index] + self._lengths[index]]
+
+    def quantile(self, fraction: float) -> float:
+        """Quantile by linear interpolation, as np.quantile; NaN if a NaN is in the window."""
+        if self.nan_count:
+            return math.nan
+        position = (self._count - 1) * fraction
+        below = math.floor(position)
+        lower = self[below]
+        gamma = position - below
+        if gamma == 0:
+            return lower
+        upper = self[below + 1]
+        difference = upper - lower
+        if gamma >= 0.5:
+            return upper - difference * (1 - gamma)
+        return lower + difference * gamma
+
+
+def rolling_quantiles(data: np.ndarray, window: int, fractions: Sequence[float]) -> np.ndarray:
+    """
+    Quantiles of every window of consecutive values.
+
+    Windows of up to VECTORIZED_MAX_WINDOW values are sorted in blocks
+    with NumPy; larger windows slide over a SortedWindow, one insertion
+    and one removal per step.
+
+    Args:
+        data: One-dimensional float array
+        window: Values per window, between 1 and len(data)
+        fractions: Quantiles between 0 and 1 (0.5 is the median)
+
+    Returns:
+        Float64 array of shape (len(fractions), len(data) - window + 1);
+        windows holding a NaN are NaN
+    """
+    count = len(data) - window + 1
+    result = np.empty((len(fractions), count), dtype=np.float64)
+
+    if window <= VECTORIZED_MAX_WINDOW:
+        windows = np.lib.stride_tricks.sliding_window_view(data, window)
+        block = max(1, _SORT_BLOCK_VALUES // window)
+        for start in range(0, count, block):
+            # NaN sorts last, and np.quantile then returns NaN, as statistics_analyzer
+            result[:, start:start + block] = np.quantile(windows[start:start + block], fractions, axis=1)
+        return result
+
+    values = data.tolist()
+    # Blocks of about sqrt(window) values balance the cost of moving values
+    # inside a block against walking the block lengths
+    sorted_window = SortedWindow(load=max(256, 4 * math.isqrt(window)))
+    for value in values[:window]:
+        sorted_window.add(value)
+    for index in range(count):
+        if index:
+            sorted_window.remove(values[index - 1])
+            sorted_window.add(values[index + window - 1])
+        for row, fraction in enumerate(fractions):
+            result[row, index] = sorted_window.quantile(fraction)
+    return result
+
+
+def quantile_key(fraction: float) -> str:
+    """Result key of a quantile: 0.9 is "p90", 0.975 is "p97.5"."""
+    return f"p{round(fraction * 100, 6):g}"
+
+
+def compute_rolling(
+    data: np.ndarray,
+    window: int,
+    measures: Sequence[str],
+    quantiles: Sequence[float] = (),
+) -> Dict[str, np.ndarray]:
+    """
+    Computes the requested rolling measures over every window.
+
+    Args:
+        data: One-dimensional float array
+        window: Values per window
+        measures: Keys of ROLLING_MEASURES
+        quantiles: Extra quantiles between 0 and 1, reported as quantile_key
+
+    Returns:
+        Dictionary from result key to an array with one value per window
+    """
+    result: Dict[str, np.ndarray] = {}
+    if "soma" in measures:
+        result["soma"] = rolling_sum(data, window)
+    if "media" in measures:
+        result["media"] = result["soma"] / window if "soma" in result else rolling_mean(data, window)
+    if "variancia" in measures or "desvio_padrao" in measures:
+        variances = rolling_variance(data, window)
+        if "variancia" in measures:
+            result["variancia"] = variances
+        if "desvio_padrao" in measures:
+            result["desvio_padrao"] = np.sqrt(variances)
+
+    # Every order statistic comes from the same pass over sorted windows
+    order_keys = [key for key in ORDER_MEASURES if key in measures]
+    fractions = [ORDER_MEASURES[key] for key in order_keys] + list(quantiles)
+    if fractions:
+        rows = rolling_quantiles(data, window, fractions)
+        keys = order_keys + [quantile_key(fraction) for fraction in quantiles]
+        result.update(zip(keys, rows))
+
+    ordered = [key for key in ROLLING_MEASURES if key in result]
+    ordered += [key for key in result if key not in ordered]
+    return {key: result[key] for key in ordered}
+
+
+def downsample_step(count: int, max_points: int) -> int:
+    """Stride that reports at most max_points of count windows."""
+    return max(1, math.ceil(count / max_points))
+
+
+def _rounded(values: np.ndarray) -> List[Optional[float]]:
+    """Values rounded to 3 decimal places, NaN written as null."""
+    return [None if value != value else value for value in np.round(values, 3).tolist()]
+
+
+@tool
+def rolling_statistics(
+    numbers: str,
+    window: int,
+    measures: Optional[List[str]] = None,
+    quantiles: Optional[List[float]] = None,
+    max_points: int = DEFAULT_MAX_POINTS,
+) -> str:
+    """
+    Calculates moving-window (rolling) statistics over a series of numbers.
+
+    Each window holds `window` consecutive values and slides one value at
+    a time, so a series of n values has n - window + 1 windows. Use it for
+    moving averages, rolling standard deviation, rolling median and
+    rolling quantiles, instead of calling statistics_analyzer per window.
+
+    Available measures: "soma", "media", "variancia", "desvio_padrao",
+    "mediana", "minimo", "maximo" (default: ["media"]). Extra quantiles are
+    reported as "p<percent>", e.g. 0.9 as "p90".
+
+    Long results are downsampled: at most max_points windows are reported,
+    taken every "passo" windows. The window reported at index i ends at
+    value number posicao_inicial + i * passo (1-based).
+
+    Args:
+        numbers: Numbers as a string, separated by commas, semicolons,
+                spaces or newlines, or the handle of a dataset given
+                in an earlier result (e.g. 'ds:3')
+        window: Number of values in each window
+        measures: Rolling measures to report
+        quantiles: Extra quantiles between 0 and 1, e.g. [0.1, 0.9]
+        max_points: Maximum number of windows reported (default 200)
+
+    Returns:
+        A JSON-formatted string with one list per measure.
+
+    Examples:
+        >>> rolling_statistics("1, 2, 3, 4, 5, 6", window=3)
+        {
+          "janela": 3,
+          "janelas": 4,
+          "pontos": 4,
+          "passo": 1,
+          "posicao_inicial": 3,
+          "media": [2.0, 3.0, 4.0, 5.0],
+          "conjunto": "ds:1"
+        }
+    """
+    try:
+        if not numbers or not numbers.strip():
+            return json.dumps({
+                "erro": "Entrada vazia fornecida. Por favor, forneça números separados por vírgula."
+            }, indent=2, ensure_ascii=False)
+
+        measures = [name.strip().lower() for name in (measures or ["media"])]
+        unknown = [name for name in measures if name not in ROLLING_MEASURES]
+        if unknown:
+            return json.dumps({
+                "erro": f"Medida desconhecida: {', '.join(unknown)}. Medidas disponíveis: {', '.join(ROLLING_MEASURES)}."
+            }, indent=2, ensure_ascii=False)
+
+        quantiles = [float(fraction) for fraction in (quantiles or [])]
+        if any(not 0 <= fraction <= 1 for fraction in quantiles):
+            return json.dumps({"erro": "Os quantis devem estar entre 0 e 1."}, indent=2, ensure_ascii=False)
+
+        if max_points < 1:
+            return json.dumps({"erro": "max_points deve ser pelo menos 1."}, indent=2, ensure_ascii=False)
+
+        try:
+            data, handle = load_numbers(numbers)
+        except ValueError as e:
+            if is_handle(numbers):
+                return json.dumps({"erro": str(e)}, indent=2, ensure_ascii=False)
+            return json.dumps({
+                "erro": f"Formato de entrada inválido: {str(e)}. Por favor, forneça números separados por vírgula como '1, 2, 3, 4, 5'."
+            }, indent=2, ensure_ascii=False)
+
+        minimum_window = 2 if {"variancia", "desvio_padrao"} & set(measures) else 1
+        if not minimum_window <= window <= len(data):
+            return json.dumps({
+                "erro": f"A janela deve ter entre {minimum_window} e {len(data)} valores (a série tem {len(data)} valores)."
+            }, indent=2, ensure_ascii=False)
+
+        def compute(values: np.ndarray) -> Dict[str, Any]:
+            rolling = compute_rolling(values, window, measures, quantiles)
+            count = len(values) - window + 1
+            step = downsample_step(count, max_points)
+            result: Dict[str, Any] = {
+                "janela": window,
+                "janelas": count,
+                "pontos": len(range(0, count, step)),
+                "passo": step,
+                "posicao_inicial": window,
+            }
+            for key, series in rolling.items():
+                result[key] = _rounded(series[::step])
+            return result
+
+        if handle is None:
+            return json.dumps(compute(data), indent=2, ensure_ascii=False)
+
+        key = ("rolling_statistics", window, tuple(measures), tuple(quantiles), max_points)
+        result = dict(get_dataset_registry().memoize(handle, key, compute), conjunto=handle)
+        return json.dumps(result, indent=2, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "erro": f"Ocorreu um erro inesperado: {str(e)}"
+        }, indent=2, ensure_ascii=False)
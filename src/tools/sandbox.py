@@ -0,0 +1,340 @@
+"""
+Process-isolated execution backend for the calculator.
+
+Expensive evaluations (huge exact powers, very long expressions) run in a
+pool of pre-started worker processes instead of the agent thread. A worker
+that exceeds the time limit is killed and replaced, so a runaway expression
+can always be cancelled, and each worker runs under a memory limit.
+Cheap expressions keep being evaluated in-process.
+"""
+import atexit
+import builtins
+import multiprocessing
+import queue
+import threading
+from typing import Any, Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from src.tools.calculator import (
+    BudgetExceededError,
+    CompiledExpression,
+    EvaluationBudget,
+    EvaluationTimeoutError,
+    evaluate_expression,
+    get_evaluation_budget,
+    get_execution_backend,
+    set_evaluation_budget,
+    set_execution_backend,
+)
+
+
+class SandboxError(ValueError):
+    """Raised when a worker process fails instead of returning a result."""
+
+
+# Errors a worker may report, rebuilt with the same type in the caller
+_WORKER_ERRORS = {
+    "ZeroDivisionError": ZeroDivisionError,
+    "ValueError": ValueError,
+    "BudgetExceededError": BudgetExceededError,
+    "EvaluationTimeoutError": EvaluationTimeoutError,
+}
+
+
+def _worker_error(name: str) -> type:
+    """Maps an error name reported by a worker back to an exception type."""
+    if name == "MemoryError":
+        return SandboxError
+    error = _WORKER_ERRORS.get(name) or getattr(builtins, name, None)
+    if isinstance(error, type) and issubclass(error, Exception):
+        return error
+    return SandboxError
+
+
+# Seconds a new worker may take to import its modules and report ready
+_STARTUP_TIMEOUT = 60.0
+
+_READY = "ready"
+
+
+def _limit_memory(memory_limit_mb: Optional[int]) -> None:
+    """Caps the address space of the current process, where supported."""
+    if resource is None or not memory_limit_mb:
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _worker_main(connection, memory_limit_mb: Optional[int]) -> None:
+    """
+    Worker loop: receives (expression, exact, budget) requests and answers
+    (True, result) or (False, error type name, message).
+    """
+    # Imports are done by now, so the limit only constrains evaluations
+    _limit_memory(memory_limit_mb)
+    connection.send(_READY)
+
+    while True:
+        try:
+            request = connection.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+
+        expression, exact, budget = request
+        set_evaluation_budget(budget)
+        try:
+            response = (True, evaluate_expression(expression, exact=exact))
+        except MemoryError:
+            response = (False, "MemoryError", "Evaluation exceeded the memory limit")
+        except Exception as e:
+            response = (False, type(e).__name__, str(e))
+
+        try:
+            connection.send(response)
+        except MemoryError:
+            connection.send((False, "MemoryError", "Evaluation exceeded the memory limit"))
+
+
+class _Worker:
+    """A worker process and the parent end of its pipe."""
+
+    def __init__(self, context, memory_limit_mb: Optional[int]):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_connection, memory_limit_mb),
+            daemon=True,
+        )
+        self.process.start()
+        child_connection.close()
+        self.ready = False
+        self.tasks = 0
+
+    def wait_ready(self) -> None:
+        if self.ready:
+            return
+        if not self.connection.poll(_STARTUP_TIMEOUT):
+            raise SandboxError("Evaluation worker did not start")
+        self.connection.recv()
+        self.ready = True
+
+    def stop(self, kill: bool = False) -> None:
+        if not kill:
+            try:
+                self.connection.send(None)
+            except (OSError, ValueError):
+                kill = True
+            else:
+                self.process.join(1.0)
+        if kill or self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+
+class SandboxPool:
+    """
+    Pool of pre-started worker processes that evaluate calculator expressions.
+
+    Install it with enable_sandbox() (or set_execution_backend) and
+    evaluate_expression sends the expressions selected by should_isolate to
+    the pool; the others are still evaluated in-process.
+
+    Attributes:
+        workers: Number of worker processes
+        timeout: Default wall-clock limit in seconds for one evaluation,
+                 enforced by killing the worker
+        memory_limit_mb: Address-space limit of each worker in megabytes,
+                         or None for no limit (not enforced on Windows)
+        max_tasks_per_worker: Evaluations after which a worker is replaced
+        isolate_min_operations: Expressions with at least this many
+                                operations are isolated
+        isolate_min_digits: Exact expressions whose results may have at
+                            least this many digits are isolated
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        timeout: float = 5.0,
+        memory_limit_mb: Optional[int] = 512,
+        max_tasks_per_worker: int = 1000,
+        isolate_min_operations: int = 10_000,
+        isolate_min_digits: int = 1_000,
+        start_method: str = "spawn",
+    ):
+        if workers < 1:
+            raise ValueError("A sandbox pool needs at least one worker")
+
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.isolate_min_operations = isolate_min_operations
+        self.isolate_min_digits = isolate_min_digits
+
+        self._context = multiprocessing.get_context(start_method)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {"evaluations": 0, "timeouts": 0, "crashes": 0, "recycled": 0, "busy": 0}
+        self._all = []
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        for _ in range(workers):
+            self._idle.put(self._start_worker())
+
+    def _start_worker(self) -> _Worker:
+        worker = _Worker(self._context, self.memory_limit_mb)
+        with self._lock:
+            self._all.append(worker)
+        return worker
+
+    def _retire(self, worker: _Worker, kill: bool) -> None:
+        """Stops a worker and, unless the pool is closed, starts its replacement."""
+        with self._lock:
+            if worker in self._all:
+                self._all.remove(worker)
+            self._stats["recycled"] += 1
+        worker.stop(kill=kill)
+        if not self._closed:
+            self._idle.put(self._start_worker())
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def should_isolate(self, compiled: CompiledExpression) -> bool:
+        """
+        Decides from the estimated cost whether an expression is worth the
+        round trip to a worker process.
+
+        Float arithmetic takes constant time per operation, so only long
+        expressions are isolated; exact arithmetic slows down with the size
+        of the numbers, so large exact results are isolated as well.
+        """
+        if compiled.cost.operations >= self.isolate_min_operations:
+            return True
+        return compiled.exact and compiled.cost.digits >= self.isolate_min_digits
+
+    def evaluate(
+        self,
+        expression: str,
+        exact: bool = False,
+        budget: Optional[EvaluationBudget] = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        Evaluates an expression in a worker process.
+
+        Args:
+            expression: The mathematical expression to evaluate
+            exact: Keep exact int/Fraction arithmetic where possible
+            budget: Budget applied inside the worker (default: the current
+                    default budget)
+            timeout: Wall-clock limit in seconds, for the evaluation and for
+                     the wait for a free worker (default: the pool timeout)
+
+        Returns:
+            The evaluated result
+
+        Raises:
+            EvaluationTimeoutError: If the worker did not answer in time; the
+                                    worker is killed and replaced
+            SandboxError: If no worker became free within the timeout, or
+                          the worker ran out of memory or stopped
+            ValueError, ZeroDivisionError: As raised by the evaluation
+        """
+        if self._closed:
+            raise SandboxError("The sandbox pool is closed")
+
+        budget = budget or get_evaluation_budget()
+        timeout = self.timeout if timeout is None else timeout
+
+        try:
+            # Busy workers are freed or replaced within their own timeout
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            self._count("busy")
+            raise SandboxError(f"Sandbox ocupado: nenhum worker livre após {timeout:g} s; tente novamente") from None
+        healthy = False
+        try:
+            worker.wait_ready()
+            worker.connection.send((expression, exact, budget))
+            if not worker.connection.poll(timeout):
+                self._count("timeouts")
+                raise EvaluationTimeoutError("Evaluation exceeded the time limit")
+            response = worker.connection.recv()
+            healthy = True
+        except (EOFError, OSError):
+            self._count("crashes")
+            raise SandboxError("Evaluation worker stopped unexpectedly")
+        finally:
+            worker.tasks += 1
+            self._count("evaluations")
+            if healthy and worker.tasks < self.max_tasks_per_worker and not self._closed:
+                self._idle.put(worker)
+            else:
+                self._retire(worker, kill=not healthy)
+
+        if response[0]:
+            return response[1]
+
+        _, error_name, message = response
+        raise _worker_error(error_name)(message)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the pool counters and configuration."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["workers"] = len(self._all)
+        stats["timeout"] = self.timeout
+        return stats
+
+    def close(self) -> None:
+        """Stops all workers. Evaluations still running are cut short."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._all)
+            self._all.clear()
+        for worker in workers:
+            worker.stop(kill=False)
+
+    def __enter__(self) -> "SandboxPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def enable_sandbox(**options: Any) -> SandboxPool:
+    """
+    Starts a SandboxPool and installs it as the calculator execution backend.
+
+    Args:
+        **options: Keyword arguments for SandboxPool
+
+    Returns:
+        The installed pool
+    """
+    disable_sandbox()
+    pool = SandboxPool(**options)
+    set_execution_backend(pool)
+    return pool
+
+
+def disable_sandbox() -> None:
+    """Removes the installed sandbox pool, if any, and stops its workers."""
+    backend = get_execution_backend()
+    if isinstance(backend, SandboxPool):
+        set_execution_backend(None)
+        backend.close()
+
+
+atexit.register(disable_sandbox)
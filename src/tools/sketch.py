@@ -0,0 +1,276 @@
+"""
+Mergeable streaming quantile sketch (KLL) for datasets too large to sort.
+"""
+import math
+import struct
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+
+
+# Capacity ratio between consecutive levels, from the KLL paper
+_CAPACITY_DECAY = 2 / 3
+
+# Smallest capacity of any level
+_MIN_CAPACITY = 8
+
+# Large updates are added in chunks of this many values, so compactions
+# sort small arrays instead of the whole input
+_UPDATE_CHUNK = 1 << 16
+
+# Normalized rank error of a single quantile, with 99% confidence:
+# error = _ERROR_SCALE / k ** _ERROR_EXPONENT (empirical fit for KLL,
+# as published with Apache DataSketches)
+_ERROR_SCALE = 2.296
+_ERROR_EXPONENT = 0.9723
+
+# Serialized layout: magic, format version, k, count, minimum, maximum,
+# compacted flag and number of levels, then the level sizes (uint32) and
+# the items (float64), all little-endian
+_MAGIC = b"KLL1"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBIqdd?H")
+
+
+class QuantileSketch:
+    """
+    KLL quantile sketch: estimates quantiles of a stream in bounded memory.
+
+    Values are kept in levels; an item at level h stands for 2**h values.
+    When a level exceeds its capacity it is sorted and every other item,
+    starting at a random offset, is promoted to the next level. Until the
+    first such compaction the sketch holds every value, and its quantiles
+    are exact and identical to np.percentile.
+
+    Sketches with the same k can be merged, so shards of a dataset can be
+    summarized independently and combined, and they can be serialized
+    with to_bytes() to be sent between processes.
+
+    The rank of an estimated quantile is within rank_error of the
+    requested one (as a fraction of count) with 99% confidence; use
+    for_error() to size a sketch for a given error.
+
+    Attributes:
+        k: Capacity of the top level; memory and accuracy grow with k
+        count: Number of values added (NaN values are skipped)
+        minimum: Smallest value added
+        maximum: Largest value added
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = 0):
+        if k < _MIN_CAPACITY:
+            raise ValueError(f"k must be at least {_MIN_CAPACITY}")
+        self.k = k
+        self.count = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self._levels: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self._compacted = False
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def for_error(cls, error: float, seed: Optional[int] = 0) -> "QuantileSketch":
+        """
+        Creates the smallest sketch whose rank error is at most error.
+
+        Args:
+            error: Normalized rank error, e.g. 0.01 for 1% of the ranks
+
+        Raises:
+            ValueError: If error is not between 0 and 1
+        """
+        if not 0 < error < 1:
+            raise ValueError("The error must be between 0 and 1")
+        k = math.ceil((_ERROR_SCALE / error) ** (1 / _ERROR_EXPONENT))
+        return cls(k=max(k, _MIN_CAPACITY), seed=seed)
+
+    @property
+    def rank_error(self) -> float:
+        """
+        Normalized rank error bound of quantile estimates (99% confidence),
+        0 while the sketch is exact.
+        """
+        if self.exact:
+            return 0.0
+        return _ERROR_SCALE / self.k ** _ERROR_EXPONENT
+
+    @property
+    def exact(self) -> bool:
+        """Whether the sketch still holds every value, so quantiles are exact."""
+        return not self._compacted
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __repr__(self) -> str:
+        return f"QuantileSketch(k={self.k}, count={self.count}, retained={self.retained}, exact={self.exact})"
+
+    @property
+    def retained(self) -> int:
+        """Number of items currently stored."""
+        return sum(len(level) for level in self._levels)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - 1 - level
+        return max(_MIN_CAPACITY, int(math.ceil(self.k * _CAPACITY_DECAY ** depth)))
+
+    def _compress(self) -> None:
+        """Compacts every level that is over capacity, bottom-up."""
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                # An odd item out stays behind
+                keep = len(items) % 2
+                promoted = items[keep:][int(self._rng.integers(2))::2]
+                self._levels[level + 1] = np.concatenate((self._levels[level + 1], promoted))
+                self._levels[level] = items[:keep]
+                self._compacted = True
+            level += 1
+
+    def update(self, values: Union[Iterable[float], np.ndarray]) -> "QuantileSketch":
+        """
+        Adds a chunk of values.
+
+        Args:
+            values: Any array-like of numbers; NaN values are skipped
+
+        Returns:
+            The sketch itself, so calls can be chained
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        self.count += len(values)
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        for start in range(0, len(values), _UPDATE_CHUNK):
+            self._levels[0] = np.concatenate((self._levels[0], values[start:start + _UPDATE_CHUNK]))
+            self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """
+        Adds every value summarized by another sketch.
+
+        Args:
+            other: A sketch with the same k; it is not modified
+
+        Returns:
+            The sketch itself, so calls can be chained
+
+        Raises:
+            ValueError: If the sketches have different k
+        """
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge sketches with different k ({self.k} and {other.k})")
+        if other.count == 0:
+            return self
+
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate((self._levels[level], items))
+
+        self.count += other.count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self._compacted = self._compacted or other._compacted
+        self._compress()
+        return self
+
+    def quantiles(self, fractions: Union[Iterable[float], np.ndarray]) -> np.ndarray:
+        """
+        Estimates several quantiles at once.
+
+        While the sketch is exact the result matches np.quantile with
+        linear interpolation; afterwards each quantile is the stored item
+        whose weighted rank covers the requested rank.
+
+        Args:
+            fractions: Quantiles between 0 and 1
+
+        Returns:
+            Float64 array with one estimate per fraction
+
+        Raises:
+            ValueError: If the sketch is empty or a fraction is out of range
+        """
+        fractions = np.asarray(fractions, dtype=np.float64)
+        if self.count == 0:
+            raise ValueError("The sketch is empty")
+        if np.any((fractions < 0) | (fractions > 1)):
+            raise ValueError("Quantiles must be between 0 and 1")
+
+        if self.exact:
+            return np.quantile(self._levels[0], fractions)
+
+        values = np.concatenate(self._levels)
+        weights = np.concatenate([
+            np.full(len(items), 2 ** level, dtype=np.int64)
+            for level, items in enumerate(self._levels)
+        ])
+        order = np.argsort(values, kind="stable")
+        values = values[order]
+        cumulative = np.cumsum(weights[order])
+
+        ranks = fractions * (self.count - 1)
+        positions = np.searchsorted(cumulative, ranks, side="right")
+        estimates = values[np.minimum(positions, len(values) - 1)]
+
+        # The extremes are tracked exactly
+        estimates = np.where(fractions == 0, self.minimum, estimates)
+        return np.where(fractions == 1, self.maximum, estimates)
+
+    def quantile(self, fraction: float) -> float:
+        """Estimates one quantile, between 0 and 1."""
+        return float(self.quantiles([fraction])[0])
+
+    def to_bytes(self) -> bytes:
+        """Serializes the sketch; restore it with QuantileSketch.from_bytes."""
+        sizes = np.array([len(items) for items in self._levels], dtype="<u4")
+        header = _HEADER.pack(
+            _MAGIC, _VERSION, self.k, self.count, self.minimum, self.maximum,
+            self._compacted, len(self._levels),
+        )
+        items = np.concatenate(self._levels).astype("<f8")
+        return header + sizes.tobytes() + items.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, seed: Optional[int] = 0) -> "QuantileSketch":
+        """
+        Restores a sketch serialized with to_bytes.
+
+        Args:
+            data: The serialized sketch
+            seed: Seed for the compactions done after restoring
+
+        Raises:
+            ValueError: If data is not a serialized sketch
+        """
+        try:
+            magic, version, k, count, minimum, maximum, compacted, levels = _HEADER.unpack_from(data)
+        except struct.error:
+            raise ValueError("Invalid sketch data: too short") from None
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Invalid sketch data: unknown format")
+
+        offset = _HEADER.size
+        sizes = np.frombuffer(data, dtype="<u4", count=levels, offset=offset) if levels else np.empty(0, np.uint32)
+        offset += sizes.nbytes
+        if len(data) != offset + int(sizes.sum()) * 8:
+            raise ValueError("Invalid sketch data: wrong length")
+
+        sketch = cls(k=k, seed=seed)
+        items = np.frombuffer(data, dtype="<f8", offset=offset).astype(np.float64)
+        sketch._levels = np.split(items, np.cumsum(sizes)[:-1]) if levels else [np.empty(0, dtype=np.float64)]
+        sketch.count = count
+        sketch.minimum = minimum
+        sketch.maximum = maximum
+        sketch._compacted = compacted
+        return sketch
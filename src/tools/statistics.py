@@ -2,35 +2,383 @@
 Advanced statistics tool for calculating comprehensive statistical measures.
 """
 import json
-import statistics
-from typing import List
+import math
+from collections import namedtuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 import numpy as np
 from langchain_core.tools import tool
 
+from src.tools.datasets import get_dataset_registry, is_handle, load_numbers
+from src.tools.sketch import QuantileSketch
 
-def parse_numbers(numbers_str: str) -> List[float]:
+
+# Every measure reported by statistics_analyzer, before rounding
+Summary = namedtuple("Summary", [
+    "count", "mean", "median", "mode", "std_dev", "variance",
+    "minimum", "maximum", "q1", "q2", "q3",
+])
+
+
+def _interpolate(sorted_data: np.ndarray, fraction: float) -> float:
+    """
+    Quantile of sorted data by linear interpolation between the closest
+    ranks, with the same floating-point operations as np.percentile.
+    """
+    position = (len(sorted_data) - 1) * fraction
+    below = math.floor(position)
+    gamma = position - below
+    lower = float(sorted_data[below])
+    upper = float(sorted_data[min(below + 1, len(sorted_data) - 1)])
+    difference = upper - lower
+    if gamma >= 0.5:
+        return upper - difference * (1 - gamma)
+    return lower + difference * gamma
+
+
+def _mode(data: np.ndarray, sorted_data: np.ndarray) -> float:
+    """
+    Most frequent value, from the run lengths of the sorted data.
+
+    Ties go to the value that appears first in data, as statistics.mode
+    does; NaN values never compare equal, so each one is its own run.
+    """
+    starts = np.flatnonzero(sorted_data[1:] != sorted_data[:-1]) + 1
+    if len(starts) == len(sorted_data) - 1:
+        # All values distinct
+        return float(data[0])
+
+    starts = np.concatenate(([0], starts))
+    counts = np.diff(np.append(starts, len(sorted_data)))
+    candidates = sorted_data[starts[counts == counts.max()]]
+    first = np.argmax(np.isin(data, candidates))
+    return float(data[first])
+
+
+def _moments(data: np.ndarray) -> Tuple[float, float]:
+    """Mean and sample variance, with the same steps as np.mean and np.var(ddof=1)."""
+    count = len(data)
+    mean = float(data.sum()) / count
+
+    # Reuses one buffer for the squared deviations
+    deviations = data - mean
+    np.multiply(deviations, deviations, out=deviations)
+    return mean, float(deviations.sum()) / (count - 1)
+
+
+def _order_statistic(measure: Callable[[np.ndarray], float]) -> Callable[[np.ndarray, Dict[str, Any]], float]:
+    """Wraps a measure of the sorted data; NaN sorts last and makes it NaN."""
+    def compute(data: np.ndarray, computed: Dict[str, Any]) -> float:
+        sorted_data = computed["sorted"]
+        if math.isnan(sorted_data[-1]):
+            return float("nan")
+        return measure(sorted_data)
+    return compute
+
+
+def _median(sorted_data: np.ndarray) -> float:
+    middle = len(sorted_data) // 2
+    if len(sorted_data) % 2:
+        return float(sorted_data[middle])
+    return (float(sorted_data[middle - 1]) + float(sorted_data[middle])) / 2
+
+
+# Dependency graph of the measures: each node lists the nodes it needs and
+# computes its value from the data and the values computed so far. The
+# Summary fields, "range" and "iqr" are measures; "sorted" and "moments"
+# are intermediate results shared by several of them.
+_MEASURE_GRAPH: Dict[str, Tuple[Tuple[str, ...], Callable[[np.ndarray, Dict[str, Any]], Any]]] = {
+    "sorted": ((), lambda data, computed: np.sort(data)),
+    "moments": ((), lambda data, computed: _moments(data)),
+    "count": ((), lambda data, computed: len(data)),
+    "mean": (("moments",), lambda data, computed: computed["moments"][0]),
+    "variance": (("moments",), lambda data, computed: computed["moments"][1]),
+    "std_dev": (("variance",), lambda data, computed: float(np.sqrt(computed["variance"]))),
+    "minimum": ((), lambda data, computed: float(np.min(data))),
+    "maximum": ((), lambda data, computed: float(np.max(data))),
+    "range": (("minimum", "maximum"), lambda data, computed: computed["maximum"] - computed["minimum"]),
+    "mode": (("sorted",), lambda data, computed: _mode(data, computed["sorted"])),
+    "median": (("sorted",), _order_statistic(_median)),
+    "q1": (("sorted",), _order_statistic(lambda sorted_data: _interpolate(sorted_data, 0.25))),
+    "q2": (("sorted",), _order_statistic(lambda sorted_data: _interpolate(sorted_data, 0.5))),
+    "q3": (("sorted",), _order_statistic(lambda sorted_data: _interpolate(sorted_data, 0.75))),
+    "iqr": (("q1", "q3"), lambda data, computed: computed["q3"] - computed["q1"]),
+}
+
+
+def compute_measures(data: np.ndarray, measures: Iterable[str]) -> Dict[str, Any]:
     """
-    Parses comma-separated numbers into a list of floats.
+    Computes the given measures and only what they depend on.
+
+    Each node of the dependency graph is computed at most once, after its
+    prerequisites: asking for the mean and the standard deviation takes
+    one pass for the moments and no sort, while the median, quartiles and
+    mode share a single sorted copy.
 
     Args:
-        numbers_str: String of comma-separated numbers
+        data: One-dimensional float array with at least two values
+        measures: Names of nodes of the graph, e.g. "mean" or "iqr"
 
     Returns:
-        List of float values
+        Dictionary with the unrounded value of every requested measure
+        and of its prerequisites
 
     Raises:
-        ValueError: If the input cannot be parsed
+        KeyError: If a measure is not in the graph
     """
-    try:
-        # Remove whitespace and split by comma
-        numbers = [float(x.strip()) for x in numbers_str.split(',') if x.strip()]
-        return numbers
-    except ValueError as e:
-        raise ValueError(f"Formato de número inválido: {str(e)}")
+    computed: Dict[str, Any] = {}
+
+    def visit(name: str) -> None:
+        if name in computed:
+            return
+        requires, compute = _MEASURE_GRAPH[name]
+        for requirement in requires:
+            visit(requirement)
+        computed[name] = compute(data, computed)
+
+    for name in measures:
+        visit(name)
+    return computed
+
+
+def summarize(data: np.ndarray) -> Summary:
+    """
+    Computes every measure of statistics_analyzer with a single sort.
+
+    Median, quartiles and mode are read from one sorted copy; mean and
+    variance take one pass each over the data in its original order, so
+    all results match the separate NumPy calls (np.mean, np.median,
+    np.std, np.var, np.min, np.max, np.percentile) bit for bit.
+
+    Args:
+        data: One-dimensional float array with at least two values
+
+    Returns:
+        The unrounded Summary
+    """
+    computed = compute_measures(data, Summary._fields)
+    return Summary(*(computed[field] for field in Summary._fields))
+
+
+def summarize_approximate(data: np.ndarray, sketch: QuantileSketch) -> Summary:
+    """
+    Computes the statistics_analyzer measures with a quantile sketch.
+
+    Mean, variance, minimum and maximum are exact; median and quartiles
+    are estimated by the quantile sketch, which is updated with data. The
+    mode needs the sorted data and is left out (None).
+
+    Args:
+        data: One-dimensional float array with at least two values
+        sketch: Sketch that receives the data; its rank_error bounds
+                the error of the quartiles
+
+    Returns:
+        The unrounded Summary
+    """
+    count = len(data)
+    mean, variance = _moments(data)
+    minimum, maximum = float(np.min(data)), float(np.max(data))
+
+    sketch.update(data)
+    if sketch.count < count:
+        # NaN values, skipped by the sketch, make every order statistic NaN
+        q1 = q2 = q3 = float("nan")
+    else:
+        q1, q2, q3 = sketch.quantiles([0.25, 0.5, 0.75]).tolist()
+
+    return Summary(count, mean, q2, None, float(np.sqrt(variance)), variance, minimum, maximum, q1, q2, q3)
+
+
+# Result keys estimated by a quantile sketch in the approximate modes
+APPROXIMATE_KEYS = ["mediana", "q1", "q2", "q3", "iqr"]
+
+# Rank error bounds accepted by the approximate mode of statistics_analyzer
+MIN_ERROR_BOUND = 0.001
+MAX_ERROR_BOUND = 0.1
+
+# Shown as the mode when it could not be computed
+MODE_UNAVAILABLE = "Indisponível: muitos valores distintos"
+
+# Shown as the mode in the approximate mode of statistics_analyzer
+MODE_NOT_COMPUTED = "Não calculada no modo aproximado"
+
+
+# Result keys of statistics_analyzer, in output order, and the measure of
+# the dependency graph each one reports
+RESULT_MEASURES = {
+    "contagem": "count",
+    "media": "mean",
+    "mediana": "median",
+    "moda": "mode",
+    "desvio_padrao": "std_dev",
+    "variancia": "variance",
+    "minimo": "minimum",
+    "maximo": "maximum",
+    "amplitude": "range",
+    "q1": "q1",
+    "q2": "q2",
+    "q3": "q3",
+    "iqr": "iqr",
+}
+
+
+def parse_measures(measures: Union[str, Iterable[str], None]) -> Optional[List[str]]:
+    """
+    Validates the result keys requested from statistics_analyzer.
+
+    Args:
+        measures: Result keys, as a list or comma-separated text; None or
+                  an empty selection means every measure
+
+    Returns:
+        The keys in output order, or None for every measure
+
+    Raises:
+        ValueError: If a key is unknown
+    """
+    if measures is None:
+        return None
+    if isinstance(measures, str):
+        measures = measures.split(",")
+    requested = {name.strip().lower() for name in measures if name.strip()}
+    unknown = sorted(requested - RESULT_MEASURES.keys())
+    if unknown:
+        raise ValueError(
+            f"Medida desconhecida: {', '.join(unknown)}. Medidas disponíveis: {', '.join(RESULT_MEASURES)}."
+        )
+    return [key for key in RESULT_MEASURES if key in requested] or None
+
+
+def _format_measure(key: str, value: Any, mode_note: str) -> Any:
+    if key == "contagem":
+        return value
+    if key == "moda":
+        return mode_note if value is None else str(value)
+    return round(value, 3)
+
+
+def format_measures(
+    computed: Dict[str, Any],
+    keys: Optional[Iterable[str]] = None,
+    mode_note: str = MODE_UNAVAILABLE,
+) -> Dict[str, Any]:
+    """
+    Builds the statistics_analyzer result from computed measures, rounded
+    to 3 decimal places.
+
+    Args:
+        computed: Unrounded values by measure name, as compute_measures
+                  returns them
+        keys: Result keys to report, every one by default
+        mode_note: Reported as the mode when it is None
+
+    Returns:
+        Dictionary with the Portuguese result keys, in output order
+    """
+    keys = RESULT_MEASURES.keys() if keys is None else set(keys)
+    return {
+        key: _format_measure(key, computed[measure], mode_note)
+        for key, measure in RESULT_MEASURES.items()
+        if key in keys
+    }
+
+
+def format_summary(summary: Summary, mode_note: str = MODE_UNAVAILABLE) -> Dict[str, Any]:
+    """
+    Builds the statistics_analyzer result, rounded to 3 decimal places.
+
+    Args:
+        summary: The measures to report
+        mode_note: Reported as the mode when summary.mode is None
+
+    Returns:
+        Dictionary with the Portuguese result keys
+    """
+    computed = summary._asdict()
+    computed["range"] = summary.maximum - summary.minimum
+    computed["iqr"] = summary.q3 - summary.q1
+    return format_measures(computed, mode_note=mode_note)
+
+
+def single_value_result(value: float) -> Dict[str, Any]:
+    """Result reported when the dataset has a single value."""
+    return {
+        "contagem": 1,
+        "valor": value,
+        "nota": "Apenas um valor fornecido. A maioria das medidas estatísticas requer múltiplos valores."
+    }
+
+
+# Pool that splits large datasets across processes in approximate mode,
+# installed by enable_parallel_statistics (see src/tools/parallel.py);
+# None summarizes everything in-process
+_statistics_pool = None
+
+
+def get_statistics_pool() -> Any:
+    """Returns the installed statistics pool, or None when running serially."""
+    return _statistics_pool
+
+
+def set_statistics_pool(pool: Any) -> None:
+    """
+    Installs (or, with None, removes) a statistics pool.
+
+    A pool provides should_parallelize(count) -> bool and
+    summarize_array(values, k=..., max_distinct=...), which returns a
+    merged StreamingStatistics.
+    """
+    global _statistics_pool
+    _statistics_pool = pool
+
+
+def _analyze(
+    data: np.ndarray,
+    approximate: bool,
+    error_bound: float,
+    measures: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    The statistics_analyzer result for parsed, non-empty data.
+
+    With measures, only those result keys are reported; in exact mode only
+    they and their prerequisites are computed.
+    """
+    if len(data) == 1:
+        return single_value_result(float(data[0]))
+
+    if not approximate:
+        if measures is None:
+            return format_summary(summarize(data))
+        computed = compute_measures(data, [RESULT_MEASURES[key] for key in measures])
+        return format_measures(computed, measures)
+
+    sketch = QuantileSketch.for_error(error_bound)
+    pool = _statistics_pool
+    if pool is not None and pool.should_parallelize(len(data)):
+        # The mode is not reported, so the workers skip the frequency table
+        accumulator = pool.summarize_array(data, k=sketch.k, max_distinct=0)
+        sketch = accumulator.sketch
+        summary = accumulator.summary()._replace(mode=None)
+    else:
+        summary = summarize_approximate(data, sketch)
+    result = format_summary(summary, MODE_NOT_COMPUTED)
+    approximate_keys = [] if sketch.exact else APPROXIMATE_KEYS
+    if measures is not None:
+        result = {key: value for key, value in result.items() if key in measures}
+        approximate_keys = [key for key in approximate_keys if key in measures]
+    result["aproximados"] = list(approximate_keys)
+    result["erro_rank"] = round(sketch.rank_error, 4)
+    return result
 
 
 @tool
-def statistics_analyzer(numbers: str) -> str:
+def statistics_analyzer(
+    numbers: str,
+    approximate: bool = False,
+    error_bound: float = 0.01,
+    measures: Optional[List[str]] = None,
+) -> str:
     """
     Calculates comprehensive statistical measures for a dataset.
 
@@ -46,12 +394,38 @@ def statistics_analyzer(numbers: str) -> str:
     - Interquartile Range (IQR)
     - Value count
 
+    With measures, only the requested result keys are computed and
+    returned, e.g. ["media"] or ["mediana", "iqr"]; the measures they
+    depend on are computed once and shared (the IQR needs Q1 and Q3, the
+    standard deviation needs the variance, the median, quartiles and mode
+    share a single sort), and the mean alone needs no sort at all.
+
+    The numbers are registered and the result includes their handle
+    ("conjunto", e.g. "ds:3"); pass the handle as numbers in follow-up
+    calls instead of repeating the values. Results are memoized per
+    dataset, so repeated questions are answered without recomputing.
+
+    In approximate mode, median and quartiles are estimated with a
+    mergeable quantile sketch (the one used to combine sharded data), the
+    mode is not computed, and the output lists the approximate keys
+    ("aproximados") and the rank error bound ("erro_rank", a fraction of
+    the count). Large datasets are split across the statistics pool in
+    this mode, when one is installed (see enable_parallel_statistics).
+
     Args:
-        numbers: Comma-separated numbers as string.
+        numbers: Numbers as a string, separated by commas, semicolons,
+                spaces or newlines, or the handle of a dataset given
+                in an earlier result.
                 Examples:
                 - '10, 20, 30, 40, 50'
                 - '1.5, 2.3, 4.7, 8.9'
                 - '100, 200, 150, 175, 225, 180'
+                - 'ds:3'
+        approximate: Estimate median and quartiles instead of sorting
+        error_bound: Maximum rank error in approximate mode, between
+                     0.001 and 0.1 (default 0.01, i.e. 1% of the ranks)
+        measures: Result keys to compute, e.g. ["media", "desvio_padrao"];
+                  all of them by default
 
     Returns:
         A JSON-formatted string containing all statistical measures.
@@ -62,7 +436,7 @@ def statistics_analyzer(numbers: str) -> str:
           "contagem": 5,
           "media": 30.0,
           "mediana": 30.0,
-          "moda": "Sem moda única",
+          "moda": "10.0",
           "desvio_padrao": 14.142,
           "variancia": 200.0,
           "minimo": 10.0,
@@ -71,7 +445,8 @@ def statistics_analyzer(numbers: str) -> str:
           "q1": 20.0,
           "q2": 30.0,
           "q3": 40.0,
-          "iqr": 20.0
+          "iqr": 20.0,
+          "conjunto": "ds:1"
         }
     """
     try:
@@ -81,69 +456,43 @@ def statistics_analyzer(numbers: str) -> str:
                 "erro": "Entrada vazia fornecida. Por favor, forneça números separados por vírgula."
             }, indent=2, ensure_ascii=False)
 
-        # Parse comma-separated numbers
         try:
-            data = parse_numbers(numbers)
+            measures = parse_measures(measures)
         except ValueError as e:
+            return json.dumps({"erro": str(e)}, indent=2, ensure_ascii=False)
+
+        # Parse the numbers straight into a float64 array and register them,
+        # or look up the numbers registered under a handle
+        try:
+            data, handle = load_numbers(numbers)
+        except ValueError as e:
+            if is_handle(numbers):
+                return json.dumps({"erro": str(e)}, indent=2, ensure_ascii=False)
             return json.dumps({
                 "erro": f"Formato de entrada inválido: {str(e)}. Por favor, forneça números separados por vírgula como '1, 2, 3, 4, 5'."
             }, indent=2, ensure_ascii=False)
 
-        if not data:
+        if len(data) == 0:
             return json.dumps({
                 "erro": "Nenhum número válido encontrado na entrada."
             }, indent=2, ensure_ascii=False)
 
-        if len(data) == 1:
-            single_value = data[0]
+        if approximate and len(data) > 1 and not MIN_ERROR_BOUND <= error_bound <= MAX_ERROR_BOUND:
             return json.dumps({
-                "contagem": 1,
-                "valor": single_value,
-                "nota": "Apenas um valor fornecido. A maioria das medidas estatísticas requer múltiplos valores."
+                "erro": f"error_bound deve estar entre {MIN_ERROR_BOUND} e {MAX_ERROR_BOUND}."
             }, indent=2, ensure_ascii=False)
 
-        # Convert to numpy array for calculations
-        np_data = np.array(data)
-
-        # Calculate basic statistics
-        mean_val = float(np.mean(np_data))
-        median_val = float(np.median(np_data))
-        std_dev = float(np.std(np_data, ddof=1))  # Sample standard deviation
-        variance = float(np.var(np_data, ddof=1))  # Sample variance
-        min_val = float(np.min(np_data))
-        max_val = float(np.max(np_data))
-        range_val = max_val - min_val
-
-        # Calculate mode
-        try:
-            mode_val = statistics.mode(data)
-            mode_str = str(mode_val)
-        except statistics.StatisticsError:
-            # No unique mode
-            mode_str = "Sem moda única"
-
-        # Calculate quartiles
-        q1 = float(np.percentile(np_data, 25))
-        q2 = float(np.percentile(np_data, 50))  # Same as median
-        q3 = float(np.percentile(np_data, 75))
-        iqr = q3 - q1
-
-        # Build results dictionary
-        result = {
-            "contagem": len(data),
-            "media": round(mean_val, 3),
-            "mediana": round(median_val, 3),
-            "moda": mode_str,
-            "desvio_padrao": round(std_dev, 3),
-            "variancia": round(variance, 3),
-            "minimo": round(min_val, 3),
-            "maximo": round(max_val, 3),
-            "amplitude": round(range_val, 3),
-            "q1": round(q1, 3),
-            "q2": round(q2, 3),
-            "q3": round(q3, 3),
-            "iqr": round(iqr, 3)
-        }
+        if handle is None:
+            result = _analyze(data, approximate, error_bound, measures)
+        else:
+            key = (
+                "statistics_analyzer", approximate, error_bound if approximate else None,
+                None if measures is None else tuple(measures),
+            )
+            result = get_dataset_registry().memoize(
+                handle, key, lambda values: _analyze(values, approximate, error_bound, measures)
+            )
+            result = dict(result, conjunto=handle)
 
         return json.dumps(result, indent=2, ensure_ascii=False)
 
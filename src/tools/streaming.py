@@ -0,0 +1,304 @@
+"""
+One-pass statistics for series too large to hold in memory.
+
+StreamingStatistics consumes a dataset chunk by chunk and reports the same
+measures as statistics_analyzer, keeping only running moments, extremes,
+a bounded frequency table for the mode and a quantile sketch.
+"""
+import math
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Union
+
+import numpy as np
+
+from src.tools.parsing import SEPARATORS, parse_numbers
+from src.tools.sketch import QuantileSketch
+from src.tools.statistics import APPROXIMATE_KEYS, Summary, format_summary, single_value_result, summarize
+
+
+class StreamingStatistics:
+    """
+    Mergeable accumulator of the statistics_analyzer measures.
+
+    Mean and variance use Welford's update, generalized to whole chunks
+    (Chan et al.), so each chunk is reduced with NumPy and then combined
+    in constant time. Minimum, maximum and count are exact. The mode is
+    exact while there are at most max_distinct distinct values and is
+    reported as unavailable beyond that. Quartiles come from a
+    QuantileSketch.
+
+    Up to exact_limit values are also buffered as they are; while the
+    buffer holds the whole dataset, result() is computed from it and is
+    identical to statistics_analyzer's. Past that limit the buffer is
+    handed to the sketch and the quartiles become approximate.
+
+    Accumulators fed with different parts of a dataset can be merged, and
+    merging is the same as feeding one accumulator the parts in order.
+
+    Attributes:
+        count: Number of values seen
+        sketch: The quantile sketch
+    """
+
+    def __init__(
+        self,
+        k: int = 200,
+        exact_limit: int = 100_000,
+        max_distinct: int = 10_000,
+        seed: Optional[int] = 0,
+    ):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.has_nan = False
+        self.max_distinct = max_distinct
+        # Value -> count, in order of first occurrence; None once too large
+        self.frequencies: Optional[Dict[float, int]] = {}
+        self.first_value: Optional[float] = None
+        self.sketch = QuantileSketch(k=k, seed=seed)
+        self.exact_limit = exact_limit
+        # Chunks seen so far, while they fit in exact_limit; None afterwards
+        self._buffer: Optional[List[np.ndarray]] = []
+
+    def __repr__(self) -> str:
+        return f"StreamingStatistics(count={self.count}, mean={self.mean!r}, exact={self.exact})"
+
+    @property
+    def exact(self) -> bool:
+        """Whether every measure is exact, as computed by statistics_analyzer."""
+        return self._buffer is not None or self.sketch.exact
+
+    def _buffered(self) -> np.ndarray:
+        return np.concatenate(self._buffer) if self._buffer else np.empty(0, dtype=np.float64)
+
+    def _flush(self) -> None:
+        """Hands the buffered values to the sketch and stops buffering."""
+        if self._buffer is not None:
+            values = self._buffered()
+            self._buffer = None
+            self.sketch.update(values)
+
+    def _add_moments(self, count: int, mean: float, m2: float) -> None:
+        """Combines the moments of another group of values into these."""
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def _add_frequencies(self, values: np.ndarray, counts: np.ndarray) -> None:
+        if self.frequencies is None:
+            return
+        if len(values) > self.max_distinct:
+            self.frequencies = None
+            return
+        for value, count in zip(values.tolist(), counts.tolist()):
+            self.frequencies[value] = self.frequencies.get(value, 0) + count
+        if len(self.frequencies) > self.max_distinct:
+            self.frequencies = None
+
+    def update(self, chunk: Union[str, Iterable[float], np.ndarray]) -> "StreamingStatistics":
+        """
+        Adds a chunk of values.
+
+        Args:
+            chunk: Array-like of numbers, or text parsed with parse_numbers
+
+        Returns:
+            The accumulator itself, so calls can be chained
+
+        Raises:
+            NumberParseError: If a text chunk contains an invalid number
+        """
+        values = parse_numbers(chunk) if isinstance(chunk, str) else np.array(chunk, dtype=np.float64).ravel()
+        if len(values) == 0:
+            return self
+
+        if self.first_value is None:
+            self.first_value = float(values[0])
+
+        mean = float(values.sum()) / len(values)
+        deviations = values - mean
+        self._add_moments(len(values), mean, float(np.dot(deviations, deviations)))
+
+        if self._buffer is not None:
+            self._buffer.append(values)
+
+        nan = np.isnan(values)
+        if nan.any():
+            self.has_nan = True
+            values = values[~nan]
+        if len(values):
+            self.minimum = min(self.minimum, float(values.min()))
+            self.maximum = max(self.maximum, float(values.max()))
+
+        if self.frequencies is not None and len(values) > 2 * self.max_distinct:
+            # A prefix with too many distinct values settles it without
+            # sorting the whole chunk
+            if len(np.unique(values[:2 * self.max_distinct])) > self.max_distinct:
+                self.frequencies = None
+
+        if self.frequencies is not None:
+            distinct, first, counts = np.unique(values, return_index=True, return_counts=True)
+            order = np.argsort(first, kind="stable")
+            self._add_frequencies(distinct[order], counts[order])
+
+        if self._buffer is None:
+            self.sketch.update(values)
+        elif self.count > self.exact_limit:
+            self._flush()
+        return self
+
+    def merge(self, other: "StreamingStatistics") -> "StreamingStatistics":
+        """
+        Adds everything another accumulator has seen, as if its values came
+        after the ones seen here.
+
+        Args:
+            other: Accumulator with the same sketch size; it is not modified
+
+        Returns:
+            The accumulator itself, so calls can be chained
+        """
+        if other.count == 0:
+            return self
+        if self.first_value is None:
+            self.first_value = other.first_value
+
+        if self._buffer is not None and other._buffer is not None and self.count + other.count <= self.exact_limit:
+            self._buffer.extend(other._buffer)
+        else:
+            self._flush()
+            if other._buffer is not None:
+                self.sketch.update(other._buffered())
+            self.sketch.merge(other.sketch)
+
+        self._add_moments(other.count, other.mean, other.m2)
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.has_nan = self.has_nan or other.has_nan
+
+        if other.frequencies is None:
+            self.frequencies = None
+        elif self.frequencies is not None:
+            self._add_frequencies(np.array(list(other.frequencies)), np.array(list(other.frequencies.values())))
+        return self
+
+    def _mode(self) -> Optional[float]:
+        """Most frequent value, ties going to the first seen; None if unknown."""
+        if self.frequencies is None:
+            return None
+        best = max(self.frequencies.values(), default=1)
+        if best == 1:
+            # All values distinct, or only NaN, which never repeat
+            return self.first_value
+        return next(value for value, count in self.frequencies.items() if count == best)
+
+    def summary(self) -> Summary:
+        """
+        Returns the unrounded measures.
+
+        Raises:
+            ValueError: If fewer than two values were seen
+        """
+        if self.count < 2:
+            raise ValueError("At least two values are needed")
+
+        if self._buffer is not None:
+            return summarize(self._buffered())
+
+        variance = self.m2 / (self.count - 1)
+        if self.has_nan:
+            nan = math.nan
+            return Summary(self.count, nan, nan, self._mode(), nan, nan, nan, nan, nan, nan, nan)
+
+        q1, q2, q3 = self.sketch.quantiles([0.25, 0.5, 0.75]).tolist()
+        return Summary(
+            count=self.count,
+            mean=self.mean,
+            median=q2,
+            mode=self._mode(),
+            std_dev=math.sqrt(variance),
+            variance=variance,
+            minimum=self.minimum,
+            maximum=self.maximum,
+            q1=q1,
+            q2=q2,
+            q3=q3,
+        )
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Returns the statistics_analyzer result for everything seen so far.
+
+        The keys are the same as statistics_analyzer's, plus "aproximados":
+        the keys whose values were estimated by the quantile sketch (empty
+        while the result is exact).
+
+        Raises:
+            ValueError: If no values were seen
+        """
+        if self.count == 0:
+            raise ValueError("Nenhum número válido encontrado na entrada.")
+        if self.count == 1:
+            return single_value_result(self.first_value)
+
+        result = format_summary(self.summary())
+        result["aproximados"] = [] if self.exact else list(APPROXIMATE_KEYS)
+        return result
+
+
+def read_number_chunks(file: TextIO, chunk_size: int = 1 << 20) -> Iterator[np.ndarray]:
+    """
+    Reads numbers from a text file in chunks of about chunk_size characters.
+
+    Chunks are cut at a separator, so no number is split in two.
+
+    Args:
+        file: Text file with numbers separated as parse_numbers accepts
+        chunk_size: Characters read at a time
+
+    Yields:
+        Float64 arrays of consecutive numbers
+
+    Raises:
+        NumberParseError: If the file contains an invalid number
+    """
+    pending = ""
+    while True:
+        block = file.read(chunk_size)
+        if not block:
+            break
+        text = pending + block
+        cut = max(text.rfind(separator) for separator in SEPARATORS + " ")
+        if cut < 0:
+            pending = text
+            continue
+        pending = text[cut + 1:]
+        values = parse_numbers(text[:cut + 1])
+        if len(values):
+            yield values
+    values = parse_numbers(pending)
+    if len(values):
+        yield values
+
+
+def analyze_stream(chunks: Iterable[Union[str, Iterable[float], np.ndarray]], k: int = 200) -> Dict[str, Any]:
+    """
+    Computes the statistics_analyzer result over an iterable of chunks.
+
+    Args:
+        chunks: Arrays, lists or text chunks of numbers, e.g. from
+                read_number_chunks
+        k: Size of the quantile sketch
+
+    Returns:
+        The result of StreamingStatistics.result()
+    """
+    accumulator = StreamingStatistics(k=k)
+    for chunk in chunks:
+        accumulator.update(chunk)
+    return accumulator.result()
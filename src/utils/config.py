@@ -43,3 +43,31 @@ if LOG_LEVEL not in VALID_LOG_LEVELS:
         f"LOG_LEVEL inválido: {LOG_LEVEL}\n"
         f"Deve ser um dos seguintes: {', '.join(VALID_LOG_LEVELS)}"
     )
+
+# Number of worker processes for expensive calculator evaluations
+# (0 evaluates everything inside the agent process)
+CALCULATOR_SANDBOX_WORKERS = os.getenv("CALCULATOR_SANDBOX_WORKERS", "0")
+if not CALCULATOR_SANDBOX_WORKERS.isdigit():
+    raise ValueError(
+        f"CALCULATOR_SANDBOX_WORKERS inválido: {CALCULATOR_SANDBOX_WORKERS}\n"
+        "Deve ser um número inteiro maior ou igual a zero"
+    )
+CALCULATOR_SANDBOX_WORKERS = int(CALCULATOR_SANDBOX_WORKERS)
+
+# Directory file_statistics may read datasets from; relative paths given to
+# the tool are resolved against it
+STATISTICS_DATA_DIR = os.getenv("STATISTICS_DATA_DIR", "data")
+
+# Number of worker processes that summarize very large files and datasets
+# in parallel (0 summarizes everything inside the agent process)
+STATISTICS_WORKERS = os.getenv("STATISTICS_WORKERS", "0")
+if not STATISTICS_WORKERS.isdigit():
+    raise ValueError(
+        f"STATISTICS_WORKERS inválido: {STATISTICS_WORKERS}\n"
+        "Deve ser um número inteiro maior ou igual a zero"
+    )
+STATISTICS_WORKERS = int(STATISTICS_WORKERS)
+
+# Holiday file of the business-day operations; empty uses the bundled
+# Brazilian national holidays
+BUSINESS_HOLIDAYS_FILE = os.getenv("BUSINESS_HOLIDAYS_FILE", "")
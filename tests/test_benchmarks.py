@@ -0,0 +1,58 @@
+"""
+Testes unitários para a suíte de benchmarks das ferramentas.
+
+Testa a detecção de regressões e a leitura/escrita das baselines, sem
+depender dos tempos medidos na máquina.
+"""
+from benchmarks.bench_tools import (
+    BenchCase,
+    build_cases,
+    compare_results,
+    load_baseline,
+    run_cases,
+    save_baseline,
+)
+
+
+def _result(latency):
+    return {"latency_us": latency, "calls_per_s": 1e6 / latency, "items_per_s": 1e6 / latency}
+
+
+class TestBenchmarkComparison:
+    """Testes para a comparação com a baseline."""
+
+    def test_regression_past_threshold(self):
+        """Casos mais lentos que o limite são apontados como regressão."""
+        baseline = {"a": _result(10.0), "b": _result(10.0)}
+        results = {"a": _result(13.0), "b": _result(11.0)}
+        regressions = compare_results(results, baseline, threshold=25.0)
+        assert [regression.name for regression in regressions] == ["a"]
+        assert round(regressions[0].change_percent) == 30
+
+    def test_faster_cases_are_not_regressions(self):
+        """Casos mais rápidos nunca falham."""
+        assert compare_results({"a": _result(5.0)}, {"a": _result(10.0)}, threshold=0.0) == []
+
+    def test_cases_missing_from_baseline_are_ignored(self):
+        """Casos novos ou removidos não quebram a comparação."""
+        assert compare_results({"novo": _result(100.0)}, {"antigo": _result(1.0)}) == []
+
+
+class TestBenchmarkBaseline:
+    """Testes para a execução dos casos e o arquivo de baseline."""
+
+    def test_save_and_load(self, tmp_path):
+        """A baseline salva é lida de volta com os mesmos resultados."""
+        results = run_cases([BenchCase("soma", lambda: 2 + 2, 1)], min_time=0.001, repeat=2)
+        path = tmp_path / "baseline.json"
+        save_baseline(path, results)
+        assert load_baseline(path) == results
+        assert results["soma"]["latency_us"] > 0
+
+    def test_cases_cover_all_tools(self):
+        """A suíte cobre as três ferramentas, por função e por .invoke."""
+        names = [case.name for case in build_cases()]
+        for prefix in ("calculator.evaluate", "calculator.invoke", "statistics.analyze",
+                       "statistics.invoke", "date.calculate", "date.invoke"):
+            assert any(name.startswith(prefix) for name in names)
+        assert len(names) == len(set(names))
@@ -0,0 +1,168 @@
+"""
+Testes unitários para as operações com datas em lote.
+
+Testa a leitura vetorizada das datas, a aritmética sobre datetime64[D] e a
+ferramenta bulk_date_calculator, comparando com a date_calculator.
+"""
+import json
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.tools.bulk_dates import (
+    bulk_date_calculator,
+    bulk_dates,
+    format_dates,
+    full_months,
+    parse_day_counts,
+    parse_dates,
+    shift_months,
+    weekdays,
+    ymd_differences,
+)
+from src.tools.date_calculator import DAY_NAMES, add_months, diff_ymd, months_between
+from src.tools.parsing import split_tokens
+
+
+@pytest.fixture
+def sample_dates():
+    rng = np.random.default_rng(0)
+    return [date(1900, 1, 1) + timedelta(days=int(offset)) for offset in rng.integers(0, 80_000, 500)]
+
+
+class TestParseDates:
+    """Testes para a leitura das datas."""
+
+    def test_separators(self):
+        """Aceita os mesmos separadores das listas de números."""
+        assert split_tokens("2024-01-01, 2024-02-01;2024-03-01\n2024-04-01") == [
+            "2024-01-01", "2024-02-01", "2024-03-01", "2024-04-01",
+        ]
+        assert format_dates(parse_dates("2024-01-01; 2024-02-29")) == ["2024-01-01", "2024-02-29"]
+
+    def test_matches_python_dates(self, sample_dates):
+        """As datas lidas coincidem com as do módulo datetime."""
+        parsed = parse_dates(", ".join(day.isoformat() for day in sample_dates))
+        assert parsed.tolist() == sample_dates
+
+    def test_accepted_like_date_calculator(self):
+        """Formatos aceitos pela date_calculator também são aceitos em lote."""
+        assert format_dates(parse_dates("2024-1-5, 0001-01-01, 9999-12-31")) == [
+            "2024-01-05", "0001-01-01", "9999-12-31",
+        ]
+
+    @pytest.mark.parametrize("token", ["2023-02-29", "2024-13-01", "0000-01-01", "2024/01/01", "ontem"])
+    def test_invalid_date_position(self, token):
+        """Datas inválidas informam a posição da primeira."""
+        with pytest.raises(ValueError, match=r"Invalid date format: .* \(data 2\)"):
+            parse_dates(f"2024-01-01, {token}, 2024-01-03")
+
+
+class TestDateArithmetic:
+    """Testes para a aritmética vetorizada."""
+
+    def test_weekdays(self, sample_dates):
+        """O dia da semana coincide com date.weekday()."""
+        assert weekdays(np.array(sample_dates, dtype="datetime64[D]")).tolist() == [
+            day.weekday() for day in sample_dates
+        ]
+
+    def test_day_counts(self):
+        """Números de dias devem ser inteiros e dentro do intervalo."""
+        assert parse_day_counts("30, -2, 1e3").tolist() == [30, -2, 1000]
+        with pytest.raises(ValueError, match="use inteiros"):
+            parse_day_counts("1, 2.5")
+        with pytest.raises(ValueError, match="intervalo"):
+            parse_day_counts("1e30")
+
+    def test_add_days_matches_timedelta(self, sample_dates):
+        """Somar dias coincide com date + timedelta, um valor por data."""
+        offsets = list(range(-250, 250))
+        result = bulk_dates("add_days", [day.isoformat() for day in sample_dates], [str(o) for o in offsets])
+        assert result["datas"] == [(day + timedelta(days=o)).isoformat() for day, o in zip(sample_dates, offsets)]
+
+
+class TestMonthArithmetic:
+    """Testes para as operações vetorizadas com meses e anos."""
+
+    @pytest.fixture
+    def pairs(self, sample_dates):
+        first = np.array(sample_dates, dtype="datetime64[D]")
+        # Metade das datas vai para o fim do mês, onde o ajuste acontece
+        first[::2] = (first[::2].astype("datetime64[M]") + 1).astype("datetime64[D]") - 1
+        second = first[::-1].copy()
+        return first, second
+
+    def test_shift_months_matches_single(self, pairs):
+        """Coincide com add_months da date_calculator, inclusive no fim do mês."""
+        first, _ = pairs
+        months = np.arange(-250, 250)
+        expected = [
+            add_months(datetime.fromisoformat(day), int(n)).strftime("%Y-%m-%d")
+            for day, n in zip(format_dates(first), months)
+        ]
+        assert format_dates(shift_months(first, months)) == expected
+
+    def test_differences_match_single(self, pairs):
+        """months_between e diff_ymd coincidem com as versões escalares."""
+        first, second = pairs
+        years, months, days = ymd_differences(first, second)
+        full = full_months(first, second)
+        for index, (a, b) in enumerate(zip(format_dates(first), format_dates(second))):
+            a, b = datetime.fromisoformat(a), datetime.fromisoformat(b)
+            assert full[index] == months_between(a, b)
+            assert (years[index], months[index], days[index]) == diff_ymd(a, b)
+
+    def test_tool(self):
+        """diff_ymd retorna colunas de anos, meses e dias; add_years ajusta 29 de fevereiro."""
+        result = json.loads(bulk_date_calculator.invoke({
+            "operation": "diff_ymd", "dates": "2020-02-29, 2024-03-01", "values": "2024-03-15, 2024-01-31",
+        }))
+        assert (result["anos"], result["meses"], result["dias"]) == ([4, 0], [0, 1], [15, 1])
+        result = json.loads(bulk_date_calculator.invoke({
+            "operation": "add_years", "dates": "2024-02-29, 2024-03-01", "values": "1",
+        }))
+        assert result["datas"] == ["2025-02-28", "2025-03-01"]
+        assert "meses" in json.loads(bulk_date_calculator.invoke({
+            "operation": "add_months", "dates": "2024-01-01", "values": "1.5",
+        }))["erro"]
+
+
+class TestBulkDateCalculatorTool:
+    """Testes para a ferramenta bulk_date_calculator."""
+
+    def test_difference(self):
+        """A diferença é em dias absolutos, como na date_calculator."""
+        result = json.loads(bulk_date_calculator.invoke({
+            "operation": "difference",
+            "dates": "2024-01-01, 2024-12-31",
+            "values": "2024-12-31, 2024-01-01",
+        }))
+        assert result == {"operacao": "difference", "contagem": 2, "dias": [365, 365]}
+
+    def test_single_value_for_all_dates(self):
+        """Um único valor vale para todas as datas."""
+        result = json.loads(bulk_date_calculator.invoke({
+            "operation": "subtract_days", "dates": "2024-03-01 2025-03-01", "values": "1",
+        }))
+        assert result["datas"] == ["2024-02-29", "2025-02-28"]
+
+    def test_day_of_week(self):
+        """Os nomes dos dias são os mesmos da date_calculator."""
+        result = json.loads(bulk_date_calculator.invoke({
+            "operation": "day_of_week", "dates": "2024-01-01, 2024-01-06",
+        }))
+        assert result["dias_da_semana"] == [DAY_NAMES[0], DAY_NAMES[5]]
+
+    @pytest.mark.parametrize("arguments,message", [
+        ({"operation": "multiply", "dates": "2024-01-01"}, "Operação inválida"),
+        ({"operation": "day_of_week", "dates": ""}, "Nenhuma data"),
+        ({"operation": "add_days", "dates": "2024-01-01"}, "requer values"),
+        ({"operation": "add_days", "dates": "2024-01-01, 2024-01-02", "values": "1, 2, 3"}, "um por data"),
+        ({"operation": "add_days", "dates": "9999-12-01", "values": "31"}, "intervalo"),
+        ({"operation": "difference", "dates": "2024-01-01", "values": "2024-02-30"}, "Invalid date format"),
+    ])
+    def test_errors(self, arguments, message):
+        """Entradas inválidas geram mensagens de erro."""
+        assert message in json.loads(bulk_date_calculator.invoke(arguments))["erro"]
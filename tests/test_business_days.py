@@ -0,0 +1,168 @@
+"""
+Testes unitários para o calendário de dias úteis.
+
+Testa o cálculo da Páscoa, a leitura do arquivo de feriados, as contagens e
+deslocamentos em dias úteis e as operações de dias úteis da date_calculator
+e da bulk_date_calculator.
+"""
+import json
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from src.tools.bulk_dates import bulk_date_calculator
+from src.tools.business_days import (
+    BusinessCalendar,
+    easter_sundays,
+    get_business_calendar,
+    load_holidays,
+    set_holiday_file,
+)
+from src.tools.date_calculator import date_calculator
+
+
+@pytest.fixture(autouse=True)
+def default_holidays():
+    set_holiday_file(None)
+    yield
+    set_holiday_file(None)
+
+
+def day(text):
+    return np.datetime64(text, "D")
+
+
+class TestHolidayFile:
+    """Testes para a leitura e expansão das regras de feriados."""
+
+    def test_easter(self):
+        """Domingos de Páscoa conhecidos."""
+        dates = easter_sundays(np.array([1961, 2000, 2024, 2025, 2285]))
+        assert dates.astype(str).tolist() == ["1961-04-02", "2000-04-23", "2024-03-31", "2025-04-20", "2285-03-22"]
+
+    def test_brazilian_holidays_2024(self):
+        """O arquivo padrão traz os feriados nacionais de 2024, com os nomes."""
+        calendar = get_business_calendar()
+        holidays = calendar.holidays_between(day("2024-01-01"), day("2024-12-31"))
+        assert [iso for iso, _ in holidays] == [
+            "2024-01-01", "2024-03-29", "2024-04-21", "2024-05-01", "2024-09-07",
+            "2024-10-12", "2024-11-02", "2024-11-15", "2024-11-20", "2024-12-25",
+        ]
+        assert calendar.holiday_name(day("2024-03-29")) == "Sexta-feira Santa"
+
+    def test_first_year(self):
+        """A Consciência Negra só é feriado nacional a partir de 2024."""
+        calendar = get_business_calendar()
+        assert calendar.holiday_name(day("2023-11-20")) is None
+        assert calendar.holiday_name(day("2030-11-20")) is not None
+
+    def test_custom_file(self, tmp_path):
+        """Regras fixas, relativas à Páscoa e datas únicas; a primeira regra de uma data dá o nome."""
+        path = tmp_path / "feriados.txt"
+        path.write_text(
+            "# local\n02-29; Bissexto\neaster-47; Carnaval\n2024-02-13; Outro\n2024-06-13; Santo Antônio\n",
+            encoding="utf-8",
+        )
+        dates, names = load_holidays(path)
+        assert "2023-03-01" not in dates.astype(str)
+        feb_2024 = dict(zip(dates.astype(str), names))
+        assert feb_2024["2024-02-29"] == "Bissexto"
+        assert feb_2024["2024-02-13"] == "Carnaval"
+        assert feb_2024["2024-06-13"] == "Santo Antônio"
+
+    @pytest.mark.parametrize("line,message", [
+        ("01-01", "Linha 1"),
+        ("13-01; Erro", "data inválida"),
+        ("natal; Natal", "regra desconhecida"),
+        ("01-01; Ano; dois mil", "ano inicial"),
+    ])
+    def test_invalid_lines(self, tmp_path, line, message):
+        """Linhas inválidas informam o número da linha e o problema."""
+        path = tmp_path / "feriados.txt"
+        path.write_text(line + "\n", encoding="utf-8")
+        with pytest.raises(ValueError, match=message):
+            load_holidays(path)
+
+    def test_missing_file(self, tmp_path):
+        """Um arquivo de feriados inexistente gera erro ao carregar o calendário."""
+        set_holiday_file(tmp_path / "nao_existe.txt")
+        with pytest.raises(ValueError, match="não encontrado"):
+            get_business_calendar()
+
+
+class TestBusinessCalendar:
+    """Testes para contagens e deslocamentos em dias úteis."""
+
+    def test_count_matches_day_by_day(self):
+        """A contagem coincide com a contagem dia a dia, incluindo as duas datas."""
+        calendar = get_business_calendar()
+        holidays = set(calendar.holidays.astype("datetime64[D]").astype(object))
+        rng = np.random.default_rng(0)
+        for offset, length in rng.integers(0, 400, (30, 2)):
+            start = date(2023, 1, 1) + timedelta(days=int(offset))
+            end = start + timedelta(days=int(length))
+            expected = sum(
+                1 for n in range(length + 1)
+                if (start + timedelta(days=n)).weekday() < 5 and start + timedelta(days=n) not in holidays
+            )
+            assert calendar.count(np.datetime64(end), np.datetime64(start)) == expected
+
+    def test_offset_rolls_like_workday(self):
+        """Datas não úteis contam a partir do dia útil anterior (para frente) ou seguinte (para trás)."""
+        calendar = get_business_calendar()
+        assert str(calendar.offset(day("2024-01-06"), 1)) == "2024-01-08"
+        assert str(calendar.offset(day("2024-01-06"), -1)) == "2024-01-05"
+        assert str(calendar.offset(day("2024-01-06"), 0)) == "2024-01-08"
+        assert str(calendar.offset(day("2024-03-28"), 1)) == "2024-04-01"
+
+    def test_vectorized(self):
+        """Os métodos aceitam arrays de datas."""
+        calendar = BusinessCalendar(np.array(["2024-01-03"], dtype="datetime64[D]"), np.array(["X"], dtype=object))
+        dates = np.array(["2024-01-01", "2024-01-03", "2024-01-06"], dtype="datetime64[D]")
+        assert calendar.is_business_day(dates).tolist() == [True, False, False]
+        assert calendar.count(dates, day("2024-01-05")).tolist() == [4, 2, 1]
+
+
+class TestDateCalculatorBusinessDays:
+    """Testes para as operações de dias úteis da date_calculator."""
+
+    @pytest.mark.parametrize("operation,date1,date2,expected", [
+        ("business_days", "2024-03-31", "2024-03-01", "há 20 dias úteis"),
+        ("add_business_days", "2024-01-01", "15", "é 2024-01-22"),
+        ("subtract_business_days", "2024-04-01", "1", "é 2024-03-28"),
+        ("is_business_day", "2024-11-20", None, "feriado: Dia Nacional de Zumbi"),
+        ("is_business_day", "2024-11-23", None, "fim de semana"),
+        ("is_business_day", "2024-11-21", None, "é dia útil"),
+        ("add_business_days", "9999-12-30", "5", "fora do intervalo"),
+        ("add_business_days", "2024-01-01", "x", "inteiro válido"),
+        ("business_days", "2024-01-01", None, "requer tanto date1 quanto date2"),
+    ])
+    def test_operations(self, operation, date1, date2, expected):
+        """Cada operação de dias úteis responde em português."""
+        arguments = {"operation": operation, "date1": date1}
+        if date2 is not None:
+            arguments["date2"] = date2
+        assert expected in date_calculator.invoke(arguments)
+
+
+class TestBulkBusinessDays:
+    """Testes para as operações de dias úteis da bulk_date_calculator."""
+
+    def test_count_and_offset(self):
+        """Contagens e deslocamentos de várias datas em uma única chamada."""
+        counts = json.loads(bulk_date_calculator.invoke({
+            "operation": "business_days", "dates": "2024-03-01, 2024-01-01", "values": "2024-03-31, 2024-12-31",
+        }))
+        assert counts["dias_uteis"] == [20, 256]
+        shifted = json.loads(bulk_date_calculator.invoke({
+            "operation": "add_business_days", "dates": "2024-01-01, 2024-01-06", "values": "15, 1",
+        }))
+        assert shifted["datas"] == ["2024-01-22", "2024-01-08"]
+
+    def test_is_business_day(self):
+        """Retorna true/false para cada data."""
+        result = json.loads(bulk_date_calculator.invoke({
+            "operation": "is_business_day", "dates": "2024-11-20 2024-11-21",
+        }))
+        assert result["dia_util"] == [False, True]
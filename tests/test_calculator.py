@@ -3,8 +3,41 @@ Testes unitários para a ferramenta de calculadora.
 
 Testa operações básicas, funções avançadas e tratamento de erros.
 """
+import json
+import ast
+import math
+from fractions import Fraction
+
+import numpy as np
 import pytest
-from src.tools.calculator import calculator
+from src.tools.calculator import (
+    calculator,
+    calculator_batch,
+    vectorized_calculator,
+    evaluate_vectorized,
+    evaluate_expression,
+    format_result,
+    estimate_cost,
+    EvaluationBudget,
+    BudgetExceededError,
+    EvaluationTimeoutError,
+    get_evaluation_budget,
+    set_evaluation_budget,
+    get_calculator_metrics,
+    reset_calculator_metrics,
+    safe_eval,
+    compile_program,
+    run_program,
+    parse_expression,
+    compile_expression,
+    optimize_program,
+    get_compiled_expression,
+    get_expression_cache_stats,
+    set_expression_cache_size,
+    clear_expression_cache,
+    normalize_expression,
+    DEFAULT_CACHE_SIZE,
+)
 
 
 class TestCalculatorBasicOperations:
@@ -265,3 +298,674 @@ class TestCalculatorEdgeCases:
         result = calculator("e")
         assert "Resultado:" in result
         assert "2.7" in result
+
+
+class TestCalculatorExpressionCache:
+    """Testes para a compilação e o cache de expressões."""
+
+    def setup_method(self):
+        """Garante um cache vazio e com tamanho padrão em cada teste."""
+        set_expression_cache_size(DEFAULT_CACHE_SIZE)
+        clear_expression_cache()
+
+    def teardown_method(self):
+        set_expression_cache_size(DEFAULT_CACHE_SIZE)
+        clear_expression_cache()
+
+    def test_compiled_expression_is_reusable(self):
+        """Uma expressão compilada pode ser avaliada várias vezes."""
+        compiled = compile_expression("sqrt(16) + 2 * 3")
+        assert compiled() == 10.0
+        assert compiled() == 10.0
+
+    def test_normalization(self):
+        """Espaços extras não geram entradas diferentes no cache."""
+        assert normalize_expression("  2   +\t2 ") == "2 + 2"
+
+    def test_repeated_expression_hits_cache(self):
+        """Expressões repetidas não são recompiladas."""
+        first = get_compiled_expression("2 + 2")
+        second = get_compiled_expression(" 2  +  2 ")
+        assert first is second
+
+        stats = get_expression_cache_stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+        assert stats["size"] == 1
+
+    def test_tool_uses_cache(self):
+        """A ferramenta calculator reaproveita a expressão compilada."""
+        for _ in range(3):
+            assert "4" in calculator("2 + 2")
+        stats = get_expression_cache_stats()
+        assert stats["hits"] == 2
+
+    def test_lru_eviction(self):
+        """Entradas menos usadas recentemente são descartadas."""
+        set_expression_cache_size(2)
+        get_compiled_expression("1 + 1")
+        get_compiled_expression("2 + 2")
+        get_compiled_expression("1 + 1")  # 1 + 1 passa a ser o mais recente
+        get_compiled_expression("3 + 3")  # descarta 2 + 2
+
+        stats = get_expression_cache_stats()
+        assert stats["evictions"] == 1
+        assert stats["size"] == 2
+
+        get_compiled_expression("1 + 1")
+        assert get_expression_cache_stats()["hits"] == 2
+
+    def test_resize_and_disable(self):
+        """O tamanho do cache é configurável e 0 desativa o cache."""
+        get_compiled_expression("1 + 1")
+        get_compiled_expression("2 + 2")
+        set_expression_cache_size(0)
+
+        stats = get_expression_cache_stats()
+        assert stats["size"] == 0
+        assert stats["evictions"] == 2
+
+        get_compiled_expression("1 + 1")
+        assert get_expression_cache_stats()["size"] == 0
+
+    def test_clear_resets_counters(self):
+        """Limpar o cache zera as entradas e os contadores."""
+        get_compiled_expression("1 + 1")
+        get_compiled_expression("1 + 1")
+        clear_expression_cache()
+        assert get_expression_cache_stats() == {
+            "hits": 0, "misses": 0, "evictions": 0,
+            "size": 0, "maxsize": DEFAULT_CACHE_SIZE,
+        }
+
+    def test_invalid_expression_not_cached(self):
+        """Expressões inválidas continuam retornando erro e não são armazenadas."""
+        assert "Erro" in calculator("unsupported_func(10)")
+        assert "Erro" in calculator("2 +")
+        assert get_expression_cache_stats()["size"] == 0
+
+    def test_runtime_errors_still_raised(self):
+        """Erros de execução ocorrem a cada avaliação, mesmo com cache."""
+        for _ in range(2):
+            result = calculator("10 / 0")
+            assert "Erro" in result
+            assert "zero" in result.lower()
+
+
+class TestCalculatorVectorized:
+    """Testes para a avaliação vetorizada com variáveis."""
+
+    def test_vectorized_basic(self):
+        """Avalia a expressão para todas as linhas de uma vez."""
+        result = evaluate_vectorized("a * 2 + b", {"a": [1, 2, 3], "b": [10, 20, 30]})
+        assert isinstance(result, np.ndarray)
+        assert result.tolist() == [12.0, 24.0, 36.0]
+
+    @pytest.mark.parametrize("expression", [
+        "a * sin(b) + c",
+        "sqrt(a) + log(c)",
+        "log(c, 2) + log10(a)",
+        "pow(a, 2) - abs(b) / 3",
+        "ceil(b) + floor(a / 3) + exp(b) - cos(pi * b)",
+        "-a ** 2 + e",
+    ])
+    def test_matches_scalar_results(self, expression):
+        """Os resultados vetorizados são iguais aos escalares linha a linha."""
+        rows = {"a": [1.0, 4.0, 9.5], "b": [-0.5, 0.25, 2.0], "c": [1.0, 8.0, 100.0]}
+        vectorized = evaluate_vectorized(expression, rows)
+        scalar = compile_expression(expression, variables=rows.keys())
+
+        for i in range(3):
+            expected = scalar({name: values[i] for name, values in rows.items()})
+            assert vectorized[i] == pytest.approx(expected, rel=1e-12)
+
+    def test_scalar_broadcast(self):
+        """Escalares são combinados com colunas."""
+        result = evaluate_vectorized("x + k", {"x": [1, 2, 3], "k": 10})
+        assert result.tolist() == [11.0, 12.0, 13.0]
+
+    def test_values_as_text(self):
+        """Colunas podem ser dadas como texto, com o parser compartilhado."""
+        result = evaluate_vectorized("a + b", {"a": "1; 2\n3", "b": [10, 20, 30]})
+        assert result.tolist() == [11.0, 22.0, 33.0]
+
+    def test_invalid_text_value(self):
+        """Um valor inválido no texto é informado com sua posição."""
+        with pytest.raises(ValueError, match="'x2' for variable 'a' at position 4"):
+            evaluate_vectorized("a * 2", {"a": "1, x2"})
+
+    def test_constant_expression_broadcast(self):
+        """Expressões sem variáveis retornam um valor por linha."""
+        result = evaluate_vectorized("2 + 2", {"x": [1, 2, 3]})
+        assert result.tolist() == [4.0, 4.0, 4.0]
+
+    def test_division_by_zero(self):
+        """Divisão por zero em qualquer linha gera erro, como no modo escalar."""
+        with pytest.raises(ZeroDivisionError):
+            evaluate_vectorized("1 / x", {"x": [1, 0, 2]})
+
+    def test_domain_error(self):
+        """Erros de domínio geram erro em vez de NaN."""
+        with pytest.raises(ValueError):
+            evaluate_vectorized("sqrt(x)", {"x": [4, -1]})
+
+    def test_mismatched_lengths(self):
+        """Colunas de tamanhos diferentes são rejeitadas."""
+        with pytest.raises(ValueError):
+            evaluate_vectorized("a + b", {"a": [1, 2, 3], "b": [1, 2]})
+
+    def test_unknown_variable(self):
+        """Variáveis não fornecidas continuam sendo rejeitadas."""
+        with pytest.raises(ValueError):
+            evaluate_vectorized("a + z", {"a": [1, 2]})
+
+    def test_variable_cannot_shadow_constant(self):
+        """Variáveis não podem sobrescrever funções ou constantes."""
+        with pytest.raises(ValueError):
+            evaluate_vectorized("pi + 1", {"pi": [1, 2]})
+
+    def test_scalar_calculator_rejects_variables(self):
+        """A calculadora escalar continua sem aceitar variáveis livres."""
+        assert "Erro" in calculator("x + 1")
+
+    def test_tool_returns_json(self):
+        """A ferramenta retorna um JSON com os resultados."""
+        result = vectorized_calculator.invoke({
+            "expression": "x ** 2 + 1",
+            "variables": {"x": [1, 2, 3]},
+        })
+        data = json.loads(result)
+        assert data == {"contagem": 3, "resultados": [2.0, 5.0, 10.0]}
+
+    def test_tool_reports_errors(self):
+        """Erros são retornados no campo 'erro'."""
+        result = vectorized_calculator.invoke({
+            "expression": "1 / x",
+            "variables": {"x": [0]},
+        })
+        assert "erro" in json.loads(result)
+
+        result = vectorized_calculator.invoke({"expression": "x +", "variables": {"x": [1]}})
+        assert "erro" in json.loads(result)
+
+
+class TestCalculatorBatch:
+    """Testes para a ferramenta calculator_batch."""
+
+    def test_batch_results_in_order(self):
+        """Todos os resultados são retornados na ordem de entrada."""
+        result = calculator_batch.invoke({"expressions": ["2 + 2", "sqrt(16)", "0.1 * 3"]})
+        data = json.loads(result)
+
+        assert [entry["resultado"] for entry in data["resultados"]] == [4, 4, pytest.approx(0.3)]
+        assert [entry["expressao"] for entry in data["resultados"]] == ["2 + 2", "sqrt(16)", "0.1 * 3"]
+        assert data["sucessos"] == 3
+        assert data["erros"] == 0
+
+    def test_labels(self):
+        """Rótulos substituem a expressão na resposta."""
+        result = calculator_batch.invoke({
+            "expressions": ["5 * 4", "2 * (5 + 4)"],
+            "labels": ["area", "perimetro"],
+        })
+        data = json.loads(result)
+        assert data["resultados"] == [
+            {"rotulo": "area", "resultado": 20},
+            {"rotulo": "perimetro", "resultado": 18},
+        ]
+
+    def test_errors_do_not_abort_batch(self):
+        """Um erro em uma expressão não interrompe as demais."""
+        result = calculator_batch.invoke({"expressions": ["10 / 0", "2 +", "", "3 * 3"]})
+        data = json.loads(result)
+
+        entries = data["resultados"]
+        assert "zero" in entries[0]["erro"].lower()
+        assert "erro" in entries[1]
+        assert "erro" in entries[2]
+        assert entries[3]["resultado"] == 9
+        assert data["sucessos"] == 1
+        assert data["erros"] == 3
+
+    def test_matches_single_calculator(self):
+        """Os valores são os mesmos da ferramenta calculator."""
+        expressions = ["sin(pi / 2)", "log10(1000)", "pow(2, 10) / 3"]
+        data = json.loads(calculator_batch.invoke({"expressions": expressions}))
+
+        for expression, entry in zip(expressions, data["resultados"]):
+            assert calculator(expression) == f"Resultado: {entry['resultado']}"
+
+    def test_output_is_compact(self):
+        """A resposta é um JSON compacto, sem indentação."""
+        result = calculator_batch.invoke({"expressions": ["1 + 1"]})
+        assert "\n" not in result
+        assert ", " not in result
+
+    def test_empty_batch(self):
+        """Lista vazia retorna erro."""
+        data = json.loads(calculator_batch.invoke({"expressions": []}))
+        assert "erro" in data
+
+    def test_label_count_mismatch(self):
+        """Número de rótulos diferente do de expressões retorna erro."""
+        data = json.loads(calculator_batch.invoke({"expressions": ["1", "2"], "labels": ["a"]}))
+        assert "erro" in data
+
+
+class TestCalculatorExactMode:
+    """Testes para o modo exato (inteiros e frações)."""
+
+    @pytest.mark.parametrize("expression,expected", [
+        ("2 ** 200", 2 ** 200),
+        ("10 ** 30 + 1", 10 ** 30 + 1),
+        ("1 / 3 + 1 / 6", Fraction(1, 2)),
+        ("0.1 + 0.2", Fraction(3, 10)),
+        ("2 ** -2", Fraction(1, 4)),
+        ("10 / 5", 2),
+        ("sqrt(16)", 4),
+        ("sqrt(9 / 4)", Fraction(3, 2)),
+        ("pow(3, 40)", 3 ** 40),
+        ("ceil(7 / 2) + floor(-7 / 2)", 0),
+        ("abs(-1 / 3)", Fraction(1, 3)),
+    ])
+    def test_exact_results(self, expression, expected):
+        """Resultados inteiros e racionais são mantidos sem perda de precisão."""
+        result = evaluate_expression(expression, exact=True)
+        assert result == expected
+        assert type(result) is type(expected)
+
+    @pytest.mark.parametrize("expression", [
+        "sqrt(2)",
+        "sin(pi / 2)",
+        "log(10 ** 400)",
+        "2 ** 0.5",
+        "pi * 2",
+    ])
+    def test_transcendental_falls_back_to_float(self, expression):
+        """Funções transcendentais e constantes irracionais retornam float."""
+        assert isinstance(evaluate_expression(expression, exact=True), float)
+
+    def test_default_mode_unchanged(self):
+        """Sem o modo exato, o comportamento continua em ponto flutuante."""
+        assert evaluate_expression("10 ** 30 + 1") == 1e30
+        assert calculator("0.1 + 0.2") == "Resultado: 0.30000000000000004"
+
+    def test_tool_shows_exact_integer(self):
+        """A calculadora mostra inteiros grandes por completo."""
+        result = calculator.invoke({"expression": "10 ** 30 + 1", "exact": True})
+        assert result == "Resultado: 1000000000000000000000000000001"
+
+    def test_tool_shows_fraction(self):
+        """Frações são exibidas como p/q com o valor decimal aproximado."""
+        result = calculator.invoke({"expression": "1 / 3", "exact": True})
+        assert result == "Resultado: 1/3 (≈ 0.3333333333333333)"
+
+    def test_division_by_zero(self):
+        """Divisão por zero continua sendo detectada no modo exato."""
+        result = calculator.invoke({"expression": "1 / (2 - 2)", "exact": True})
+        assert "Erro" in result
+        assert "zero" in result.lower()
+
+    def test_modes_cached_separately(self):
+        """O modo exato e o de ponto flutuante não compartilham entrada no cache."""
+        assert evaluate_expression("1 / 4") == 0.25
+        assert evaluate_expression("1 / 4", exact=True) == Fraction(1, 4)
+        assert evaluate_expression("1 / 4") == 0.25
+
+    def test_format_huge_integer(self):
+        """Inteiros acima do limite de conversão são exibidos em notação científica."""
+        text = format_result(3 ** 100000)
+        assert text.startswith("≈ ")
+        assert "e+47712" in text
+
+    def test_batch_exact(self):
+        """calculator_batch também aceita o modo exato."""
+        result = calculator_batch.invoke({"expressions": ["2 ** 100", "1 / 3"], "exact": True})
+        entries = json.loads(result)["resultados"]
+        assert entries[0]["resultado"] == 2 ** 100
+        assert entries[1]["resultado"].startswith("1/3")
+
+
+class TestCalculatorEvaluationBudget:
+    """Testes para o orçamento de custo e o limite de tempo das avaliações."""
+
+    def setup_method(self):
+        self.previous_budget = get_evaluation_budget()
+        reset_calculator_metrics()
+
+    def teardown_method(self):
+        set_evaluation_budget(self.previous_budget)
+        reset_calculator_metrics()
+
+    @pytest.mark.parametrize("expression", [
+        "pow(9, 9 ** 9)",
+        "10 ** 10 ** 8",
+        "2 ** (10 ** 6) * 3",
+    ])
+    def test_pathological_expressions_rejected(self, expression):
+        """Expressões com resultados gigantescos são rejeitadas antes da execução."""
+        result = calculator.invoke({"expression": expression, "exact": True})
+        assert result.startswith("Erro: Result too large")
+        assert get_calculator_metrics()["budget_rejections"] == 1
+
+    def test_reasonable_exact_expressions_accepted(self):
+        """Potências grandes, mas dentro do orçamento, continuam funcionando."""
+        assert evaluate_expression("2 ** 200", exact=True) == 2 ** 200
+        assert evaluate_expression("1 ** (10 ** 9)", exact=True) == 1
+        assert get_calculator_metrics()["budget_rejections"] == 0
+
+    def test_cost_estimate(self):
+        """A estimativa conta operações e limita o tamanho do resultado."""
+        tree = ast.parse("10 ** 10 ** 8", mode="eval")
+        cost = estimate_cost(tree, exact=True)
+        assert cost.operations == 5
+        assert cost.digits == pytest.approx(1e8)
+
+        # Em ponto flutuante o tamanho do resultado é sempre limitado
+        assert estimate_cost(tree).digits == 0
+
+    def test_configurable_digit_limit(self):
+        """O limite de dígitos é configurável."""
+        set_evaluation_budget(EvaluationBudget(max_result_digits=50))
+        with pytest.raises(BudgetExceededError):
+            evaluate_expression("2 ** 200", exact=True)
+        assert evaluate_expression("2 ** 100", exact=True) == 2 ** 100
+
+    def test_operation_limit(self):
+        """Expressões com operações demais são rejeitadas."""
+        set_evaluation_budget(EvaluationBudget(max_operations=10))
+        result = calculator(" + ".join(["1"] * 20))
+        assert "Erro" in result
+        assert "too large" in result
+        assert get_calculator_metrics()["budget_rejections"] == 1
+
+    def test_budget_checked_for_cached_expressions(self):
+        """O orçamento vale também para expressões já em cache."""
+        assert evaluate_expression("3 ** 100", exact=True) == 3 ** 100
+        set_evaluation_budget(EvaluationBudget(max_result_digits=10))
+        with pytest.raises(BudgetExceededError):
+            evaluate_expression("3 ** 100", exact=True)
+
+    def test_timeout(self):
+        """Avaliações que passam do limite de tempo são interrompidas."""
+        compiled = compile_expression("x * 3 + pow(x, 4)", variables=["x"])
+        with pytest.raises(EvaluationTimeoutError):
+            compiled({"x": 2.0}, budget=EvaluationBudget(timeout=-1))
+        assert get_calculator_metrics()["timeouts"] == 1
+
+        # Sem limite de tempo a avaliação ocorre normalmente
+        assert compiled({"x": 2.0}, budget=EvaluationBudget(timeout=None)) == 22.0
+
+    def test_metrics_include_cache(self):
+        """As métricas incluem as estatísticas do cache."""
+        metrics = get_calculator_metrics()
+        assert set(metrics) >= {"budget_rejections", "timeouts", "cache"}
+        assert "hits" in metrics["cache"]
+
+
+class TestCalculatorIterativeEvaluator:
+    """Testes para o avaliador iterativo baseado em lista de instruções."""
+
+    def test_program_is_post_order(self):
+        """A expressão é compilada em uma lista de instruções pós-ordem."""
+        program = compile_program(parse_expression("2 + 3 * 4"))
+        assert len(program) == 5
+        assert run_program(program, {}) == 14.0
+
+    def test_safe_eval_still_works(self):
+        """safe_eval continua aceitando uma árvore AST."""
+        tree = ast.parse("sqrt(16) + pow(2, 3) * -1", mode="eval")
+        assert safe_eval(tree) == -4.0
+
+    def test_safe_eval_rejects_unsupported_nodes(self):
+        """Nós não suportados continuam sendo rejeitados."""
+        with pytest.raises(ValueError):
+            safe_eval(ast.parse("[1, 2]", mode="eval"))
+        with pytest.raises(ValueError):
+            safe_eval(ast.parse("1 < 2", mode="eval"))
+
+    def test_long_sum(self):
+        """Somas com milhares de termos não estouram o limite de recursão."""
+        expression = " + ".join(["1"] * 5000)
+        assert calculator(expression) == "Resultado: 5000"
+
+    def test_very_long_sum(self):
+        """Expressões bem maiores que o limite de recursão também funcionam."""
+        expression = " + ".join(str(i) for i in range(20000))
+        assert evaluate_expression(expression) == sum(range(20000))
+        assert evaluate_expression(expression, exact=True) == sum(range(20000))
+
+    def test_long_product_exact(self):
+        """Produtos longos no modo exato também são avaliados sem recursão."""
+        expression = " * ".join(["2"] * 3000)
+        assert evaluate_expression(expression, exact=True) == 2 ** 3000
+
+    def test_deep_unary_chain(self):
+        """Cadeias longas de operadores unários são suportadas."""
+        assert calculator("-" * 5000 + "1") == "Resultado: 1"
+
+    def test_deep_vectorized(self):
+        """O modo vetorizado usa o mesmo avaliador iterativo."""
+        result = evaluate_vectorized(" + ".join(["x"] * 5000), {"x": [1, 2]})
+        assert result.tolist() == [5000.0, 10000.0]
+
+    def test_too_deep_expression_reports_error(self):
+        """Expressões profundas demais para o parser retornam erro amigável."""
+        result = calculator(" + ".join(["1"] * 200000))
+        assert result.startswith("Erro:")
+
+
+class TestCalculatorOptimizer:
+    """Testes para a otimização de expressões compiladas."""
+
+    def test_constant_folding(self):
+        """Cadeias só de constantes viram uma única constante."""
+        compiled = compile_expression("pi / 2 + sqrt(16) * 2")
+        assert len(compiled.program) == 1
+        assert compiled() == math.pi / 2 + 8
+        assert compiled.optimization.removed == 7
+
+    def test_common_subexpressions(self):
+        """Subexpressões repetidas são avaliadas uma única vez."""
+        expression = "sqrt(x**2+y**2)/sqrt(x**2+y**2) + sqrt(y**2+x**2)"
+        optimized = compile_expression(expression, variables=["x", "y"])
+        plain = compile_expression(expression, variables=["x", "y"], optimize=False)
+        assert optimized.optimization.deduplicated > 0
+        assert len(optimized.program) < len(plain.program)
+        bindings = {"x": 3.0, "y": 4.0}
+        assert optimized(bindings) == plain(bindings) == 6.0
+
+    def test_removed_count(self):
+        """O relatório informa quantas instruções foram removidas."""
+        plain = compile_expression("x * 1 + x * 1", variables=["x"], optimize=False)
+        optimized = compile_expression("x * 1 + x * 1", variables=["x"])
+        assert optimized.optimization.removed == len(plain.program) - len(optimized.program)
+        assert optimized.optimization.simplified == 2
+        assert len(optimized.program) == 2
+
+    @pytest.mark.parametrize("expression", ["x * 1", "1 * x", "x / 1", "x ** 1", "x - 0", "+x", "-(-x)"])
+    def test_safe_identities(self, expression):
+        """Identidades exatas em ponto flutuante reduzem a expressão a x."""
+        compiled = compile_expression(expression, variables=["x"])
+        assert len(compiled.program) == 1
+        for value in (-0.0, 2.5, float("inf"), float("nan")):
+            assert repr(compiled({"x": value})) == repr(value)
+
+    @pytest.mark.parametrize("expression,value,expected", [
+        ("x + 0", -0.0, "0.0"),
+        ("x * 0", float("inf"), "nan"),
+        ("x - x", float("inf"), "nan"),
+        ("x / x", 0.0, None),
+    ])
+    def test_unsafe_identities_are_kept(self, expression, value, expected):
+        """Identidades que falham em ponto flutuante não são aplicadas."""
+        compiled = compile_expression(expression, variables=["x"])
+        if expected is None:
+            with pytest.raises(ZeroDivisionError):
+                compiled({"x": value})
+        else:
+            assert repr(compiled({"x": value})) == expected
+
+    def test_errors_are_not_folded_away(self):
+        """Erros em constantes continuam aparecendo na avaliação."""
+        assert "zero" in calculator("1 / 0 + 2").lower()
+        assert calculator("sqrt(-1)").startswith("Erro:")
+        assert calculator("0 * (1 / 0)").startswith("Erro:")
+        assert calculator("sqrt * 1").startswith("Erro:")
+
+    def test_large_exact_powers_are_not_folded(self):
+        """Potências exatas enormes ficam para a avaliação, sujeita ao orçamento."""
+        compiled = compile_expression("10 ** 10 ** 8", exact=True)
+        assert compiled.optimization.folded == 1
+        with pytest.raises(BudgetExceededError):
+            compiled()
+
+    def test_exact_mode_folding(self):
+        """O modo exato continua exato após a otimização."""
+        assert evaluate_expression("1/3 + 1/3 + 1/3", exact=True) == 1
+        assert evaluate_expression("(1/3) * 1", exact=True) == Fraction(1, 3)
+
+    def test_vectorized_mode(self):
+        """A otimização compõe com o modo vetorizado."""
+        result = evaluate_vectorized("x * 1 + pi / 2 + (x * 1)", {"x": [0, 1]})
+        np.testing.assert_allclose(result, [math.pi / 2, 2 + math.pi / 2])
+        # Constantes inválidas continuam gerando erro em vez de -inf
+        with pytest.raises(ValueError):
+            evaluate_vectorized("log(0) + x", {"x": [1.0]})
+
+    def test_cached_expressions_are_optimized(self):
+        """O cache guarda o programa já otimizado."""
+        clear_expression_cache()
+        compiled = get_compiled_expression("2 * 3 + 4")
+        assert len(compiled.program) == 1
+        assert get_compiled_expression("2 * 3 + 4") is compiled
+
+    def test_optimize_program_directly(self):
+        """optimize_program também funciona sobre programas de compile_program."""
+        program, report = optimize_program(compile_program(ast.parse("(2 + 3) * (2 + 3)", mode="eval")))
+        assert run_program(program, {}) == 25.0
+        assert report.folded == 3
+        assert report.removed == 6
+
+
+class TestCalculatorSumProduct:
+    """Testes para somatórios e produtórios (sum e prod)."""
+
+    def setup_method(self):
+        self.previous_budget = get_evaluation_budget()
+
+    def teardown_method(self):
+        set_evaluation_budget(self.previous_budget)
+
+    @pytest.mark.parametrize("expression,expected", [
+        ("sum(i, i, 1, 100)", "5050"),
+        ("sum(i**2, i, 1, 10**7)", "333333383333335000000"),
+        ("sum(2**i, i, 0, 10)", "2047"),
+        ("prod(2, k, 1, 10)", "1024"),
+        ("prod(i, i, 1, 20)", "2432902008176640000"),
+        ("sum(i, i, 10, 1)", "0"),
+        ("prod(i, i, 10, 1)", "1"),
+    ])
+    def test_basic_sums_and_products(self, expression, expected):
+        """Somatórios e produtórios com limites inclusivos."""
+        assert calculator.invoke({"expression": expression, "exact": True}) == f"Resultado: {expected}"
+
+    def test_closed_form_matches_term_by_term(self):
+        """As fórmulas fechadas coincidem com a soma termo a termo."""
+        cases = [
+            ("sum(3*i**3 - 2*i + 7, i, -20, 35)", lambda i: 3 * i ** 3 - 2 * i + 7),
+            ("sum((i + 1)**5 / 4, i, 0, 50)", lambda i: Fraction((i + 1) ** 5, 4)),
+            ("sum(3 * 2**(i - 1), i, 1, 40)", lambda i: 3 * 2 ** (i - 1)),
+            ("sum((1/3)**i, i, 2, 30)", lambda i: Fraction(1, 3) ** i),
+        ]
+        for expression, term in cases:
+            compiled = compile_expression(expression, exact=True)
+            assert compiled.program[-1][1].terms is not None
+            start, end = [int(x) for x in expression.rstrip(")").split(", ")[-2:]]
+            assert compiled() == sum(term(i) for i in range(start, end + 1))
+
+    def test_closed_form_for_huge_ranges(self):
+        """Fórmulas fechadas não dependem do número de termos."""
+        n = 10 ** 100
+        assert evaluate_expression("sum(i**2, i, 1, 10**100)", exact=True) == n * (n + 1) * (2 * n + 1) // 6
+        assert evaluate_expression("prod(2, k, 1, 1000)", exact=True) == 2 ** 1000
+        assert evaluate_expression("sum(0.5**i, i, 0, 10**9)") == 2.0
+
+    def test_float_closed_forms_are_correctly_rounded(self):
+        """No modo float as fórmulas fechadas arredondam apenas uma vez."""
+        assert evaluate_expression("sum(2**i, i, 0, 10)") == 2047.0
+        assert evaluate_expression("sum(i**2, i, 1, 10**7)") == float(333333383333335000000)
+
+    def test_vectorized_fallback(self):
+        """Somatórios sem fórmula fechada são avaliados em blocos com NumPy."""
+        expected = math.fsum(math.sin(i) for i in range(1, 200001))
+        assert evaluate_expression("sum(sin(i), i, 1, 200000)") == pytest.approx(expected, rel=1e-9)
+        assert evaluate_expression("prod(1 + 1/i, i, 1, 99)") == pytest.approx(100.0)
+        assert evaluate_expression("4 * sum((-1)**i / (2*i + 1), i, 0, 10**5)") == pytest.approx(math.pi, abs=1e-4)
+
+    def test_exact_fallback(self):
+        """No modo exato os termos são somados como frações."""
+        assert evaluate_expression("sum(1/(i*(i+1)), i, 1, 99)", exact=True) == Fraction(99, 100)
+        assert evaluate_expression("prod(1 + 1/i, i, 1, 99)", exact=True) == 100
+
+    def test_nested_sums(self):
+        """Somatórios podem ser aninhados e usar a variável externa nos limites."""
+        expected = sum(i * j for i in range(1, 51) for j in range(1, i + 1))
+        assert evaluate_expression("sum(sum(i*j, j, 1, i), i, 1, 50)") == expected
+        assert evaluate_expression("sum(sum(i*j, j, 1, i), i, 1, 50)", exact=True) == expected
+
+    def test_free_variables(self):
+        """Somatórios usam variáveis livres nos limites e no termo."""
+        compiled = compile_expression("sum(x * i, i, 1, n)", variables=["x", "n"])
+        assert compiled({"x": 2.0, "n": 10.0}) == 110.0
+        result = evaluate_vectorized("sum(i * x, i, 1, n)", {"x": [1, 2, 3], "n": [1, 2, 3]})
+        assert result.tolist() == [1.0, 6.0, 18.0]
+
+    def test_iteration_cap(self):
+        """Somatórios sem fórmula fechada respeitam o limite de iterações."""
+        set_evaluation_budget(EvaluationBudget(max_iterations=1000))
+        with pytest.raises(BudgetExceededError, match="Too many iterations"):
+            evaluate_expression("sum(sin(i), i, 1, 1001)")
+        # O limite vale para a avaliação inteira, inclusive somatórios aninhados
+        with pytest.raises(BudgetExceededError):
+            evaluate_expression("sum(sum(sin(i*j), j, 1, 40), i, 1, 40)")
+        # Fórmulas fechadas não contam iterações
+        assert evaluate_expression("sum(i, i, 1, 10**12)", exact=True) == 500000000000500000000000
+
+    def test_closed_form_digit_budget(self):
+        """Resultados exatos enormes são rejeitados pelo orçamento."""
+        result = calculator.invoke({"expression": "sum(2**i, i, 0, 10**6)", "exact": True})
+        assert result.startswith("Erro: Result too large")
+
+    @pytest.mark.parametrize("expression", [
+        "2**sum(i, i, 1, 10**6)",
+        "pow(3, prod(2, i, 1, 30))",
+        "sum(i, i, 1, 10**5)**sum(i, i, 1, 10**5)",
+    ])
+    def test_range_results_as_exponents(self, expression):
+        """Somatórios usados como expoente são rejeitados antes de executar."""
+        tree = parse_expression(expression)
+        assert estimate_cost(tree, exact=True).digits > EvaluationBudget().max_result_digits
+        result = calculator.invoke({"expression": expression, "exact": True})
+        assert result.startswith("Erro: Result too large")
+
+    def test_range_digit_bound(self):
+        """A estimativa de somatórios exatos limita o valor real."""
+        for expression in ["sum(i, i, 1, 10**6)", "prod(i, i, 1, 500)", "sum(1/i, i, 1, 300)"]:
+            value = evaluate_expression(expression, exact=True)
+            cost = estimate_cost(parse_expression(expression), exact=True)
+            assert cost.digits >= math.log10(abs(Fraction(value).numerator))
+        assert evaluate_expression("2 * sum(i, i, 1, 10**6)", exact=True) == 1000001000000
+
+    @pytest.mark.parametrize("expression", [
+        "sum(i, i, 1.5, 3)",
+        "sum(i, i, 1)",
+        "sum(i, 2, 1, 3)",
+        "sum(i, pi, 1, 3)",
+        "sum(1/(i-5), i, 1, 10)",
+        "sum(unknown(i), i, 1, 3)",
+    ])
+    def test_errors(self, expression):
+        """Usos inválidos retornam mensagens de erro."""
+        assert calculator.invoke({"expression": expression}).startswith("Erro:")
+
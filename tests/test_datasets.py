@@ -0,0 +1,161 @@
+"""
+Testes unitários para o registro de conjuntos de dados.
+
+Testa registro, deduplicação, descarte LRU, memoização de resultados e o
+uso de identificadores ('ds:N') nas ferramentas.
+"""
+import json
+
+import numpy as np
+import pytest
+
+from src.tools.calculator import evaluate_vectorized
+from src.tools.datasets import DatasetRegistry, get_dataset_registry, is_handle, load_numbers, normalize_handle
+from src.tools.statistics import statistics_analyzer
+
+
+class TestDatasetHandles:
+    """Testes para o formato dos identificadores."""
+
+    @pytest.mark.parametrize("text", ["ds:1", "DS:42", " ds: 7 "])
+    def test_is_handle(self, text):
+        """Identificadores válidos são reconhecidos."""
+        assert is_handle(text)
+
+    @pytest.mark.parametrize("text", ["1, 2, 3", "ds:", "ds:a", "ds:1, 2"])
+    def test_is_not_handle(self, text):
+        """Números e textos parecidos não são identificadores."""
+        assert not is_handle(text)
+
+    def test_normalize_handle(self):
+        """Identificadores são escritos na forma canônica."""
+        assert normalize_handle(" DS: 042 ") == "ds:42"
+
+
+class TestDatasetRegistry:
+    """Testes para DatasetRegistry."""
+
+    def test_add_and_get(self):
+        """O array registrado é devolvido somente para leitura."""
+        registry = DatasetRegistry()
+        handle = registry.add([1, 2, 3])
+        values = registry.get(handle)
+        np.testing.assert_array_equal(values, [1.0, 2.0, 3.0])
+        assert values.dtype == np.float64
+        assert not values.flags.writeable
+
+    def test_add_copies(self):
+        """Alterar o array original não altera o registrado."""
+        registry = DatasetRegistry()
+        original = np.array([1.0, 2.0])
+        handle = registry.add(original)
+        original[0] = 99
+        assert registry.get(handle)[0] == 1.0
+
+    def test_same_values_same_handle(self):
+        """Registrar os mesmos valores devolve o mesmo identificador."""
+        registry = DatasetRegistry()
+        assert registry.add([1, 2, 3]) == registry.add(np.array([1.0, 2.0, 3.0]))
+        assert registry.add([1, 2, 4]) != registry.add([1, 2, 3])
+        assert len(registry) == 2
+
+    def test_evicts_least_recently_used(self):
+        """Acima de max_datasets, o conjunto menos usado é descartado."""
+        registry = DatasetRegistry(max_datasets=2)
+        first = registry.add([1])
+        second = registry.add([2])
+        registry.get(first)
+        third = registry.add([3])
+        assert first in registry and third in registry
+        assert second not in registry
+        assert registry.stats()["evictions"] == 1
+
+    def test_evicts_by_bytes(self):
+        """Acima de max_bytes, conjuntos antigos são descartados."""
+        registry = DatasetRegistry(max_bytes=8 * 100)
+        first = registry.add(np.arange(60))
+        second = registry.add(np.arange(60) + 1)
+        assert first not in registry and second in registry
+        assert registry.stats()["bytes"] == 8 * 60
+
+    def test_too_large(self):
+        """Um conjunto maior que o limite sozinho é recusado."""
+        registry = DatasetRegistry(max_bytes=8)
+        with pytest.raises(ValueError):
+            registry.add([1, 2])
+
+    def test_unknown_handle(self):
+        """Um identificador desconhecido gera erro em português."""
+        registry = DatasetRegistry()
+        with pytest.raises(ValueError, match="não encontrado"):
+            registry.get("ds:999")
+        assert registry.stats()["misses"] == 1
+
+    def test_memoize(self):
+        """Um resultado é calculado uma vez por conjunto e chave."""
+        registry = DatasetRegistry()
+        handle = registry.add([1, 2, 3])
+        calls = []
+
+        def compute(values):
+            calls.append(1)
+            return float(values.sum())
+
+        assert registry.memoize(handle, "soma", compute) == 6.0
+        assert registry.memoize(handle, "soma", compute) == 6.0
+        assert len(calls) == 1
+        assert registry.stats()["result_hits"] == 1
+
+    def test_remove_and_clear(self):
+        """remove e clear descartam conjuntos e liberam os bytes."""
+        registry = DatasetRegistry()
+        handle = registry.add([1, 2])
+        registry.add([3, 4])
+        registry.remove(handle)
+        assert handle not in registry
+        registry.clear()
+        assert registry.stats()["size"] == 0
+        assert registry.stats()["bytes"] == 0
+
+
+class TestDatasetTools:
+    """Testes para o uso de identificadores nas ferramentas."""
+
+    def test_load_numbers_registers(self):
+        """Números em texto são registrados; o identificador os recupera."""
+        values, handle = load_numbers("4, 5, 6")
+        again, same = load_numbers(handle)
+        assert same == handle
+        np.testing.assert_array_equal(again, values)
+
+    def test_load_numbers_empty(self):
+        """Uma lista vazia não é registrada."""
+        values, handle = load_numbers("")
+        assert len(values) == 0 and handle is None
+
+    def test_statistics_round_trip(self):
+        """O resultado informa o conjunto, que pode ser usado depois."""
+        first = json.loads(statistics_analyzer.func("10, 20, 30, 40, 50"))
+        handle = first.pop("conjunto")
+        assert is_handle(handle)
+
+        second = json.loads(statistics_analyzer.func(handle))
+        assert second.pop("conjunto") == handle
+        assert second == first
+
+    def test_statistics_memoized(self):
+        """Perguntas repetidas sobre o mesmo conjunto usam o resultado guardado."""
+        handle = json.loads(statistics_analyzer.func("1, 2, 3, 5, 8, 13"))["conjunto"]
+        hits = get_dataset_registry().stats()["result_hits"]
+        statistics_analyzer.func(handle)
+        assert get_dataset_registry().stats()["result_hits"] == hits + 1
+
+    def test_statistics_unknown_handle(self):
+        """Um identificador descartado gera uma mensagem de erro clara."""
+        result = json.loads(statistics_analyzer.func("ds:999999"))
+        assert "não encontrado" in result["erro"]
+
+    def test_vectorized_handle(self):
+        """vectorized_calculator aceita um identificador como variável."""
+        handle = json.loads(statistics_analyzer.func("1, 2, 3"))["conjunto"]
+        np.testing.assert_array_equal(evaluate_vectorized("x * 2", {"x": handle}), [2.0, 4.0, 6.0])
@@ -4,8 +4,17 @@ Testes unitários para a ferramenta de calculadora de datas.
 Testa todas as operações com datas e tratamento de erros.
 """
 import pytest
-from datetime import datetime
-from src.tools.date_calculator import date_calculator
+from datetime import datetime, timedelta
+from src.tools.date_calculator import (
+    add_months,
+    clear_date_cache,
+    date_calculator,
+    diff_ymd,
+    get_date_cache_stats,
+    months_between,
+    parse_iso_date,
+    validate_date_format,
+)
 
 
 class TestDateCalculatorDifference:
@@ -328,3 +337,77 @@ class TestDateCalculatorCaseSensitivity:
         # Se tiver "Erro" e "inválida", então não é case-insensitive
         if "Erro" in result and "inválida" in result.lower():
             pytest.fail(f"Operação {operation} não é case-insensitive")
+
+
+class TestParseIsoDate:
+    """Testes para a leitura rápida de datas com memorização."""
+
+    @pytest.mark.parametrize("text", ["2024-01-15", "2024-1-5", "0001-01-01", "9999-12-31", "2024-02-29"])
+    def test_same_result_as_strptime(self, text):
+        """Aceita exatamente as mesmas datas que strptime, com o mesmo resultado."""
+        assert parse_iso_date(text) == datetime.strptime(text, "%Y-%m-%d")
+
+    @pytest.mark.parametrize("text", ["2023-02-29", "2024-13-01", "0000-01-01", "20240115", "2024/01/15", "2024-01-15T10:00", ""])
+    def test_invalid_keeps_message(self, text):
+        """Datas inválidas mantêm a mensagem de erro de validate_date_format."""
+        with pytest.raises(ValueError, match="Invalid date format"):
+            validate_date_format(text)
+
+    def test_memoized(self):
+        """Datas repetidas são atendidas pelo cache; datas inválidas não são guardadas."""
+        clear_date_cache()
+        first = validate_date_format("2024-03-10")
+        assert validate_date_format("2024-03-10") is first
+        with pytest.raises(ValueError):
+            validate_date_format("2024-03-32")
+        stats = get_date_cache_stats()
+        assert stats["hits"] == 1 and stats["size"] == 1
+
+
+class TestMonthArithmetic:
+    """Testes para as operações com meses e anos."""
+
+    @pytest.mark.parametrize("start,months,expected", [
+        ("2024-01-31", 1, "2024-02-29"),
+        ("2023-01-31", 1, "2023-02-28"),
+        ("2024-03-31", -1, "2024-02-29"),
+        ("2024-01-15", 13, "2025-02-15"),
+        ("2024-02-29", 12, "2025-02-28"),
+        ("2024-12-31", -10, "2024-02-29"),
+    ])
+    def test_add_months_clamps(self, start, months, expected):
+        """O dia é ajustado ao fim de meses mais curtos."""
+        result = add_months(datetime.strptime(start, "%Y-%m-%d"), months)
+        assert result.strftime("%Y-%m-%d") == expected
+
+    @pytest.mark.parametrize("first,second,months", [
+        ("2024-01-31", "2024-02-29", 1),
+        ("2024-01-31", "2024-02-28", 0),
+        ("2024-03-01", "2024-01-31", 1),
+        ("2020-02-29", "2024-02-28", 47),
+        ("2020-02-29", "2024-02-29", 48),
+    ])
+    def test_months_between(self, first, second, months):
+        """Meses completos, de acordo com add_months e em qualquer ordem."""
+        assert months_between(datetime.strptime(first, "%Y-%m-%d"), datetime.strptime(second, "%Y-%m-%d")) == months
+
+    def test_diff_ymd_adds_back(self):
+        """Somar os anos, meses e dias à data inicial devolve a data final."""
+        start, end = datetime(2020, 2, 29), datetime(2024, 3, 15)
+        years, months, days = diff_ymd(end, start)
+        assert (years, months, days) == (4, 0, 15)
+        assert add_months(start, 12 * years + months) + timedelta(days=days) == end
+
+    @pytest.mark.parametrize("operation,date1,date2,expected", [
+        ("add_months", "2024-01-31", "1", "2024-01-31 mais 1 meses é 2024-02-29 (dia ajustado ao fim do mês)."),
+        ("add_months", "2024-01-15", "-2", "2024-01-15 mais -2 meses é 2023-11-15."),
+        ("add_years", "2024-02-29", "1", "2024-02-29 mais 1 anos é 2025-02-28 (dia ajustado ao fim do mês)."),
+        ("months_between", "2024-01-31", "2024-02-29", "Entre 2024-01-31 e 2024-02-29 há 1 meses completos."),
+        ("diff_ymd", "2024-03-15", "2020-02-29", "De 2020-02-29 a 2024-03-15 são 4 anos, 0 meses e 15 dias."),
+        ("add_years", "9999-06-01", "1", "Erro: O resultado está fora do intervalo"),
+        ("add_months", "2024-01-01", "1.5", "Erro: date2 deve ser um inteiro válido (número de meses)"),
+        ("diff_ymd", "2024-01-01", "2024-02-30", "Erro em date2"),
+    ])
+    def test_tool_operations(self, operation, date1, date2, expected):
+        """As operações de meses e anos pela ferramenta."""
+        assert date_calculator.invoke({"operation": operation, "date1": date1, "date2": date2}).startswith(expected)
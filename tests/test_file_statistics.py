@@ -0,0 +1,143 @@
+"""
+Testes unitários para a estatística de datasets em arquivos locais.
+
+Testa leitura de CSV, .npy e binário bruto, o diretório de dados
+permitido e o tratamento de erros.
+"""
+import json
+
+import numpy as np
+import pytest
+
+from src.tools import file_statistics as module
+from src.tools.file_statistics import FileDataset, file_statistics, set_data_directory, summarize_file
+from src.tools.statistics import statistics_analyzer
+
+
+@pytest.fixture
+def values():
+    return np.round(np.random.default_rng(0).normal(50, 10, 3000), 2)
+
+
+@pytest.fixture
+def expected(values):
+    """Resultado de statistics_analyzer para os mesmos valores."""
+    result = json.loads(statistics_analyzer.func(", ".join(map(repr, values.tolist()))))
+    result.pop("conjunto", None)
+    return result
+
+
+@pytest.fixture(autouse=True)
+def data_directory(tmp_path):
+    set_data_directory(tmp_path)
+    yield tmp_path
+    set_data_directory(None)
+
+
+def measures(result):
+    """Somente as medidas, sem as informações do arquivo."""
+    return {key: value for key, value in result.items()
+            if key not in {"aproximados", "erro_rank", "arquivo", "formato", "coluna", "vazios_ignorados"}}
+
+
+class TestFileFormats:
+    """Testes para os formatos de arquivo suportados."""
+
+    def test_csv_column_by_name(self, data_directory, values, expected):
+        """Uma coluna de CSV escolhida pelo nome dá o mesmo resultado da ferramenta."""
+        lines = ["id,valor,nome"] + [f'{i},{value!r},"a, {i}"' for i, value in enumerate(values.tolist())]
+        (data_directory / "dados.csv").write_text("\n".join(lines) + "\n")
+        result = summarize_file("dados.csv", column="valor")
+        assert measures(result) == expected
+        assert (result["formato"], result["coluna"], result["aproximados"]) == ("csv", "valor", [])
+
+    def test_csv_without_header(self, data_directory, values, expected):
+        """Sem cabeçalho, a coluna é escolhida pelo índice."""
+        lines = [f"{i};{value!r}" for i, value in enumerate(values.tolist())]
+        (data_directory / "dados.csv").write_text("\n".join(lines))
+        result = summarize_file("dados.csv", column="1")
+        assert measures(result) == expected
+        assert result["coluna"] == 1
+
+    def test_csv_empty_fields_are_skipped(self, data_directory):
+        """Campos vazios são ignorados e contados."""
+        (data_directory / "dados.csv").write_text("a,b\n1,2\n,3\n5,4\n")
+        result = summarize_file("dados.csv", column="a")
+        assert result["contagem"] == 2
+        assert result["vazios_ignorados"] == 1
+
+    def test_csv_read_in_blocks(self, data_directory, values, expected, monkeypatch):
+        """Blocos pequenos não cortam linhas ao meio."""
+        monkeypatch.setattr(module, "CSV_BLOCK_SIZE", 64)
+        (data_directory / "dados.txt").write_text("\n".join(map(repr, values.tolist())))
+        assert measures(summarize_file("dados.txt")) == expected
+
+    def test_npy(self, data_directory, values, expected):
+        """Arquivos .npy são lidos por mapeamento em memória."""
+        np.save(data_directory / "dados.npy", values)
+        assert measures(summarize_file("dados.npy")) == expected
+
+    def test_npy_column(self, data_directory, values, expected):
+        """Uma coluna de um .npy bidimensional pode ser escolhida."""
+        np.save(data_directory / "dados.npy", np.column_stack([np.zeros_like(values), values]))
+        assert measures(summarize_file("dados.npy", column="1")) == expected
+
+    def test_raw_float32(self, data_directory):
+        """Binários brutos aceitam float32."""
+        np.array([1.5, 2.5, 3.5], dtype="<f4").tofile(data_directory / "dados.f32")
+        assert summarize_file("dados.f32", dtype="float32")["media"] == 2.5
+
+    def test_large_file_is_approximate(self, data_directory):
+        """Acima do limite exato, os quartis são aproximados e o erro é informado."""
+        data = np.random.default_rng(1).uniform(0, 100, 200_000)
+        data.tofile(data_directory / "dados.bin")
+        result = summarize_file("dados.bin", exact_limit=50_000)
+        assert result["aproximados"] == ["mediana", "q1", "q2", "q3", "iqr"]
+        assert result["erro_rank"] == 0.01
+        assert result["media"] == pytest.approx(round(data.mean(), 3), abs=1e-3)
+        assert result["mediana"] == pytest.approx(50, abs=2)
+
+
+class TestFileErrors:
+    """Testes para arquivos inválidos e o diretório de dados."""
+
+    def test_outside_data_directory(self, tmp_path):
+        """Arquivos fora do diretório de dados são recusados."""
+        with pytest.raises(ValueError, match="diretório de dados"):
+            FileDataset("../fora.csv")
+
+    def test_missing_file(self):
+        """Arquivos inexistentes geram erro."""
+        with pytest.raises(ValueError, match="não encontrado"):
+            FileDataset("nao_existe.csv")
+
+    def test_unknown_column(self, data_directory):
+        """Colunas inexistentes listam as disponíveis."""
+        (data_directory / "dados.csv").write_text("a,b\n1,2\n")
+        with pytest.raises(ValueError, match="Colunas disponíveis: a, b"):
+            FileDataset("dados.csv", column="c")
+
+    def test_invalid_value_reports_line(self, data_directory):
+        """Um valor inválido é informado com o número da linha."""
+        (data_directory / "dados.csv").write_text("a\n1\n2\nx\n")
+        result = json.loads(file_statistics.invoke({"path": "dados.csv"}))
+        assert result["erro"] == "Valor inválido na linha 4: 'x'"
+
+    def test_raw_size_mismatch(self, data_directory):
+        """Binários com tamanho incompatível com o tipo geram erro."""
+        (data_directory / "dados.bin").write_bytes(b"\x00" * 12)
+        with pytest.raises(ValueError, match="múltiplo de 8"):
+            FileDataset("dados.bin")
+
+    def test_unsupported_extension(self, data_directory):
+        """Extensões desconhecidas são recusadas."""
+        (data_directory / "dados.xlsx").write_bytes(b"")
+        result = json.loads(file_statistics.invoke({"path": "dados.xlsx"}))
+        assert "não suportado" in result["erro"]
+
+    def test_tool_returns_json(self, data_directory):
+        """A ferramenta retorna JSON com as medidas e o arquivo."""
+        (data_directory / "dados.csv").write_text("1\n2\n3\n4\n")
+        result = json.loads(file_statistics.invoke({"path": "dados.csv"}))
+        assert result["media"] == 2.5
+        assert result["arquivo"].endswith("dados.csv")
@@ -0,0 +1,216 @@
+"""
+Testes unitários para as estatísticas por grupo.
+
+Testa a fatoração das chaves, a leitura dos pares e de arquivos CSV, a
+agregação vetorizada, a tabela de saída e a ferramenta grouped_statistics.
+"""
+import json
+
+import numpy as np
+import pytest
+
+from src.tools import grouped
+from src.tools.file_statistics import set_data_directory
+from src.tools.grouped import (
+    GROUP_MEASURES,
+    build_table,
+    factorize,
+    group_statistics,
+    grouped_statistics,
+    parse_pairs,
+    read_keyed_csv,
+)
+
+
+@pytest.fixture(autouse=True)
+def data_directory(tmp_path):
+    set_data_directory(tmp_path)
+    yield tmp_path
+    set_data_directory(None)
+
+
+class TestFactorize:
+    """Testes para a fatoração das chaves."""
+
+    def test_first_appearance_order(self):
+        """Os códigos seguem a ordem da primeira ocorrência."""
+        codes, labels = factorize(["b", "a", "b", "c", "a"])
+        assert codes.tolist() == [0, 1, 0, 2, 1]
+        assert labels == ["b", "a", "c"]
+
+
+class TestParsePairs:
+    """Testes para a leitura dos pares chave/valor."""
+
+    @pytest.mark.parametrize("text", [
+        "api, 1\nweb, 2",
+        "api: 1; web: 2",
+        "api=1;web=2",
+        "api 1\n\nweb\t2",
+    ])
+    def test_separators(self, text):
+        """Aceita vírgula, dois-pontos, igual, espaço ou tab entre chave e valor."""
+        keys, values = parse_pairs(text)
+        assert keys == ["api", "web"]
+        assert values.tolist() == [1.0, 2.0]
+
+    def test_key_with_spaces(self):
+        """O valor é o último campo, então a chave pode ter espaços."""
+        keys, values = parse_pairs("GET /users, 120")
+        assert keys == ["GET /users"] and values.tolist() == [120.0]
+
+    @pytest.mark.parametrize("text,message", [("api", "Par inválido"), ("api, x", "Valor inválido no par 1")])
+    def test_errors(self, text, message):
+        """Pares sem valor numérico geram erros em português."""
+        with pytest.raises(ValueError, match=message):
+            parse_pairs(text)
+
+
+class TestGroupStatistics:
+    """Testes para a agregação vetorizada."""
+
+    @pytest.fixture
+    def grouped(self):
+        rng = np.random.default_rng(0)
+        codes = rng.integers(0, 30, 20_000)
+        values = np.round(rng.normal(100, 20, 20_000), 1)
+        return codes, values, group_statistics(codes, values, 30, GROUP_MEASURES, [0.9])
+
+    def test_matches_numpy_per_group(self, grouped):
+        """Cada grupo coincide com as chamadas do NumPy sobre os seus valores."""
+        codes, values, result = grouped
+        for group in range(30):
+            subset = values[codes == group]
+            assert result["contagem"][group] == len(subset)
+            assert result["soma"][group] == pytest.approx(subset.sum())
+            assert result["media"][group] == pytest.approx(subset.mean())
+            assert result["desvio_padrao"][group] == pytest.approx(subset.std(ddof=1))
+            assert result["minimo"][group] == subset.min()
+            assert result["maximo"][group] == subset.max()
+            assert result["mediana"][group] == np.median(subset)
+            assert result["q1"][group] == np.percentile(subset, 25)
+            assert result["p90"][group] == np.quantile(subset, 0.9)
+
+    def test_only_requested_measures(self):
+        """Só as medidas pedidas são retornadas, na ordem padrão."""
+        result = group_statistics(np.array([0, 0, 1]), np.array([1.0, 3.0, 5.0]), 2, ["media", "contagem"])
+        assert list(result) == ["contagem", "media"]
+
+    def test_single_value_and_nan_groups(self):
+        """Grupo de um valor não tem desvio; grupo com NaN tem medidas NaN, exceto a contagem."""
+        codes = np.array([0, 1, 1, 2, 2])
+        values = np.array([4.0, 1.0, np.nan, 2.0, 6.0])
+        result = group_statistics(codes, values, 3, ["contagem", "media", "desvio_padrao", "mediana"])
+        assert np.isnan(result["desvio_padrao"][0]) and result["media"][0] == 4.0
+        assert result["contagem"][1] == 2
+        assert np.isnan(result["media"][1]) and np.isnan(result["mediana"][1])
+        assert result["mediana"][2] == 4.0
+
+
+class TestBuildTable:
+    """Testes para a tabela de saída."""
+
+    MEASURES = {"contagem": np.array([3, 1, 2]), "media": np.array([1.0, np.nan, 5.0])}
+
+    def test_top_by_measure(self):
+        """top lista os maiores grupos pela medida, com NaN por último."""
+        table = build_table(["a", "b", "c"], self.MEASURES, top=2, sort_by="media")
+        assert [row[0] for row in table["linhas"]] == ["c", "a"]
+        assert table["grupos_omitidos"] == 1
+
+    def test_ascending_and_null(self):
+        """Ordem crescente também deixa NaN por último, escrito como null."""
+        table = build_table(["a", "b", "c"], self.MEASURES, sort_by="media", ascending=True)
+        assert table["linhas"] == [["a", 3, 1.0], ["c", 2, 5.0], ["b", 1, None]]
+
+    def test_top_defaults_to_count(self):
+        """Sem sort_by, top ordena pela contagem."""
+        table = build_table(["a", "b", "c"], self.MEASURES, top=1)
+        assert table["linhas"] == [["a", 3, 1.0]]
+
+
+class TestKeyedCsv:
+    """Testes para a leitura de chave e valor de arquivos CSV."""
+
+    def test_header_by_name(self, tmp_path):
+        """Colunas são escolhidas pelo nome do cabeçalho."""
+        (tmp_path / "lat.csv").write_text("endpoint,ms,status\n/a,10,200\n/b,30,500\n/a,20,200\n")
+        codes, labels, values, skipped = read_keyed_csv("lat.csv", key_column="endpoint", value_column="ms")
+        assert labels == ["/a", "/b"]
+        assert codes.tolist() == [0, 1, 0] and values.tolist() == [10.0, 30.0, 20.0]
+        assert skipped == 0
+
+    def test_without_header(self, tmp_path):
+        """Sem cabeçalho, a chave é a primeira coluna e o valor a segunda."""
+        (tmp_path / "lat.csv").write_text("/a;10\n/b;\n/a;20\n")
+        codes, labels, values, skipped = read_keyed_csv("lat.csv")
+        assert labels == ["/a"] and values.tolist() == [10.0, 20.0]
+        assert skipped == 1
+
+    def test_invalid_value(self, tmp_path):
+        """Valores inválidos informam a linha."""
+        (tmp_path / "lat.csv").write_text("k,v\na,1\nb,x\n")
+        with pytest.raises(ValueError, match="linha 3"):
+            read_keyed_csv("lat.csv")
+
+    def test_blocks_match_csv_module(self, tmp_path, monkeypatch):
+        """Blocos lidos com loadtxt ou com o módulo csv dão o mesmo resultado."""
+        rng = np.random.default_rng(0)
+        lines = [f"k{key},{value}" for key, value in zip(rng.integers(0, 50, 2000), rng.normal(size=2000))]
+        # Um valor vazio e uma chave entre aspas forçam o caminho lento só no seu bloco
+        lines[1500] = "k7,"
+        lines[1700] = '"k 8",1.5'
+        (tmp_path / "lat.csv").write_text("\n".join(lines) + "\n")
+        monkeypatch.setattr(grouped, "CSV_BLOCK_SIZE", 4096)
+        codes, labels, values, skipped = read_keyed_csv("lat.csv")
+
+        pairs = [line.split(",") for line in lines if not line.endswith(",")]
+        expected_codes, expected_labels = factorize([key.strip('"') for key, _ in pairs])
+        assert labels == expected_labels
+        assert codes.tolist() == expected_codes.tolist()
+        assert values.tolist() == [float(value) for _, value in pairs]
+        assert skipped == 1
+
+    def test_whitespace_delimiter(self, tmp_path):
+        """Colunas separadas por espaços, com uma única coluna de valores como chave."""
+        (tmp_path / "lat.txt").write_text("/a   10\n/b 30\n")
+        codes, labels, values, skipped = read_keyed_csv("lat.txt")
+        assert labels == ["/a", "/b"] and values.tolist() == [10.0, 30.0]
+
+
+class TestGroupedStatisticsTool:
+    """Testes para a ferramenta grouped_statistics."""
+
+    def test_inline_pairs(self):
+        """Pares inline geram uma tabela com uma linha por grupo."""
+        result = json.loads(grouped_statistics.invoke({
+            "data": "api, 120; api, 80; web, 35",
+            "measures": ["contagem", "media"],
+        }))
+        assert result["grupos"] == 2
+        assert result["colunas"] == ["grupo", "contagem", "media"]
+        assert result["linhas"] == [["api", 2, 100.0], ["web", 1, 35.0]]
+
+    def test_file_with_top(self, tmp_path):
+        """Arquivo CSV com top-N por quantil."""
+        rng = np.random.default_rng(0)
+        rows = [f"e{index % 5},{value:.1f}" for index, value in enumerate(rng.normal(100, 10, 500) + np.arange(500) % 5 * 50)]
+        (tmp_path / "lat.csv").write_text("endpoint,ms\n" + "\n".join(rows) + "\n")
+        result = json.loads(grouped_statistics.invoke({
+            "path": "lat.csv", "quantiles": [0.95], "top": 2, "sort_by": "p95",
+        }))
+        assert [row[0] for row in result["linhas"]] == ["e4", "e3"]
+        assert "p95" in result["colunas"]
+        assert result["grupos_omitidos"] == 3
+
+    @pytest.mark.parametrize("arguments,message", [
+        ({}, "Forneça"),
+        ({"data": "a, 1", "measures": ["moda"]}, "Medida desconhecida"),
+        ({"data": "a, 1", "sort_by": "maximo", "measures": ["media"]}, "sort_by"),
+        ({"data": "a, 1", "quantiles": [2]}, "quantis"),
+        ({"data": "a, 1", "top": 0}, "top"),
+        ({"path": "nao_existe.csv"}, "não encontrado"),
+    ])
+    def test_errors(self, arguments, message):
+        """Entradas inválidas geram mensagens de erro em português."""
+        assert message in json.loads(grouped_statistics.invoke(arguments))["erro"]
@@ -0,0 +1,164 @@
+"""
+Testes unitários para as estatísticas paralelas em um pool de processos.
+
+Testa a divisão em partes, a memória compartilhada, a combinação dos
+resultados parciais e o uso do pool por file_statistics e
+statistics_analyzer.
+"""
+import json
+
+import numpy as np
+import pytest
+
+from src.tools import statistics
+from src.tools.file_statistics import set_data_directory, summarize_file
+from src.tools.parallel import SharedArray, StatisticsPool, split_ranges
+from src.tools.statistics import MODE_NOT_COMPUTED, statistics_analyzer
+from src.tools.streaming import StreamingStatistics
+
+
+@pytest.fixture(scope="module")
+def pool():
+    """Pool com dois workers e limite mínimo baixo, compartilhado pelos testes do módulo."""
+    with StatisticsPool(workers=2, min_values=1000, parts_per_worker=2) as statistics_pool:
+        yield statistics_pool
+
+
+@pytest.fixture
+def data():
+    return np.round(np.random.default_rng(0).normal(50, 10, 200_000), 1)
+
+
+def serial(values):
+    """Mesmo resultado calculado em um único processo."""
+    accumulator = StreamingStatistics(exact_limit=0)
+    accumulator.update(values)
+    return accumulator
+
+
+class TestSplitRanges:
+    """Testes para a divisão dos valores em partes."""
+
+    @pytest.mark.parametrize("length,parts", [(10, 3), (100, 8), (3, 8), (1, 1)])
+    def test_covers_everything_once(self, length, parts):
+        """As partes são contíguas, não vazias e cobrem todos os valores."""
+        ranges = split_ranges(length, parts)
+        assert len(ranges) == min(length, parts)
+        assert ranges[0][0] == 0 and ranges[-1][1] == length
+        assert all(stop > start for start, stop in ranges)
+        assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+
+class TestSharedArray:
+    """Testes para a cópia dos valores em memória compartilhada."""
+
+    def test_chunks(self):
+        """Os valores lidos por partes são os originais."""
+        values = np.arange(10, dtype=np.float64)
+        with SharedArray(values) as shared:
+            chunks = list(shared.chunks(2, 9, size=3))
+        np.testing.assert_array_equal(np.concatenate(chunks), values[2:9])
+        assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+
+
+class TestStatisticsPool:
+    """Testes para o resumo paralelo."""
+
+    def test_should_parallelize(self, pool):
+        """Conjuntos pequenos ficam no caminho serial."""
+        assert not pool.should_parallelize(999)
+        assert pool.should_parallelize(1000)
+        with StatisticsPool(workers=1, min_values=0) as single:
+            assert not single.should_parallelize(10 ** 9)
+
+    def test_matches_serial(self, pool, data):
+        """Contagem, extremos e momentos coincidem com o cálculo serial; os quartis respeitam o erro do sketch."""
+        result = pool.summarize_array(data).result()
+        expected = serial(data).result()
+        for key in ["contagem", "media", "desvio_padrao", "variancia", "minimo", "maximo", "amplitude"]:
+            assert result[key] == expected[key]
+        for key, fraction in [("q1", 25), ("mediana", 50), ("q3", 75)]:
+            rank = np.mean(data <= result[key]) * 100
+            assert rank == pytest.approx(fraction, abs=2)
+        assert result["aproximados"] == ["mediana", "q1", "q2", "q3", "iqr"]
+
+    def test_mode_from_merged_frequencies(self, pool):
+        """A moda é exata quando há poucos valores distintos."""
+        values = np.tile([1.0, 2.0, 3.0, 2.0], 5000)
+        assert pool.summarize_array(values).result()["moda"] == "2.0"
+
+    def test_nan_propagates(self, pool, data):
+        """NaN em qualquer parte torna as estatísticas de ordem NaN."""
+        values = data.copy()
+        values[-1] = np.nan
+        summary = pool.summarize_array(values).summary()
+        assert np.isnan(summary.median)
+
+
+class TestParallelFileStatistics:
+    """Testes para o uso do pool por file_statistics."""
+
+    @pytest.fixture(autouse=True)
+    def installed_pool(self, pool, tmp_path, monkeypatch):
+        set_data_directory(tmp_path)
+        monkeypatch.setattr(statistics, "_statistics_pool", pool)
+        yield
+        set_data_directory(None)
+
+    def test_large_binary_file(self, tmp_path, data):
+        """Arquivos binários acima de exact_limit são divididos entre os workers."""
+        data.tofile(tmp_path / "dados.bin")
+        result = summarize_file("dados.bin", exact_limit=50_000)
+        assert result["contagem"] == len(data)
+        assert result["media"] == round(float(data.mean()), 3)
+        assert result["aproximados"] == ["mediana", "q1", "q2", "q3", "iqr"]
+
+    def test_npy_column(self, tmp_path, data):
+        """Cada worker mapeia a coluna pedida de um .npy 2-D."""
+        np.save(tmp_path / "dados.npy", np.column_stack([np.zeros(len(data)), data]))
+        result = summarize_file("dados.npy", column="1", exact_limit=50_000)
+        assert result["maximo"] == float(data.max())
+        assert result["coluna"] == 1
+
+    def test_small_file_stays_exact(self, tmp_path, data):
+        """Até exact_limit o resumo continua exato e serial."""
+        data.tofile(tmp_path / "dados.bin")
+        assert summarize_file("dados.bin")["aproximados"] == []
+
+
+class TestParallelStatisticsAnalyzer:
+    """Testes para o uso do pool por statistics_analyzer no modo aproximado."""
+
+    @pytest.fixture
+    def calls(self, pool, monkeypatch):
+        """Conta os resumos feitos pelo pool instalado."""
+        calls = []
+        summarize_array = pool.summarize_array
+
+        def counted(values, **options):
+            calls.append(len(values))
+            return summarize_array(values, **options)
+
+        monkeypatch.setattr(pool, "summarize_array", counted)
+        monkeypatch.setattr(statistics, "_statistics_pool", pool)
+        return calls
+
+    def test_large_dataset_uses_pool(self, calls, data):
+        """Conjuntos acima de min_values são divididos entre os workers."""
+        values = data[:5000]
+        result = json.loads(statistics_analyzer.invoke({
+            "numbers": ", ".join(map(str, values.tolist())), "approximate": True,
+        }))
+        assert calls == [5000]
+        assert result["contagem"] == 5000
+        assert result["media"] == round(float(values.mean()), 3)
+        assert result["moda"] == MODE_NOT_COMPUTED
+        assert result["aproximados"] == ["mediana", "q1", "q2", "q3", "iqr"]
+        assert 0 < result["erro_rank"] <= 0.01
+
+    def test_exact_and_small_stay_serial(self, calls):
+        """O modo exato e conjuntos pequenos não usam o pool."""
+        numbers = ", ".join(str(n) for n in range(2000))
+        assert json.loads(statistics_analyzer.invoke({"numbers": numbers}))["mediana"] == 999.5
+        statistics_analyzer.invoke({"numbers": "1, 2, 3", "approximate": True})
+        assert calls == []
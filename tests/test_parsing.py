@@ -0,0 +1,68 @@
+"""
+Testes unitários para o parser de listas de números compartilhado pelas ferramentas.
+
+Testa separadores aceitos, o tipo do resultado e a posição informada
+para o primeiro valor inválido.
+"""
+import numpy as np
+import pytest
+
+from src.tools.parsing import NumberParseError, parse_numbers
+
+
+class TestParseNumbersSeparators:
+    """Testes para os separadores aceitos."""
+
+    @pytest.mark.parametrize("text", [
+        "1, 2, 3, 4",
+        "1;2;3;4",
+        "1 2 3 4",
+        "1\n2\n3\n4",
+        "1,\t2 ;\r\n3,,4,",
+        " 1 ,2 3 ; 4 ",
+    ])
+    def test_mixed_separators(self, text):
+        """Vírgulas, ponto e vírgula, espaços e quebras de linha podem ser misturados."""
+        np.testing.assert_array_equal(parse_numbers(text), [1.0, 2.0, 3.0, 4.0])
+
+    def test_returns_float64_array(self):
+        """O resultado é um array float64 unidimensional."""
+        result = parse_numbers("1.5, -2e3, .5")
+        assert result.dtype == np.float64
+        assert result.shape == (3,)
+        assert result.tolist() == [1.5, -2000.0, 0.5]
+
+    @pytest.mark.parametrize("text", ["", "   ", ",;\n"])
+    def test_no_numbers(self, text):
+        """Entradas sem números resultam em um array vazio."""
+        assert parse_numbers(text).size == 0
+
+    def test_same_values_as_float(self):
+        """Cada valor é idêntico ao obtido com float()."""
+        tokens = ["0.1", "1e-310", "123456789.123456789", "inf", "-0.0", "nan", "1_000"]
+        parsed = parse_numbers(", ".join(tokens))
+        expected = np.array([float(token) for token in tokens])
+        np.testing.assert_array_equal(parsed, expected)
+        assert np.signbit(parsed[4])
+
+
+class TestParseNumbersErrors:
+    """Testes para a posição do primeiro valor inválido."""
+
+    @pytest.mark.parametrize("text,token,index,position", [
+        ("1, 2, abc, 4", "abc", 3, 7),
+        ("x", "x", 1, 1),
+        ("1;2\n3\n4.5.6", "4.5.6", 4, 7),
+        ("10, 1-2, zz", "1-2", 2, 5),
+    ])
+    def test_reports_first_bad_token(self, text, token, index, position):
+        """O erro informa o valor, sua ordem e a posição do caractere."""
+        with pytest.raises(NumberParseError) as error:
+            parse_numbers(text)
+        assert (error.value.token, error.value.index, error.value.position) == (token, index, position)
+        assert f"posição {position}" in str(error.value)
+
+    def test_error_is_value_error(self):
+        """NumberParseError é um ValueError, como o parser anterior levantava."""
+        with pytest.raises(ValueError):
+            parse_numbers("1, @, 3")
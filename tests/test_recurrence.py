@@ -0,0 +1,180 @@
+"""
+Testes unitários para as datas recorrentes.
+
+Testa a leitura dos dias da semana, a geração preguiçosa das ocorrências de
+cada frequência, o resumo de séries longas e a ferramenta recurrence_dates.
+"""
+import json
+from datetime import date, timedelta
+from itertools import islice
+
+import pytest
+
+from src.tools.recurrence import (
+    MAX_OCCURRENCES,
+    RecurrenceRule,
+    parse_weekday,
+    recurrence_dates,
+    summarize_occurrences,
+)
+
+
+def every_day(start, end):
+    """Todos os dias do período, para comparar com uma filtragem direta."""
+    return [start + timedelta(days=n) for n in range((end - start).days + 1)]
+
+
+class TestParseWeekday:
+    """Testes para os códigos de dia da semana."""
+
+    @pytest.mark.parametrize("code,expected", [("TU", (0, 1)), ("2tu", (2, 1)), ("-1FR", (-1, 4)), ("+3SU", (3, 6))])
+    def test_codes(self, code, expected):
+        """Códigos com e sem ordem."""
+        assert parse_weekday(code) == expected
+
+    @pytest.mark.parametrize("code", ["XX", "0MO", "MON", "2"])
+    def test_invalid(self, code):
+        """Códigos inválidos geram erro em português."""
+        with pytest.raises(ValueError, match="Dia da semana inválido"):
+            parse_weekday(code)
+
+
+class TestRecurrenceRule:
+    """Testes para a geração das ocorrências."""
+
+    def test_is_lazy(self):
+        """Uma série sem fim só gera as datas consumidas."""
+        occurrences = RecurrenceRule("daily").occurrences(date(2024, 1, 1))
+        assert next(occurrences) == date(2024, 1, 1)
+        assert next(occurrences) == date(2024, 1, 2)
+
+    def test_daily_interval(self):
+        """A cada 10 dias a partir da data inicial."""
+        dates = list(RecurrenceRule("daily", 10).occurrences(date(2024, 1, 1), until=date(2024, 2, 1)))
+        assert dates == [date(2024, 1, 1), date(2024, 1, 11), date(2024, 1, 21), date(2024, 1, 31)]
+
+    def test_weekly_weekdays(self):
+        """Semanal com dias da semana coincide com a filtragem dia a dia."""
+        dates = list(RecurrenceRule("weekly", by_weekday=["MO", "FR"]).occurrences(date(2024, 1, 3), until=date(2024, 6, 30)))
+        expected = [day for day in every_day(date(2024, 1, 3), date(2024, 6, 30)) if day.weekday() in (0, 4)]
+        assert dates == expected
+
+    def test_weekly_interval_skips_weeks(self):
+        """A cada duas semanas, contadas a partir da semana da data inicial."""
+        dates = list(islice(RecurrenceRule("weekly", 2, ["TU"]).occurrences(date(2024, 1, 1)), 3))
+        assert dates == [date(2024, 1, 2), date(2024, 1, 16), date(2024, 1, 30)]
+
+    def test_second_tuesday(self):
+        """A segunda terça de cada mês é a terça entre os dias 8 e 14."""
+        dates = list(RecurrenceRule("monthly", by_weekday=["2TU"]).occurrences(date(2025, 1, 1), until=date(2025, 12, 31)))
+        assert len(dates) == 12
+        assert all(day.weekday() == 1 and 8 <= day.day <= 14 for day in dates)
+
+    def test_last_friday(self):
+        """A última sexta de cada mês."""
+        dates = list(RecurrenceRule("monthly", by_weekday=["-1FR"]).occurrences(date(2024, 1, 1), until=date(2024, 12, 31)))
+        assert all(day.weekday() == 4 and (day + timedelta(days=7)).month != day.month for day in dates)
+        assert len(dates) == 12
+
+    def test_missing_month_days_are_skipped(self):
+        """Dia 31 pula os meses sem dia 31; -1 é sempre o último dia."""
+        rule = RecurrenceRule("monthly")
+        assert [day.month for day in islice(rule.occurrences(date(2024, 1, 31)), 4)] == [1, 3, 5, 7]
+        last = RecurrenceRule("monthly", by_month_day=[-1])
+        assert [day.day for day in islice(last.occurrences(date(2024, 1, 1)), 4)] == [31, 29, 31, 30]
+
+    def test_weekday_and_month_day(self):
+        """Dia da semana e dia do mês juntos: sextas-feiras 13."""
+        rule = RecurrenceRule("monthly", by_weekday=["FR"], by_month_day=[13])
+        dates = list(rule.occurrences(date(2024, 1, 1), until=date(2026, 12, 31)))
+        expected = [day for day in every_day(date(2024, 1, 1), date(2026, 12, 31)) if day.day == 13 and day.weekday() == 4]
+        assert dates == expected
+
+    def test_yearly_leap_day(self):
+        """Anual a partir de 29 de fevereiro só ocorre nos anos bissextos."""
+        dates = list(islice(RecurrenceRule("yearly").occurrences(date(2024, 2, 29)), 3))
+        assert dates == [date(2024, 2, 29), date(2028, 2, 29), date(2032, 2, 29)]
+
+    def test_ends_in_year_9999(self):
+        """A série termina no último ano suportado."""
+        dates = list(RecurrenceRule("weekly").occurrences(date(9999, 12, 1)))
+        assert dates[-1] == date(9999, 12, 29)
+
+    @pytest.mark.parametrize("arguments,message", [
+        ({"frequency": "hourly"}, "Frequência inválida"),
+        ({"frequency": "daily", "interval": 0}, "intervalo"),
+        ({"frequency": "weekly", "by_weekday": ["2TU"]}, "só é permitida"),
+        ({"frequency": "monthly", "by_weekday": ["6TU"]}, "entre -5 e 5"),
+        ({"frequency": "monthly", "by_month_day": [32]}, "Dia do mês inválido"),
+    ])
+    def test_invalid_rules(self, arguments, message):
+        """Regras inválidas geram erro em português."""
+        with pytest.raises(ValueError, match=message):
+            RecurrenceRule(**arguments)
+
+
+class TestSummarizeOccurrences:
+    """Testes para o resumo de séries longas."""
+
+    def test_short_series(self):
+        """Séries curtas são listadas por inteiro."""
+        days = [date(2024, 1, day) for day in range(1, 4)]
+        assert summarize_occurrences(iter(days), 5) == {
+            "total": 3, "primeira": "2024-01-01", "ultima": "2024-01-03",
+            "datas": ["2024-01-01", "2024-01-02", "2024-01-03"],
+        }
+
+    @pytest.mark.parametrize("length", [7, 8, 100])
+    def test_long_series(self, length):
+        """Séries longas mostram as primeiras e as últimas datas e quantas foram omitidas."""
+        days = [date(2024, 1, 1) + timedelta(days=n) for n in range(length)]
+        summary = summarize_occurrences(iter(days), 6)
+        assert summary["datas"] == [day.isoformat() for day in days[:3]]
+        assert summary["ultimas_datas"] == [day.isoformat() for day in days[-3:]]
+        assert summary["datas_omitidas"] == length - 6
+        assert summary["ultima"] == days[-1].isoformat()
+
+    def test_limit(self):
+        """Séries com mais de MAX_OCCURRENCES datas geram erro."""
+        occurrences = RecurrenceRule("daily").occurrences(date(2000, 1, 1))
+        with pytest.raises(ValueError, match="mais de"):
+            summarize_occurrences(islice(occurrences, MAX_OCCURRENCES + 1), 10)
+
+    def test_limit_counts_listed_dates(self):
+        """O limite vale também para as datas listadas, mesmo com max_dates maior que ele."""
+        occurrences = RecurrenceRule("daily").occurrences(date(1000, 1, 1), until=date(9999, 12, 31))
+        with pytest.raises(ValueError, match="mais de"):
+            summarize_occurrences(occurrences, 10 ** 7)
+
+
+class TestRecurrenceDatesTool:
+    """Testes para a ferramenta recurrence_dates."""
+
+    def test_until(self):
+        """A cada 10 dias até 2026, resumido."""
+        result = json.loads(recurrence_dates.invoke({
+            "start": "2024-01-01", "frequency": "daily", "interval": 10, "until": "2026-12-31", "max_dates": 10,
+        }))
+        assert result["total"] == 110
+        assert result["primeira"] == "2024-01-01" and result["ultima"] == "2026-12-26"
+        assert len(result["datas"]) == 5 and result["datas_omitidas"] == 100
+
+    def test_count(self):
+        """count limita o número de ocorrências."""
+        result = json.loads(recurrence_dates.invoke({
+            "start": "2025-01-01", "frequency": "monthly", "by_weekday": ["2TU"], "count": 3,
+        }))
+        assert result["datas"] == ["2025-01-14", "2025-02-11", "2025-03-11"]
+        assert result["regra"] == "monthly a cada 1; by_weekday 2TU"
+
+    @pytest.mark.parametrize("arguments,message", [
+        ({"start": "2024-01-01", "frequency": "daily"}, "count ou until"),
+        ({"start": "2024-01-01", "frequency": "daily", "count": 0}, "count"),
+        ({"start": "2024-13-01", "frequency": "daily", "count": 1}, "Erro em start"),
+        ({"start": "2024-01-01", "frequency": "daily", "until": "amanhã"}, "Erro em until"),
+        ({"start": "2024-01-01", "frequency": "daily", "until": "2400-01-01"}, "mais de"),
+        ({"start": "1000-01-01", "frequency": "daily", "until": "9999-12-31", "max_dates": 10 ** 7}, "max_dates"),
+    ])
+    def test_errors(self, arguments, message):
+        """Entradas inválidas geram mensagens de erro em português."""
+        assert message in json.loads(recurrence_dates.invoke(arguments))["erro"]
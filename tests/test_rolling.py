@@ -0,0 +1,197 @@
+"""
+Testes unitários para as estatísticas em janelas móveis.
+
+Testa as somas acumuladas, a janela ordenada, os quantis por janela, a
+redução de pontos e a ferramenta rolling_statistics.
+"""
+import json
+
+import numpy as np
+import pytest
+
+from src.tools.rolling import (
+    SortedWindow,
+    VECTORIZED_MAX_WINDOW,
+    quantile_key,
+    rolling_mean,
+    rolling_quantiles,
+    rolling_statistics,
+    rolling_sum,
+    rolling_variance,
+)
+
+
+def windows(data, window):
+    """Todas as janelas, para comparar com as chamadas diretas do NumPy."""
+    return np.lib.stride_tricks.sliding_window_view(data, window)
+
+
+@pytest.fixture
+def data():
+    return np.round(np.random.default_rng(0).normal(1000, 5, 3000), 1)
+
+
+class TestRollingMoments:
+    """Testes para soma, média e variância por somas acumuladas."""
+
+    @pytest.mark.parametrize("window", [1, 2, 7, 500, 3000])
+    def test_sum_and_mean(self, data, window):
+        """Soma e média coincidem com o cálculo janela a janela."""
+        np.testing.assert_allclose(rolling_sum(data, window), windows(data, window).sum(axis=1), rtol=1e-12)
+        np.testing.assert_allclose(rolling_mean(data, window), windows(data, window).mean(axis=1), rtol=1e-12)
+
+    @pytest.mark.parametrize("window", [2, 7, 500, 3000])
+    def test_variance_far_from_zero(self, data, window):
+        """A variância é precisa mesmo com valores longe de zero."""
+        expected = windows(data, window).var(axis=1, ddof=1)
+        np.testing.assert_allclose(rolling_variance(data, window), expected, rtol=1e-8, atol=1e-9)
+
+    def test_constant_series(self):
+        """Janelas constantes têm variância zero, nunca negativa."""
+        assert np.all(rolling_variance(np.full(100, 0.1), 10) == 0)
+
+    def test_nan_only_affects_its_windows(self):
+        """NaN torna NaN só as janelas que o contêm."""
+        data = np.arange(10, dtype=float)
+        data[4] = np.nan
+        sums = rolling_sum(data, 3)
+        assert np.isnan(sums[2:5]).all()
+        assert sums[1] == 6.0 and sums[5] == 18.0
+        assert np.isnan(rolling_variance(data, 3)[2:5]).all()
+
+    def test_large_value_only_affects_its_windows(self):
+        """Um valor enorme não estraga a precisão das janelas seguintes."""
+        data = np.array([1e16] + [1.0] * 10)
+        assert np.all(rolling_sum(data, 3)[1:] == 3.0)
+        variances = rolling_variance(data, 3)
+        assert np.all(variances[1:] == 0.0)
+        assert variances[0] == pytest.approx(np.var(data[:3], ddof=1))
+
+    @pytest.mark.parametrize("window", [2, 3, 500])
+    def test_large_values_in_random_data(self, data, window):
+        """Picos enormes espalhados afetam só as janelas que os contêm."""
+        spiky = data.copy()
+        spiky[::997] = 1e15
+        expected = windows(spiky, window)
+        np.testing.assert_allclose(rolling_sum(spiky, window), expected.sum(axis=1), rtol=1e-12)
+        calm = ~(expected == 1e15).any(axis=1)
+        np.testing.assert_allclose(rolling_variance(spiky, window)[calm], expected[calm].var(axis=1, ddof=1), rtol=1e-8)
+
+    def test_infinity_only_affects_its_windows(self):
+        """inf e -inf afetam só as janelas que os contêm, como no NumPy e sem avisos."""
+        data = np.array([np.inf, 1, 2, 3, 4, 5, -np.inf, 7])
+        with np.errstate(all="raise"):
+            sums = rolling_sum(data, 2)
+            variances = rolling_variance(data, 2)
+        assert sums.tolist() == [np.inf, 3, 5, 7, 9, -np.inf, -np.inf]
+        assert np.isnan(variances[[0, 5, 6]]).all()
+        assert variances[1:5].tolist() == [0.5] * 4
+        assert np.isnan(rolling_sum(np.array([np.inf, -np.inf, 1.0]), 2)[0])
+
+
+class TestSortedWindow:
+    """Testes para a janela ordenada."""
+
+    def test_matches_sorted_list(self):
+        """Inserções e remoções mantêm os valores ordenados, com blocos pequenos."""
+        rng = np.random.default_rng(1)
+        window = SortedWindow(load=4)
+        reference = []
+        for value in rng.integers(0, 20, 300).astype(float).tolist():
+            window.add(value)
+            reference.append(value)
+            if len(reference) > 25:
+                window.remove(reference.pop(0))
+            ordered = sorted(reference)
+            assert len(window) == len(ordered)
+            assert [window[rank] for rank in range(len(ordered))] == ordered
+
+    def test_quantile_with_nan(self):
+        """Uma janela com NaN tem quantis NaN até o NaN sair."""
+        window = SortedWindow()
+        for value in [1.0, float("nan"), 3.0]:
+            window.add(value)
+        assert np.isnan(window.quantile(0.5))
+        window.remove(float("nan"))
+        assert window.quantile(0.5) == 2.0
+
+
+class TestRollingQuantiles:
+    """Testes para mediana e quantis por janela."""
+
+    @pytest.mark.parametrize("window", [1, 5, VECTORIZED_MAX_WINDOW, VECTORIZED_MAX_WINDOW + 1, 700])
+    def test_matches_numpy(self, data, window):
+        """Os dois caminhos (ordenação em bloco e janela ordenada) coincidem com np.quantile."""
+        fractions = [0.5, 0.0, 1.0, 0.1, 0.95]
+        expected = np.quantile(windows(data, window), fractions, axis=1)
+        np.testing.assert_array_equal(rolling_quantiles(data, window, fractions), expected)
+
+    @pytest.mark.parametrize("window", [3, VECTORIZED_MAX_WINDOW + 6])
+    def test_nan_windows(self, data, window):
+        """As janelas com NaN têm quantis NaN nos dois caminhos."""
+        data = data[:300].copy()
+        data[100] = np.nan
+        medians = rolling_quantiles(data, window, [0.5])[0]
+        np.testing.assert_array_equal(np.isnan(medians), np.isnan(windows(data, window)).any(axis=1))
+
+    @pytest.mark.parametrize("fraction,key", [(0.9, "p90"), (0.975, "p97.5"), (0.05, "p5")])
+    def test_quantile_key(self, fraction, key):
+        """Quantis são nomeados pelo percentual."""
+        assert quantile_key(fraction) == key
+
+
+class TestRollingStatisticsTool:
+    """Testes para a ferramenta rolling_statistics."""
+
+    def test_moving_average(self):
+        """A média móvel é o padrão."""
+        result = json.loads(rolling_statistics.invoke({"numbers": "1, 2, 3, 4, 5, 6", "window": 3}))
+        assert result["media"] == [2.0, 3.0, 4.0, 5.0]
+        assert result["janelas"] == 4 and result["passo"] == 1
+        assert result["posicao_inicial"] == 3
+
+    def test_several_measures(self):
+        """Várias medidas e quantis em uma única chamada."""
+        result = json.loads(rolling_statistics.invoke({
+            "numbers": "5, 1, 4, 2, 3, 9",
+            "window": 3,
+            "measures": ["mediana", "minimo", "maximo", "desvio_padrao"],
+            "quantiles": [0.25],
+        }))
+        assert result["mediana"] == [4.0, 2.0, 3.0, 3.0]
+        assert result["minimo"] == [1.0, 1.0, 2.0, 2.0]
+        assert result["maximo"] == [5.0, 4.0, 4.0, 9.0]
+        assert result["p25"] == [2.5, 1.5, 2.5, 2.5]
+        assert result["desvio_padrao"][0] == round(float(np.std([5, 1, 4], ddof=1)), 3)
+
+    def test_downsampling(self):
+        """Séries longas são reduzidas a max_points janelas igualmente espaçadas."""
+        numbers = ", ".join(str(value) for value in range(1000))
+        result = json.loads(rolling_statistics.invoke({"numbers": numbers, "window": 10, "max_points": 50}))
+        assert result["janelas"] == 991
+        assert result["pontos"] == len(result["media"]) <= 50
+        step = result["passo"]
+        assert result["media"][1] == 4.5 + step
+
+    def test_nan_is_null(self):
+        """Janelas com NaN aparecem como null."""
+        result = json.loads(rolling_statistics.invoke({"numbers": "1, nan, 3, 4", "window": 2}))
+        assert result["media"] == [None, None, 3.5]
+
+    def test_dataset_handle(self):
+        """Aceita o identificador de um conjunto registrado."""
+        handle = json.loads(rolling_statistics.invoke({"numbers": "1, 2, 3, 4", "window": 2}))["conjunto"]
+        result = json.loads(rolling_statistics.invoke({"numbers": handle, "window": 3}))
+        assert result["media"] == [2.0, 3.0]
+
+    @pytest.mark.parametrize("arguments,message", [
+        ({"numbers": "1, 2, 3", "window": 4}, "janela"),
+        ({"numbers": "1, 2, 3", "window": 1, "measures": ["variancia"]}, "janela"),
+        ({"numbers": "1, 2, 3", "window": 2, "measures": ["moda"]}, "Medida desconhecida"),
+        ({"numbers": "1, 2, 3", "window": 2, "quantiles": [1.5]}, "quantis"),
+        ({"numbers": "1, x, 3", "window": 2}, "Formato de entrada inválido"),
+        ({"numbers": "", "window": 2}, "vazia"),
+    ])
+    def test_errors(self, arguments, message):
+        """Entradas inválidas geram mensagens de erro em português."""
+        assert message in json.loads(rolling_statistics.invoke(arguments))["erro"]
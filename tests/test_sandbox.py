@@ -0,0 +1,155 @@
+"""
+Testes unitários para a execução isolada da calculadora em processos.
+
+Testa a avaliação nos workers, a propagação de erros, os limites de tempo,
+a reciclagem de workers e a escolha entre execução local e isolada.
+"""
+from fractions import Fraction
+
+import pytest
+from src.tools.calculator import (
+    calculator,
+    compile_expression,
+    EvaluationBudget,
+    EvaluationTimeoutError,
+    get_calculator_metrics,
+    reset_calculator_metrics,
+    set_execution_backend,
+)
+from src.tools.sandbox import SandboxError, SandboxPool
+
+
+# Orçamento sem limites, para que só o tempo limite do pool interrompa
+UNLIMITED = EvaluationBudget(max_operations=10 ** 9, max_result_digits=10 ** 12, timeout=None)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    """Pool com um único worker, compartilhado pelos testes do módulo."""
+    with SandboxPool(workers=1, timeout=2.0) as sandbox:
+        yield sandbox
+
+
+class TestSandboxEvaluation:
+    """Testes para a avaliação de expressões nos workers."""
+
+    def test_evaluates_in_worker(self, pool):
+        """Resultados são calculados no worker e devolvidos ao processo principal."""
+        assert pool.evaluate("2 + 2") == 4.0
+        assert pool.evaluate("2 ** 100", exact=True) == 2 ** 100
+        assert pool.evaluate("1/3 + 1/6", exact=True) == Fraction(1, 2)
+
+    @pytest.mark.parametrize("expression,error", [
+        ("10 / 0", ZeroDivisionError),
+        ("unsupported_func(10)", ValueError),
+        ("10.0 ** 400", OverflowError),
+    ])
+    def test_errors_keep_their_type(self, pool, expression, error):
+        """Erros do worker são recriados com o mesmo tipo."""
+        with pytest.raises(error):
+            pool.evaluate(expression)
+
+
+class TestSandboxLimits:
+    """Testes para o tempo limite e a reciclagem de workers."""
+
+    def test_timeout_recycles_worker(self, pool):
+        """Um worker que estoura o tempo é encerrado e substituído."""
+        before = pool.stats()
+        with pytest.raises(EvaluationTimeoutError):
+            pool.evaluate("10 ** 10 ** 8", exact=True, budget=UNLIMITED, timeout=0.3)
+
+        after = pool.stats()
+        assert after["timeouts"] == before["timeouts"] + 1
+        assert after["recycled"] == before["recycled"] + 1
+        assert after["workers"] == 1
+        # O novo worker atende normalmente
+        assert pool.evaluate("3 * 3") == 9.0
+
+    def test_workers_recycled_after_max_tasks(self, pool):
+        """Workers são substituídos após o número máximo de avaliações."""
+        before = pool.stats()["recycled"]
+        pool.max_tasks_per_worker = 1
+        try:
+            assert pool.evaluate("1 + 1") == 2.0
+        finally:
+            pool.max_tasks_per_worker = 1000
+        assert pool.stats()["recycled"] == before + 1
+        assert pool.evaluate("1 + 2") == 3.0
+
+    def test_busy_pool(self, pool):
+        """Sem worker livre dentro do tempo limite, a avaliação falha em vez de esperar para sempre."""
+        worker = pool._idle.get()
+        try:
+            with pytest.raises(SandboxError, match="Sandbox ocupado"):
+                pool.evaluate("1 + 1", timeout=0.1)
+        finally:
+            pool._idle.put(worker)
+        assert pool.stats()["busy"] >= 1
+        assert pool.evaluate("1 + 1") == 2.0
+
+    def test_invalid_pool_size(self):
+        """Um pool precisa de ao menos um worker."""
+        with pytest.raises(ValueError):
+            SandboxPool(workers=0)
+
+
+class TestSandboxBackend:
+    """Testes para o uso do pool como backend da calculadora."""
+
+    @pytest.mark.parametrize("expression,exact,isolated", [
+        ("2 + 2", False, False),
+        ("2 ** 100", True, False),
+        ("2 ** 100000", True, True),
+        (" + ".join(["1"] * 20000), False, True),
+    ])
+    def test_should_isolate(self, pool, expression, exact, isolated):
+        """Só expressões caras são enviadas aos workers."""
+        assert pool.should_isolate(compile_expression(expression, exact=exact)) is isolated
+
+    def test_calculator_uses_backend(self, pool):
+        """A calculadora envia expressões caras ao pool e avalia as baratas localmente."""
+        set_execution_backend(pool)
+        try:
+            before = pool.stats()["evaluations"]
+            assert calculator.invoke({"expression": "2 + 2"}) == "Resultado: 4"
+            assert pool.stats()["evaluations"] == before
+
+            result = calculator.invoke({"expression": "2 ** 5000", "exact": True})
+            assert result == f"Resultado: {2 ** 5000}"
+            assert pool.stats()["evaluations"] == before + 1
+            assert "backend" in get_calculator_metrics()
+        finally:
+            set_execution_backend(None)
+
+    def test_budget_checked_before_dispatch(self, pool):
+        """Expressões acima do orçamento são rejeitadas sem usar um worker."""
+        set_execution_backend(pool)
+        try:
+            before = pool.stats()["evaluations"]
+            result = calculator.invoke({"expression": "10 ** 10 ** 8", "exact": True})
+            assert result.startswith("Erro: Result too large")
+            assert pool.stats()["evaluations"] == before
+        finally:
+            set_execution_backend(None)
+
+    def test_backend_timeouts_are_counted(self):
+        """Tempos esgotados no backend entram nas métricas da calculadora."""
+        class SlowBackend:
+            def should_isolate(self, compiled):
+                return True
+
+            def evaluate(self, expression, exact, budget):
+                raise EvaluationTimeoutError("Evaluation exceeded the time limit")
+
+            def stats(self):
+                return {}
+
+        reset_calculator_metrics()
+        set_execution_backend(SlowBackend())
+        try:
+            assert calculator.invoke({"expression": "2 + 3"}).startswith("Erro")
+            assert get_calculator_metrics()["timeouts"] == 1
+        finally:
+            set_execution_backend(None)
+            reset_calculator_metrics()
@@ -0,0 +1,162 @@
+"""
+Testes unitários para o sketch de quantis (KLL).
+
+Testa quantis exatos enquanto todos os valores cabem no sketch, o erro
+de rank depois das compactações e a combinação de sketches.
+"""
+import numpy as np
+import pytest
+
+from src.tools.sketch import QuantileSketch
+
+
+FRACTIONS = [0.0, 0.01, 0.25, 0.5, 0.75, 0.99, 1.0]
+
+
+def rank_errors(sketch, data):
+    """Erro de rank normalizado de cada quantil estimado."""
+    ordered = np.sort(data)
+    estimates = sketch.quantiles(FRACTIONS)
+    ranks = np.searchsorted(ordered, estimates, side="left") / len(data)
+    return np.abs(ranks - np.array(FRACTIONS))
+
+
+class TestQuantileSketchExact:
+    """Testes para o sketch antes de qualquer compactação."""
+
+    def test_small_dataset_is_exact(self):
+        """Com poucos valores, os quantis são iguais aos do NumPy."""
+        data = np.random.default_rng(0).normal(0, 1, 150)
+        sketch = QuantileSketch(k=200).update(data)
+        assert sketch.exact
+        np.testing.assert_array_equal(sketch.quantiles(FRACTIONS), np.quantile(data, FRACTIONS))
+
+    def test_nan_values_are_skipped(self):
+        """Valores NaN não entram no sketch."""
+        sketch = QuantileSketch().update([1.0, float("nan"), 3.0])
+        assert sketch.count == 2
+        assert sketch.quantile(0.5) == 2.0
+
+    def test_empty_sketch(self):
+        """Consultar um sketch vazio gera erro."""
+        with pytest.raises(ValueError):
+            QuantileSketch().quantile(0.5)
+
+    @pytest.mark.parametrize("fraction", [-0.1, 1.5])
+    def test_fraction_out_of_range(self, fraction):
+        """Quantis fora de [0, 1] são rejeitados."""
+        with pytest.raises(ValueError):
+            QuantileSketch().update([1, 2, 3]).quantile(fraction)
+
+
+class TestQuantileSketchApproximate:
+    """Testes para o sketch depois das compactações."""
+
+    def test_bounded_memory(self):
+        """Um milhão de valores cabem em poucas centenas de itens."""
+        sketch = QuantileSketch(k=200)
+        for chunk in np.array_split(np.random.default_rng(1).uniform(0, 1, 1_000_000), 20):
+            sketch.update(chunk)
+        assert sketch.count == 1_000_000
+        assert not sketch.exact
+        assert sketch.retained < 1000
+
+    def test_rank_error(self):
+        """O erro de rank fica em torno de 1% com k=200."""
+        data = np.random.default_rng(2).lognormal(0, 2, 500_000)
+        sketch = QuantileSketch(k=200).update(data)
+        assert rank_errors(sketch, data).max() < 0.03
+
+    def test_extremes_are_exact(self):
+        """Os quantis 0 e 1 são o mínimo e o máximo exatos."""
+        data = np.random.default_rng(3).normal(0, 1, 100_000)
+        sketch = QuantileSketch().update(data)
+        assert sketch.quantile(0) == data.min()
+        assert sketch.quantile(1) == data.max()
+
+
+class TestQuantileSketchMerge:
+    """Testes para a combinação de sketches."""
+
+    def test_merge_matches_single_sketch_accuracy(self):
+        """Sketches de partes do dataset combinados mantêm o erro baixo."""
+        data = np.random.default_rng(4).normal(0, 1, 400_000)
+        merged = QuantileSketch()
+        for shard in np.array_split(data, 8):
+            merged.merge(QuantileSketch().update(shard))
+        assert merged.count == len(data)
+        assert rank_errors(merged, data).max() < 0.03
+
+    def test_merge_of_exact_sketches_stays_exact(self):
+        """Combinar sketches pequenos mantém os quantis exatos."""
+        first = QuantileSketch().update([1, 2, 3])
+        first.merge(QuantileSketch().update([4, 5]))
+        assert first.exact
+        assert first.quantile(0.5) == 3.0
+
+    def test_merge_requires_same_k(self):
+        """Sketches com k diferentes não podem ser combinados."""
+        with pytest.raises(ValueError):
+            QuantileSketch(k=100).merge(QuantileSketch(k=200).update([1.0]))
+
+
+class TestQuantileSketchErrorBound:
+    """Testes para o limite de erro configurável."""
+
+    @pytest.mark.parametrize("error", [0.05, 0.01, 0.005])
+    def test_error_bound_holds(self, error):
+        """O erro de rank observado fica dentro do limite pedido."""
+        data = np.random.default_rng(5).exponential(1, 300_000)
+        sketch = QuantileSketch.for_error(error).update(data)
+        assert sketch.rank_error <= error
+        assert rank_errors(sketch, data).max() <= error
+
+    def test_smaller_error_needs_larger_k(self):
+        """Limites menores resultam em sketches maiores."""
+        assert QuantileSketch.for_error(0.001).k > QuantileSketch.for_error(0.01).k
+
+    def test_exact_sketch_has_no_error(self):
+        """Enquanto exato, o limite de erro é zero."""
+        assert QuantileSketch.for_error(0.01).update([1, 2, 3]).rank_error == 0.0
+
+    @pytest.mark.parametrize("error", [0, -0.1, 1])
+    def test_invalid_error(self, error):
+        """Limites fora de (0, 1) são rejeitados."""
+        with pytest.raises(ValueError):
+            QuantileSketch.for_error(error)
+
+
+class TestQuantileSketchSerialization:
+    """Testes para a serialização em bytes."""
+
+    def test_round_trip(self):
+        """O sketch restaurado responde os mesmos quantis."""
+        sketch = QuantileSketch().update(np.random.default_rng(6).normal(0, 1, 50_000))
+        restored = QuantileSketch.from_bytes(sketch.to_bytes())
+        assert (restored.k, restored.count, restored.exact) == (sketch.k, sketch.count, sketch.exact)
+        np.testing.assert_array_equal(restored.quantiles(FRACTIONS), sketch.quantiles(FRACTIONS))
+
+    def test_compact_size(self):
+        """Milhões de valores cabem em poucos kilobytes."""
+        sketch = QuantileSketch().update(np.random.default_rng(7).uniform(0, 1, 2_000_000))
+        assert len(sketch.to_bytes()) < 4096
+
+    def test_shards_merged_from_bytes(self):
+        """Sketches serializados por partes podem ser restaurados e combinados."""
+        data = np.random.default_rng(8).normal(5, 2, 200_000)
+        payloads = [QuantileSketch().update(shard).to_bytes() for shard in np.array_split(data, 4)]
+        merged = QuantileSketch()
+        for payload in payloads:
+            merged.merge(QuantileSketch.from_bytes(payload))
+        assert merged.count == len(data)
+        assert rank_errors(merged, data).max() < 0.03
+
+    def test_empty_sketch_round_trip(self):
+        """Um sketch vazio também pode ser serializado."""
+        assert QuantileSketch.from_bytes(QuantileSketch().to_bytes()).count == 0
+
+    @pytest.mark.parametrize("payload", [b"", b"not a sketch at all, just bytes", QuantileSketch().update([1.0]).to_bytes()[:-1]])
+    def test_invalid_bytes(self, payload):
+        """Dados que não são um sketch geram ValueError."""
+        with pytest.raises(ValueError):
+            QuantileSketch.from_bytes(payload)
@@ -5,7 +5,9 @@ Testa cálculos estatísticos, casos extremos e tratamento de erros.
 """
 import pytest
 import json
-from src.tools.statistics import statistics_analyzer
+import statistics
+import numpy as np
+from src.tools.statistics import compute_measures, statistics_analyzer, summarize
 
 
 class TestStatisticsNormalDatasets:
@@ -246,6 +248,21 @@ class TestStatisticsErrorHandling:
         assert isinstance(data, dict)
 
 
+class TestStatisticsInputFormats:
+    """Testes para os separadores aceitos na entrada."""
+
+    def test_semicolons_and_newlines(self):
+        """Ponto e vírgula e quebras de linha dão o mesmo resultado que vírgulas."""
+        expected = json.loads(statistics_analyzer("1, 2, 3, 4, 5"))
+        assert json.loads(statistics_analyzer("1; 2; 3\n4\n5")) == expected
+
+    def test_error_reports_position(self):
+        """O erro indica o primeiro valor inválido e sua posição."""
+        data = json.loads(statistics_analyzer("1, 2, abc, 4"))
+        assert "'abc'" in data["erro"]
+        assert "posição 7" in data["erro"]
+
+
 class TestStatisticsOutputFormat:
     """Testes para verificar formato de saída."""
 
@@ -319,3 +336,127 @@ class TestStatisticsRounding:
                 # Verifica se não tem mais de 3 casas decimais
                 decimal_places = len(str(value).split('.')[-1]) if '.' in str(value) else 0
                 assert decimal_places <= 3, f"{key} tem muitas casas decimais: {value}"
+
+
+class TestStatisticsSummaryKernel:
+    """Testes para o kernel que calcula todas as medidas com uma única ordenação."""
+
+    @staticmethod
+    def _separate_calls(values):
+        data = np.array(values)
+        return (
+            len(values), float(np.mean(data)), float(np.median(data)), statistics.mode(values),
+            float(np.std(data, ddof=1)), float(np.var(data, ddof=1)), float(np.min(data)),
+            float(np.max(data)), float(np.percentile(data, 25)), float(np.percentile(data, 50)),
+            float(np.percentile(data, 75)),
+        )
+
+    @pytest.mark.parametrize("seed,size", [(0, 2), (1, 3), (2, 10), (3, 101), (4, 1000), (5, 100_000)])
+    def test_matches_separate_numpy_calls(self, seed, size):
+        """Os resultados são idênticos, bit a bit, aos das chamadas separadas do NumPy."""
+        values = np.round(np.random.default_rng(seed).normal(0, 100, size), 1).tolist()
+        assert tuple(summarize(np.array(values))) == self._separate_calls(values)
+
+    @pytest.mark.parametrize("values", [
+        [3.0, 1.0, 2.0, 1.0, 3.0],
+        [5.0, 4.0, 3.0, 2.0],
+        [2.0, 2.0, 7.0, 7.0, 7.0, 2.0],
+    ])
+    def test_mode_ties_follow_first_occurrence(self, values):
+        """Em caso de empate, a moda é o valor que aparece primeiro, como em statistics.mode."""
+        assert summarize(np.array(values)).mode == statistics.mode(values)
+
+    def test_nan_propagates_to_order_statistics(self):
+        """NaN torna mediana, quartis, mínimo e máximo NaN, como no NumPy."""
+        summary = summarize(np.array([1.0, float("nan"), 3.0]))
+        assert np.isnan(summary.median) and np.isnan(summary.q1) and np.isnan(summary.maximum)
+
+
+class TestStatisticsApproximateMode:
+    """Testes para o modo aproximado com sketch de quantis."""
+
+    def test_large_dataset(self):
+        """Quartis aproximados ficam perto dos exatos e o limite de erro é informado."""
+        values = np.random.default_rng(0).normal(50, 10, 200_000)
+        numbers = ", ".join(f"{value:.3f}" for value in values)
+        exact = json.loads(statistics_analyzer.invoke({"numbers": numbers}))
+        approximate = json.loads(statistics_analyzer.invoke({"numbers": numbers, "approximate": True}))
+
+        assert approximate["aproximados"] == ["mediana", "q1", "q2", "q3", "iqr"]
+        assert approximate["erro_rank"] == 0.01
+        assert approximate["media"] == exact["media"]
+        assert approximate["desvio_padrao"] == exact["desvio_padrao"]
+        assert approximate["minimo"] == exact["minimo"]
+        assert approximate["mediana"] == pytest.approx(exact["mediana"], abs=0.5)
+        assert approximate["q3"] == pytest.approx(exact["q3"], abs=0.5)
+
+    def test_small_dataset_is_exact(self):
+        """Com poucos valores o modo aproximado dá os quartis exatos."""
+        exact = json.loads(statistics_analyzer.invoke({"numbers": "1, 2, 3, 4, 5"}))
+        approximate = json.loads(statistics_analyzer.invoke({"numbers": "1, 2, 3, 4, 5", "approximate": True}))
+        assert approximate["aproximados"] == []
+        assert approximate["erro_rank"] == 0.0
+        assert approximate["q1"] == exact["q1"]
+        assert "aproximado" in approximate["moda"]
+
+    def test_invalid_error_bound(self):
+        """Limites de erro fora do intervalo aceito geram erro."""
+        result = json.loads(statistics_analyzer.invoke({"numbers": "1, 2, 3", "approximate": True, "error_bound": 0.5}))
+        assert "erro" in result
+
+
+class TestStatisticsMeasures:
+    """Testes para o cálculo apenas das medidas pedidas."""
+
+    NUMBERS = "4, 8, 15, 16, 23, 42, 8"
+
+    def _full(self):
+        result = json.loads(statistics_analyzer.invoke({"numbers": self.NUMBERS}))
+        result.pop("conjunto")
+        return result
+
+    @pytest.mark.parametrize("measures", [
+        ["media"],
+        ["iqr"],
+        ["desvio_padrao", "mediana"],
+        ["moda", "amplitude", "contagem"],
+    ])
+    def test_selected_measures_match_full_result(self, measures):
+        """Apenas as medidas pedidas são retornadas, com os mesmos valores do resultado completo."""
+        result = json.loads(statistics_analyzer.invoke({"numbers": self.NUMBERS, "measures": measures}))
+        result.pop("conjunto")
+        full = self._full()
+        assert result == {key: full[key] for key in full if key in measures}
+
+    def test_output_order_and_case(self):
+        """As chaves seguem a ordem do resultado completo, sem diferenciar maiúsculas."""
+        result = json.loads(statistics_analyzer.invoke({"numbers": self.NUMBERS, "measures": ["IQR", " media"]}))
+        assert list(result) == ["media", "iqr", "conjunto"]
+
+    def test_unknown_measure(self):
+        """Uma medida desconhecida gera erro listando as disponíveis."""
+        result = json.loads(statistics_analyzer.invoke({"numbers": self.NUMBERS, "measures": ["mediaa"]}))
+        assert "mediaa" in result["erro"]
+        assert "desvio_padrao" in result["erro"]
+
+    def test_empty_selection_returns_everything(self):
+        """Uma lista vazia equivale a pedir todas as medidas."""
+        result = json.loads(statistics_analyzer.invoke({"numbers": self.NUMBERS, "measures": []}))
+        result.pop("conjunto")
+        assert result == self._full()
+
+    def test_approximate_mode(self):
+        """No modo aproximado, aproximados lista só as medidas pedidas que são estimadas."""
+        values = ", ".join(map(str, range(20_000)))
+        result = json.loads(statistics_analyzer.invoke({
+            "numbers": values, "approximate": True, "measures": ["media", "mediana"],
+        }))
+        assert set(result) == {"media", "mediana", "aproximados", "erro_rank", "conjunto"}
+        assert result["aproximados"] == ["mediana"]
+
+    def test_only_prerequisites_are_computed(self):
+        """A média não ordena os dados; o IQR calcula Q1 e Q3 a partir de uma única ordenação."""
+        data = np.array([3.0, 1.0, 2.0, 5.0])
+        assert set(compute_measures(data, ["mean"])) == {"moments", "mean"}
+        assert set(compute_measures(data, ["iqr"])) == {"sorted", "q1", "q3", "iqr"}
+        assert set(compute_measures(data, ["std_dev"])) == {"moments", "variance", "std_dev"}
@@ -0,0 +1,118 @@
+"""
+Testes unitários para a estatística em streaming.
+
+Testa o acumulador por partes, a combinação de acumuladores, a leitura
+de arquivos em blocos e o indicador de valores aproximados.
+"""
+import io
+import json
+
+import numpy as np
+import pytest
+
+from src.tools.statistics import statistics_analyzer
+from src.tools.streaming import StreamingStatistics, analyze_stream, read_number_chunks
+
+
+def reference(data):
+    """Resultado da ferramenta statistics_analyzer para os mesmos dados."""
+    result = json.loads(statistics_analyzer.func(", ".join(map(repr, data.tolist()))))
+    result.pop("conjunto", None)
+    return result
+
+
+@pytest.fixture
+def data():
+    return np.round(np.random.default_rng(0).normal(50, 10, 2000), 1)
+
+
+class TestStreamingExact:
+    """Testes para datasets que cabem no buffer exato."""
+
+    def test_chunks_match_tool(self, data):
+        """Processar em partes dá o mesmo resultado da ferramenta."""
+        accumulator = StreamingStatistics()
+        for chunk in np.array_split(data, 9):
+            accumulator.update(chunk)
+        assert accumulator.result() == {**reference(data), "aproximados": []}
+
+    def test_merge_matches_tool(self, data):
+        """Combinar acumuladores equivale a processar tudo em um só."""
+        first, second = StreamingStatistics(), StreamingStatistics()
+        first.update(data[:700])
+        second.update(data[700:])
+        assert first.merge(second).result() == {**reference(data), "aproximados": []}
+
+    def test_text_chunks(self):
+        """Partes em texto usam o parser compartilhado."""
+        result = StreamingStatistics().update("1, 2; 3").update("4\n5").result()
+        assert result["media"] == 3.0
+        assert result["contagem"] == 5
+
+    def test_single_and_no_values(self):
+        """Um único valor e nenhum valor seguem o comportamento da ferramenta."""
+        assert StreamingStatistics().update([7.0]).result()["valor"] == 7.0
+        with pytest.raises(ValueError):
+            StreamingStatistics().result()
+
+
+class TestStreamingApproximate:
+    """Testes para datasets maiores que o buffer exato."""
+
+    def test_moments_stay_exact(self):
+        """Média, desvio, mínimo e máximo continuam exatos; quartis são aproximados."""
+        data = np.random.default_rng(1).normal(10, 3, 300_000)
+        accumulator = StreamingStatistics(exact_limit=10_000)
+        for chunk in np.array_split(data, 30):
+            accumulator.update(chunk)
+        result = accumulator.result()
+
+        assert result["aproximados"] == ["mediana", "q1", "q2", "q3", "iqr"]
+        assert result["media"] == pytest.approx(round(float(np.mean(data)), 3), abs=1e-3)
+        assert result["desvio_padrao"] == pytest.approx(round(float(np.std(data, ddof=1)), 3), abs=1e-3)
+        assert result["minimo"] == round(float(data.min()), 3)
+        assert result["q1"] == pytest.approx(np.percentile(data, 25), abs=0.2)
+        assert result["q3"] == pytest.approx(np.percentile(data, 75), abs=0.2)
+
+    def test_mode_with_few_distinct_values(self):
+        """A moda continua exata enquanto há poucos valores distintos."""
+        data = np.random.default_rng(2).integers(0, 50, 200_000).astype(float)
+        accumulator = StreamingStatistics(exact_limit=1000)
+        for chunk in np.array_split(data, 10):
+            accumulator.update(chunk)
+        values, counts = np.unique(data, return_counts=True)
+        assert accumulator.result()["moda"] == str(values[counts.argmax()])
+
+    def test_mode_unavailable_with_many_distinct_values(self):
+        """Com muitos valores distintos a moda é informada como indisponível."""
+        accumulator = StreamingStatistics(exact_limit=1000, max_distinct=100)
+        accumulator.update(np.arange(5000.0))
+        assert "Indisponível" in accumulator.result()["moda"]
+
+    def test_merge_after_buffers_overflow(self):
+        """Acumuladores além do buffer exato também podem ser combinados."""
+        data = np.random.default_rng(3).uniform(0, 100, 50_000)
+        parts = [StreamingStatistics(exact_limit=5000).update(part) for part in np.array_split(data, 4)]
+        merged = parts[0]
+        for part in parts[1:]:
+            merged.merge(part)
+        result = merged.result()
+        assert result["contagem"] == len(data)
+        assert result["mediana"] == pytest.approx(np.median(data), abs=2.0)
+
+
+class TestStreamingFiles:
+    """Testes para a leitura de arquivos em blocos."""
+
+    def test_chunks_never_split_numbers(self, data):
+        """Blocos pequenos não cortam números ao meio."""
+        text = "\n".join(f"{value:.1f}" for value in data)
+        chunks = list(read_number_chunks(io.StringIO(text), chunk_size=16))
+        assert len(chunks) > 1
+        np.testing.assert_array_equal(np.concatenate(chunks), data)
+
+    def test_analyze_stream(self, data):
+        """analyze_stream calcula o resultado a partir de um iterável de blocos."""
+        text = ", ".join(f"{value:.1f}" for value in data)
+        result = analyze_stream(read_number_chunks(io.StringIO(text), chunk_size=100))
+        assert result == {**reference(data), "aproximados": []}